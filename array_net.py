@@ -0,0 +1,392 @@
+from __future__ import annotations
+import numpy
+from array_solver import *
+
+
+# Nodes of ArrayElectricNet are just indices in its columns, handles are created on demand and compared by them
+class ArrayNetNode:
+    __slots__ = ('_net', '_index')
+
+    def __init__(self, net: ArrayElectricNet, index: int):
+        self._net = net
+        self._index = index
+
+    def __eq__(self, other):
+        return isinstance(other, ArrayNetNode) and other._net is self._net and other._index == self._index
+
+    def __hash__(self):
+        return hash(self._index)
+
+    def is_root(self):
+        return bool(self._net.parents[self._index] == ArrayElectricNet.NO_INDEX)
+
+    def is_leaf(self):
+        return bool(self._net.first_children[self._index] == ArrayElectricNet.NO_INDEX)
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def parent(self) -> ArrayNetNode | None:
+        parent_index = self._net.parents[self._index]
+        return None if parent_index == ArrayElectricNet.NO_INDEX else ArrayNetNode(self._net, int(parent_index))
+
+    @property
+    def successors(self) -> list[ArrayNetNode]:
+        return [ArrayNetNode(self._net, index) for index in self._net.get_sinks_indices(self._index)]
+
+    @property
+    def content(self) -> ArrayNodeContent:
+        return ArrayNodeContent(self._net, self._index)
+
+
+# The same interface as ElectricNode has, but all data are read from and written to the columns of the net
+class ArrayNodeContent:
+    __slots__ = ('_net', '_index')
+
+    def __init__(self, net: ArrayElectricNet, index: int):
+        self._net = net
+        self._index = index
+
+    @property
+    def name(self):
+        return self._net.get_name(self._index)
+    @name.setter
+    def name(self, new_value):
+        self._net.set_name(self._index, new_value)
+
+    @property
+    def value(self):
+        return self._net.get_value(self._index)
+    @value.setter
+    def value(self, new_value):
+        self._net.set_value(self._index, new_value)
+
+    @property
+    def type(self):
+        return ElectricNodeType(int(self._net.node_types[self._index]))
+
+    @property
+    def converter_type(self):
+        if self.type != ElectricNodeType.CONVERTER:
+            raise ElectricNode.NotConverter
+        return ConverterType(int(self._net.subtypes[self._index]))
+    @converter_type.setter
+    def converter_type(self, converter_type):
+        if self.type != ElectricNodeType.CONVERTER:
+            raise ElectricNode.NotConverter
+        self._net.subtypes[self._index] = converter_type.value
+
+    @property
+    def consumer_type(self):
+        if self.type != ElectricNodeType.LOAD:
+            raise ElectricNode.NotConsumer
+        return ConsumerType(int(self._net.subtypes[self._index]))
+    @consumer_type.setter
+    def consumer_type(self, consumer_type):
+        if self.type != ElectricNodeType.LOAD:
+            raise ElectricNode.NotConsumer
+        self._net.subtypes[self._index] = consumer_type.value
+
+    @property
+    def load(self):
+        if self.type == ElectricNodeType.LOAD:
+            raise ElectricNode.AccessToLoadLoad
+        return self._net.get_load(self._index)
+    @load.setter
+    def load(self, new_value):
+        if self.type == ElectricNodeType.LOAD:
+            raise ElectricNode.AccessToLoadLoad
+        self._net.set_load(self._index, new_value)
+
+
+# Column-wise storage of the net: every node is an index in typed arrays, successors of a node are linked by
+# first child and next sibling indices, names are kept once in the name table. Nodes are only appended,
+# so a parent always has a lesser index than its successors.
+# Values and loads, that are not floats (like the initial 0), are kept aside to be returned as they were set.
+class ArrayElectricNet:
+    # Public interface
+    NO_INDEX = -1
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self._size = 0
+        self._roots: list[int] = []
+        self._names: list[str] = ['']
+        self._name_indices: dict[str, int] = {'': 0}
+        self._other_values: dict[int, object] = {}
+        self._other_loads: dict[int, object] = {}
+
+        capacity = max(capacity, 1)
+        self._parents = numpy.full(capacity, ArrayElectricNet.NO_INDEX, dtype=numpy.int64)
+        self._first_children = numpy.full(capacity, ArrayElectricNet.NO_INDEX, dtype=numpy.int64)
+        self._last_children = numpy.full(capacity, ArrayElectricNet.NO_INDEX, dtype=numpy.int64)
+        self._next_siblings = numpy.full(capacity, ArrayElectricNet.NO_INDEX, dtype=numpy.int64)
+        self._node_types = numpy.zeros(capacity, dtype=numpy.int8)
+        self._subtypes = numpy.zeros(capacity, dtype=numpy.int8)
+        self._values = numpy.zeros(capacity, dtype=numpy.float64)
+        self._value_flags = numpy.zeros(capacity, dtype=bool)
+        self._loads = numpy.zeros(capacity, dtype=numpy.float64)
+        self._load_flags = numpy.zeros(capacity, dtype=bool)
+        self._name_ids = numpy.zeros(capacity, dtype=numpy.int32)
+
+    @staticmethod
+    def from_electric_net(net: ElectricNet) -> ArrayElectricNet:
+        array_net = ArrayElectricNet(max(net.forest.calc_size(), 1))
+        indices = {}
+        for node in net.forest:
+            node_data: ElectricNode = node.content
+            parent_index = indices[id(node.parent)] if node.parent is not None else ArrayElectricNet.NO_INDEX
+            if node_data.type == ElectricNodeType.CONVERTER:
+                subtype = node_data.converter_type
+            elif node_data.type == ElectricNodeType.LOAD:
+                subtype = node_data.consumer_type
+            else:
+                subtype = None
+            index = array_net._append_node(parent_index, node_data.type, subtype)
+            array_net.set_name(index, node_data.name)
+            array_net.set_value(index, node_data.value)
+            if node_data.type != ElectricNodeType.LOAD:
+                array_net.set_load(index, node_data.load)
+            indices[id(node)] = index
+        return array_net
+
+    # Every parent must precede its successors, successors of a node follow in order of their indices
+    @staticmethod
+    def from_columns(parents: numpy.ndarray, node_types: numpy.ndarray, subtypes: numpy.ndarray,
+                     values: numpy.ndarray, value_flags: numpy.ndarray, loads: numpy.ndarray,
+                     load_flags: numpy.ndarray, names: list[str], name_ids: numpy.ndarray) -> ArrayElectricNet:
+        size = len(parents)
+        array_net = ArrayElectricNet(size)
+        array_net._size = size
+        array_net._parents[:size] = parents
+        array_net._node_types[:size] = node_types
+        array_net._subtypes[:size] = subtypes
+        array_net._values[:size] = values
+        array_net._value_flags[:size] = value_flags
+        array_net._loads[:size] = loads
+        array_net._load_flags[:size] = load_flags
+        array_net._name_ids[:size] = name_ids
+        array_net._names = list(names)
+        array_net._name_indices = {}
+        for name_id, name in enumerate(array_net._names):
+            array_net._name_indices.setdefault(name, name_id)
+        if '' not in array_net._name_indices:
+            array_net._name_indices[''] = len(array_net._names)
+            array_net._names.append('')
+
+        parents = array_net._parents[:size]
+        array_net._roots = numpy.flatnonzero(parents == ArrayElectricNet.NO_INDEX).tolist()
+        sinks = numpy.flatnonzero(parents != ArrayElectricNet.NO_INDEX)
+        sinks = sinks[numpy.argsort(parents[sinks], kind='stable')]
+        if len(sinks) > 0:
+            sinks_parents = parents[sinks]
+            is_first = numpy.concatenate(([True], sinks_parents[1:] != sinks_parents[:-1]))
+            is_last = numpy.concatenate((sinks_parents[1:] != sinks_parents[:-1], [True]))
+            array_net._first_children[sinks_parents[is_first]] = sinks[is_first]
+            array_net._last_children[sinks_parents[is_last]] = sinks[is_last]
+            array_net._next_siblings[sinks[:-1][~is_last[:-1]]] = sinks[1:][~is_last[:-1]]
+        return array_net
+
+    def to_electric_net(self) -> ElectricNet:
+        net = ElectricNet(StringTable())
+        nodes: list[Forest.ForestNode] = []
+        for index in range(self._size):
+            content = ArrayNodeContent(self, index)
+            node_type = content.type
+            if node_type == ElectricNodeType.INPUT:
+                node = net.create_input()
+            elif node_type == ElectricNodeType.CONVERTER:
+                node = net.add_converter(nodes[self._parents[index]])
+                node.content.converter_type = content.converter_type
+            else:
+                node = net.add_load(nodes[self._parents[index]])
+                node.content.consumer_type = content.consumer_type
+            node.content.name = net.share_name(content.name)
+            node.content.value = content.value
+            if node_type != ElectricNodeType.LOAD:
+                node.content.load = content.load
+            nodes.append(node)
+        return net
+
+    def create_input(self) -> ArrayNetNode:
+        return ArrayNetNode(self, self._append_node(ArrayElectricNet.NO_INDEX, ElectricNodeType.INPUT, None))
+
+    def add_converter(self, parent: ArrayNetNode) -> ArrayNetNode:
+        index = self._append_node(parent.index, ElectricNodeType.CONVERTER, ConverterType.SWITCHING)
+        return ArrayNetNode(self, index)
+
+    def add_load(self, parent: ArrayNetNode) -> ArrayNetNode:
+        index = self._append_node(parent.index, ElectricNodeType.LOAD, ConsumerType.CONSTANT_CURRENT)
+        return ArrayNetNode(self, index)
+
+    def get_inputs(self) -> list[ArrayNetNode]:
+        return [ArrayNetNode(self, index) for index in self._roots]
+
+    @staticmethod
+    def get_sinks(source_node: ArrayNetNode) -> list[ArrayNetNode]:
+        return source_node.successors
+
+    def get_sinks_indices(self, index: int) -> list[int]:
+        sinks = []
+        sink = int(self._first_children[index])
+        while sink != ArrayElectricNet.NO_INDEX:
+            sinks.append(sink)
+            sink = int(self._next_siblings[sink])
+        return sinks
+
+    def get_name(self, index: int) -> str:
+        return self._names[self._name_ids[index]]
+
+    def set_name(self, index: int, name: str):
+        name_id = self._name_indices.get(name)
+        if name_id is None:
+            name_id = len(self._names)
+            self._names.append(name)
+            self._name_indices[name] = name_id
+        self._name_ids[index] = name_id
+
+    def get_value(self, index: int):
+        if self._value_flags[index]:
+            return float(self._values[index])
+        return self._other_values.get(index, 0)
+
+    def set_value(self, index: int, value):
+        ArrayElectricNet._set_cell(self._values, self._value_flags, self._other_values, index, value)
+
+    def get_load(self, index: int):
+        if self._load_flags[index]:
+            return float(self._loads[index])
+        return self._other_loads.get(index, 0)
+
+    def set_load(self, index: int, load):
+        ArrayElectricNet._set_cell(self._loads, self._load_flags, self._other_loads, index, load)
+
+    # Arrays of the breadth-first order of nodes packed as CompiledNet does, and the indices of the nodes in the net
+    def pack(self) -> tuple[tuple, numpy.ndarray]:
+        first_children = self._first_children[:self._size].tolist()
+        next_siblings = self._next_siblings[:self._size].tolist()
+        order = list(self._roots)
+        packed_parents = [CompiledNet.NO_INDEX] * len(order)
+        packed_first_children = []
+        level_bounds = [0]
+
+        level_start = 0
+        while level_start < len(order):
+            level_end = len(order)
+            for position in range(level_start, level_end):
+                sink = first_children[order[position]]
+                packed_first_children.append(len(order) if sink != ArrayElectricNet.NO_INDEX else CompiledNet.NO_INDEX)
+                while sink != ArrayElectricNet.NO_INDEX:
+                    order.append(sink)
+                    packed_parents.append(position)
+                    sink = next_siblings[sink]
+            level_bounds.append(level_end)
+            level_start = level_end
+
+        order = numpy.array(order, dtype=numpy.int64)
+        parents = numpy.array(packed_parents, dtype=numpy.int64)
+        children_numbers = numpy.bincount(parents[parents >= 0], minlength=len(order))
+        packed_net = (parents, numpy.array(packed_first_children, dtype=numpy.int64), children_numbers,
+                      self._node_types[order], self._subtypes[order], self._values[order], self._value_flags[order],
+                      level_bounds)
+        return packed_net, order
+
+    # Loads are written the same way as Solver writes them to ElectricNode
+    def solve(self):
+        packed_net, order = self.pack()
+        loads, is_written = CompiledNet.unpack(packed_net).calc_loads()
+        children_numbers = packed_net[2]
+
+        written = numpy.flatnonzero(is_written)
+        sources = written[children_numbers[written] > 0]
+        self._loads[order[sources]] = loads[sources]
+        self._load_flags[order[sources]] = True
+
+        empty_sources = order[written[children_numbers[written] == 0]]
+        self._loads[empty_sources] = 0.0
+        self._load_flags[empty_sources] = False
+        for index in empty_sources.tolist():
+            self._other_loads.pop(index, None)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def names(self):
+        return self._names
+
+    @property
+    def parents(self):
+        return self._parents[:self._size]
+
+    @property
+    def first_children(self):
+        return self._first_children[:self._size]
+
+    @property
+    def next_siblings(self):
+        return self._next_siblings[:self._size]
+
+    @property
+    def node_types(self):
+        return self._node_types[:self._size]
+
+    @property
+    def subtypes(self):
+        return self._subtypes[:self._size]
+
+    @property
+    def values(self):
+        return self._values[:self._size]
+
+    @property
+    def loads(self):
+        return self._loads[:self._size]
+
+
+    # Private part
+    def _append_node(self, parent_index: int, node_type: ElectricNodeType, subtype) -> int:
+        if self._size == len(self._parents):
+            self._grow()
+
+        index = self._size
+        self._size += 1
+        self._parents[index] = parent_index
+        self._node_types[index] = node_type.value
+        self._subtypes[index] = subtype.value if subtype is not None else 0
+        if parent_index == ArrayElectricNet.NO_INDEX:
+            self._roots.append(index)
+        else:
+            last_sibling = self._last_children[parent_index]
+            if last_sibling == ArrayElectricNet.NO_INDEX:
+                self._first_children[parent_index] = index
+            else:
+                self._next_siblings[last_sibling] = index
+            self._last_children[parent_index] = index
+        return index
+
+    def _grow(self):
+        capacity = len(self._parents) * 2
+        for column_name in ('_parents', '_first_children', '_last_children', '_next_siblings'):
+            column = numpy.full(capacity, ArrayElectricNet.NO_INDEX, dtype=numpy.int64)
+            column[:self._size] = getattr(self, column_name)[:self._size]
+            setattr(self, column_name, column)
+        for column_name in ('_node_types', '_subtypes', '_values', '_value_flags', '_loads', '_load_flags',
+                            '_name_ids'):
+            old_column = getattr(self, column_name)
+            column = numpy.zeros(capacity, dtype=old_column.dtype)
+            column[:self._size] = old_column[:self._size]
+            setattr(self, column_name, column)
+
+    @staticmethod
+    def _set_cell(column: numpy.ndarray, flags: numpy.ndarray, others: dict[int, object], index: int, value):
+        if type(value) is float:
+            column[index] = value
+            flags[index] = True
+            others.pop(index, None)
+        else:
+            column[index] = 0.0
+            flags[index] = False
+            others[index] = value
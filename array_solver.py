@@ -0,0 +1,293 @@
+from __future__ import annotations
+from typing import Callable
+import numpy
+from settings import *
+from electric_net import *
+
+
+_TYPE_CODES = {member: member.value for enum in (ElectricNodeType, ConverterType, ConsumerType) for member in enum}
+
+
+# Flat representation of the net: nodes are stored in breadth-first order, so every depth level is a contiguous
+# slice, and successors of every node are contiguous and ordered as in the forest
+class CompiledNet:
+    # Public interface
+    NO_INDEX = -1
+    VARIANTS_CHUNK_SIZE = 256
+
+
+    class InvalidVariantsShape(Exception): pass
+    class CalculationCancelled(Exception): pass
+
+
+    # Inputs, which subtrees are not materialized, are not compiled by default
+    def __init__(self, net: ElectricNet, power_inputs: list[Forest.ForestNode] | None = None):
+        if power_inputs is None:
+            power_inputs = [power_input for power_input in net.get_inputs() if net.is_materialized(power_input)]
+        nodes = list(power_inputs)
+        parents = [CompiledNet.NO_INDEX] * len(nodes)
+        first_children = []
+        level_bounds = [0]
+
+        level_start = 0
+        while level_start < len(nodes):
+            level_end = len(nodes)
+            for index in range(level_start, level_end):
+                sinks = nodes[index].successors
+                first_children.append(len(nodes) if len(sinks) > 0 else CompiledNet.NO_INDEX)
+                nodes.extend(sinks)
+                parents.extend([index] * len(sinks))
+            level_bounds.append(level_end)
+            level_start = level_end
+
+        self._nodes: list[Forest.ForestNode] = nodes
+        self._indices = {id(node): index for index, node in enumerate(nodes)}
+        self._level_bounds = level_bounds
+        self._sibling_ranks: dict[int, tuple[numpy.ndarray, numpy.ndarray]] = {}
+        self.parents = numpy.array(parents, dtype=numpy.int64)
+        self.first_children = numpy.array(first_children, dtype=numpy.int64)
+        self.children_numbers = numpy.bincount(self.parents[self.parents >= 0], minlength=len(nodes))
+        self.update_types()
+        self.update_values()
+
+    def update_types(self):
+        converter, load = ElectricNodeType.CONVERTER, ElectricNodeType.LOAD
+        node_types = []
+        subtypes = []
+        for node in self._nodes:
+            node_data: ElectricNode = node.content
+            node_type = node_data.type
+            node_types.append(_TYPE_CODES[node_type])
+            if node_type is converter:
+                subtypes.append(_TYPE_CODES[node_data.converter_type])
+            elif node_type is load:
+                subtypes.append(_TYPE_CODES[node_data.consumer_type])
+            else:
+                subtypes.append(0)
+        self.node_types = numpy.array(node_types, dtype=numpy.int8)
+        self.subtypes = numpy.array(subtypes, dtype=numpy.int8)
+
+    # Only float values are considered as set ones, the same as Solver does
+    def update_values(self):
+        values = [node.content.value for node in self._nodes]
+        self.value_flags = numpy.array([type(value) is float for value in values], dtype=bool)
+        self.values = numpy.array([value if type(value) is float else 0.0 for value in values], dtype=numpy.float64)
+
+    def update_node(self, node: Forest.ForestNode):
+        index = self._indices[id(node)]
+        node_data: ElectricNode = node.content
+        if node_data.type == ElectricNodeType.CONVERTER:
+            self.subtypes[index] = node_data.converter_type.value
+        elif node_data.type == ElectricNodeType.LOAD:
+            self.subtypes[index] = node_data.consumer_type.value
+        is_float = type(node_data.value) is float
+        self.value_flags[index] = is_float
+        self.values[index] = node_data.value if is_float else 0.0
+
+    # Compact picklable form of the structure and values without references to the forest nodes
+    def pack(self) -> tuple:
+        return (self.parents, self.first_children, self.children_numbers, self.node_types, self.subtypes,
+                self.values, self.value_flags, self._level_bounds)
+
+    # Packed form with own copies of the arrays, that are changed by updating, so it can be used by another thread
+    def snapshot(self) -> tuple:
+        return (self.parents, self.first_children, self.children_numbers, self.node_types, self.subtypes.copy(),
+                self.values.copy(), self.value_flags.copy(), self._level_bounds)
+
+    @staticmethod
+    def unpack(packed_net: tuple) -> CompiledNet:
+        compiled_net = CompiledNet.__new__(CompiledNet)
+        compiled_net._nodes = []
+        compiled_net._indices = {}
+        compiled_net._sibling_ranks = {}
+        compiled_net.parents, compiled_net.first_children, compiled_net.children_numbers, \
+            compiled_net.node_types, compiled_net.subtypes, compiled_net.values, compiled_net.value_flags, \
+            compiled_net._level_bounds = packed_net
+        return compiled_net
+
+    def get_variant_values(self) -> numpy.ndarray:
+        return numpy.where(self.value_flags, self.values, numpy.nan)
+
+    # is_cancelled is checked before every level, the calculation is aborted by CalculationCancelled if it returns True
+    def calc_loads(self, is_cancelled: Callable[[], bool] | None = None) -> tuple[numpy.ndarray, numpy.ndarray]:
+        loads, is_written = self._calc_loads(self.values[:, numpy.newaxis], self.value_flags[:, numpy.newaxis],
+                                             is_cancelled)
+        return loads[:, 0], is_written[:, 0]
+
+    # Every row of the matrix is a variant of values of all nodes (in order of the nodes property), NaN marks
+    # an unset value. Loads, that Solver would not write for a variant, are NaN in the resulting matrix.
+    def calc_variants_loads(self, variants_values) -> numpy.ndarray:
+        variants_values = numpy.asarray(variants_values, dtype=numpy.float64)
+        if variants_values.ndim != 2 or variants_values.shape[1] != len(self.parents):
+            raise CompiledNet.InvalidVariantsShape
+
+        variants_loads = numpy.empty(variants_values.shape, dtype=numpy.float64)
+        for chunk_start in range(0, len(variants_values), CompiledNet.VARIANTS_CHUNK_SIZE):
+            chunk_slice = slice(chunk_start, chunk_start + CompiledNet.VARIANTS_CHUNK_SIZE)
+            values = numpy.ascontiguousarray(variants_values[chunk_slice].T)
+            value_flags = ~numpy.isnan(values)
+            values = numpy.where(value_flags, values, 0.0)
+            loads, is_written = self._calc_loads(values, value_flags)
+            variants_loads[chunk_slice] = numpy.where(is_written, loads, numpy.nan).T
+        return variants_loads
+
+    # Nodes, which loads are changed by the writing, are returned
+    def write_loads(self, loads: numpy.ndarray, is_written: numpy.ndarray) -> list[Forest.ForestNode]:
+        changed_nodes = []
+        for index in numpy.flatnonzero(is_written).tolist():
+            node_data: ElectricNode = self._nodes[index].content
+            load = 0 if self.children_numbers[index] == 0 else float(loads[index])
+            if type(node_data.load) is not type(load) or node_data.load != load:
+                node_data.load = load
+                changed_nodes.append(self._nodes[index])
+        return changed_nodes
+
+    def index_of(self, node: Forest.ForestNode) -> int:
+        return self._indices[id(node)]
+
+    # Nodes added after compiling are not contained, the net is to be compiled again for them
+    def contains(self, node: Forest.ForestNode) -> bool:
+        return id(node) in self._indices
+
+    @property
+    def nodes(self):
+        return self._nodes
+
+    @property
+    def level_bounds(self):
+        return self._level_bounds
+
+
+    # Private part
+    # All arrays have shape (nodes, variants)
+    def _calc_loads(self, values: numpy.ndarray, value_flags: numpy.ndarray,
+                    is_cancelled: Callable[[], bool] | None = None) -> tuple[numpy.ndarray, numpy.ndarray]:
+        is_source = (self.node_types != ElectricNodeType.LOAD.value)[:, numpy.newaxis]
+        is_value_correct = value_flags & ~numpy.isclose(values, 0.0, EPSILON)
+        parent_values = numpy.where((self.parents >= 0)[:, numpy.newaxis], values[self.parents], 0.0)
+
+        loads = numpy.zeros(values.shape, dtype=numpy.float64)
+        is_valid = numpy.zeros(values.shape, dtype=bool)
+        are_sinks_correct = numpy.ones(values.shape, dtype=bool)
+        is_consumption_correct = numpy.zeros(values.shape, dtype=bool)
+        consumptions = numpy.zeros(values.shape, dtype=numpy.float64)
+
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            for level in reversed(range(len(self._level_bounds) - 1)):
+                if is_cancelled is not None and is_cancelled():
+                    raise CompiledNet.CalculationCancelled
+
+                level_slice = slice(self._level_bounds[level], self._level_bounds[level+1])
+                if level + 1 < len(self._level_bounds) - 1:
+                    loads[level_slice] = self._sum_up_by_parents(level, consumptions)
+                    failures = self._sum_up_by_parents(level, ~is_consumption_correct)
+                    are_sinks_correct[level_slice] = failures == 0
+
+                level_types = self.node_types[level_slice, numpy.newaxis]
+                level_subtypes = self.subtypes[level_slice, numpy.newaxis]
+                level_values = values[level_slice]
+                level_parent_values = parent_values[level_slice]
+                is_valid[level_slice] = is_source[level_slice] & is_value_correct[level_slice] \
+                                        & are_sinks_correct[level_slice]
+
+                is_converter = level_types == ElectricNodeType.CONVERTER.value
+                is_linear = is_converter & (level_subtypes == ConverterType.LINEAR.value)
+                is_resistive = (level_types == ElectricNodeType.LOAD.value) \
+                               & (level_subtypes == ConsumerType.RESISTIVE.value)
+                is_consumption_correct[level_slice] = numpy.where(
+                    is_converter,
+                    is_valid[level_slice] & (self.children_numbers[level_slice, numpy.newaxis] > 0),
+                    value_flags[level_slice] & (~is_resistive | (level_values != 0.0)))
+                consumptions[level_slice] = numpy.select(
+                    [is_linear, is_converter, is_resistive],
+                    [loads[level_slice], level_values / level_parent_values * loads[level_slice],
+                     level_parent_values / level_values],
+                    level_values)
+
+        is_reached = self._find_reached_sources(is_value_correct, is_consumption_correct)
+        is_written = is_reached & is_valid
+        return loads, is_written
+
+    # Sums are accumulated in order of sinks to get exactly the same results as the sequential summation gives
+    def _sum_up_by_parents(self, level, sinks_values: numpy.ndarray) -> numpy.ndarray:
+        parent_level_start = self._level_bounds[level]
+        parent_level_size = self._level_bounds[level+1] - parent_level_start
+        sinks_slice = slice(self._level_bounds[level+1], self._level_bounds[level+2])
+        local_parents = self.parents[sinks_slice] - parent_level_start
+        level_sinks_values = sinks_values[sinks_slice]
+
+        variants_number = sinks_values.shape[1]
+        if variants_number == 1:
+            sums = numpy.bincount(local_parents, weights=level_sinks_values[:, 0], minlength=parent_level_size)
+            return sums[:, numpy.newaxis]
+
+        sums = numpy.zeros((parent_level_size, variants_number), dtype=numpy.float64)
+        rank_order, rank_bounds = self._get_sibling_ranks(level + 1)
+        for rank in range(len(rank_bounds) - 1):
+            sinks = rank_order[rank_bounds[rank]: rank_bounds[rank+1]]
+            sums[local_parents[sinks]] += level_sinks_values[sinks]
+        return sums
+
+    # Sinks of the level grouped by their indices among siblings, so every parent appears once in every group
+    def _get_sibling_ranks(self, level) -> tuple[numpy.ndarray, numpy.ndarray]:
+        if level not in self._sibling_ranks:
+            level_start = self._level_bounds[level]
+            level_indices = numpy.arange(level_start, self._level_bounds[level+1])
+            ranks = level_indices - self.first_children[self.parents[level_indices]]
+            rank_order = numpy.argsort(ranks, kind='stable')
+            rank_bounds = numpy.searchsorted(ranks[rank_order], numpy.arange(ranks.max() + 2))
+            self._sibling_ranks[level] = (rank_order, rank_bounds)
+        return self._sibling_ranks[level]
+
+    # Solver stops calculation of a source on its first failed sink, so next sinks are not visited and their
+    # loads are not rewritten
+    def _find_reached_sources(self, is_value_correct: numpy.ndarray, is_consumption_correct: numpy.ndarray):
+        is_reached = numpy.zeros(is_value_correct.shape, dtype=bool)
+        is_reached[self._level_bounds[0]: self._level_bounds[1]] = True
+        for level in range(1, len(self._level_bounds) - 1):
+            level_start = self._level_bounds[level]
+            level_slice = slice(level_start, self._level_bounds[level+1])
+            level_parents = self.parents[level_slice]
+
+            failures = (~is_consumption_correct[level_slice]).astype(numpy.int64)
+            previous_failures = numpy.cumsum(failures, axis=0) - failures
+            first_siblings = self.first_children[level_parents] - level_start
+            previous_sibling_failures = previous_failures - previous_failures[first_siblings]
+
+            is_reached[level_slice] = is_reached[level_parents] & is_value_correct[level_parents] \
+                                      & (previous_sibling_failures == 0)
+        return is_reached
+
+
+class ArraySolver:
+    def __init__(self):
+        self._electric_net = None
+        self._compiled_net: CompiledNet | None = None
+
+    def set_net(self, net: ElectricNet):
+        self._electric_net = net
+        self._compiled_net = None
+
+    # Solving methods return the nodes with changed loads
+    def solve(self) -> list[Forest.ForestNode]:
+        self._compiled_net = CompiledNet(self._electric_net)
+        return self._calc_and_write_loads()
+
+    # The net structure is considered as unchanged, only types and values of nodes are reread. A node added after
+    # compiling makes the net to be compiled and solved again.
+    def update(self, changed_node: Forest.ForestNode | None = None) -> list[Forest.ForestNode]:
+        if self._compiled_net is None or (changed_node is not None and not self._compiled_net.contains(changed_node)):
+            return self.solve()
+
+        if changed_node is None:
+            self._compiled_net.update_types()
+            self._compiled_net.update_values()
+        else:
+            self._compiled_net.update_node(changed_node)
+        return self._calc_and_write_loads()
+
+
+    # Private part
+    def _calc_and_write_loads(self) -> list[Forest.ForestNode]:
+        loads, is_written = self._compiled_net.calc_loads()
+        return self._compiled_net.write_loads(loads, is_written)
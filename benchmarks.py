@@ -0,0 +1,270 @@
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from solver import *
+from array_net import *
+from layout import *
+
+
+DEFAULT_DEPTH = 100000
+DEFAULT_RENDERING_DEPTH = 100000
+DEFAULT_GROWING_SIZE = 20000
+DEFAULT_RAIL_WIDTH = 2000
+DEFAULT_QUERIES_NUMBER = 2000
+DEFAULT_ANCESTRY_DEPTH = 5000
+DEFAULT_MEMORY_SIZE = 100000
+DEFAULT_LAYOUT_SIZE = 100000
+DEFAULT_RELAYOUTS_NUMBER = 100
+PARTS_NAMES_NUMBER = 50
+
+
+# Chain of converters like it is generated from netlists: input -> converter -> ... -> converter -> load
+def build_chain_net(depth: int) -> ElectricNet:
+    net = ElectricNet()
+    source = net.create_input()
+    source.content.value = 12.0
+    for level in range(depth):
+        source = net.add_converter(source)
+        source.content.converter_type = ConverterType.SWITCHING if level % 2 == 0 else ConverterType.LINEAR
+        source.content.value = 5.0
+    load = net.add_load(source)
+    load.content.value = 0.1
+    return net
+
+
+def measure(action) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = action()
+    return time.perf_counter() - start, result
+
+
+def bench_deep_chain(depth: int) -> dict[str, float]:
+    timings = {}
+    timings['build'], net = measure(lambda: build_chain_net(depth))
+
+    for engine in (SolverEngine.RECURSIVE, SolverEngine.ARRAY):
+        solver = Solver()
+        solver.set_net(net)
+        solver.set_engine(engine)
+        timings['solve ({engine})'.format(engine=engine.name.lower())], _ = measure(solver.solve)
+        if type(net.get_inputs()[0].content.load) is not float:
+            raise RuntimeError('The chain is not solved by the {engine} engine'.format(engine=engine.name.lower()))
+
+    power_input = net.get_inputs()[0]
+    timings['subtree width'], _ = measure(power_input.calc_subtree_width)
+    timings['subtree depth'], tree_depth = measure(power_input.calc_subtree_depth)
+    if tree_depth != depth + 1:
+        raise RuntimeError('Wrong depth of the chain: {depth}'.format(depth=tree_depth))
+    timings['subtree deleting'], _ = measure(lambda: net.forest.delete_subtree(power_input))
+    return timings
+
+
+# Layout of the view asks the width of the parent and the whole forest after every added node
+def bench_growing_net(nodes_number: int) -> dict[str, float]:
+    def grow():
+        net = ElectricNet()
+        generator = random.Random(0)
+        sources = [net.create_input()]
+        for index in range(nodes_number):
+            parent = generator.choice(sources)
+            parent.calc_subtree_width()
+            if generator.random() < 0.3:
+                sources.append(net.add_converter(parent))
+            else:
+                net.add_load(parent)
+            net.forest.calc_width()
+        return net
+
+    timings = {}
+    timings['growing'], _ = measure(grow)
+    return timings
+
+
+# Hundreds of consumers on one rail, they are looked up by their indices and deleted in random order
+def bench_wide_rail(width: int) -> dict[str, float]:
+    net = ElectricNet()
+    power_input = net.create_input()
+    for index in range(width):
+        load = net.add_load(power_input)
+        load.content.value = 1.0
+
+    def delete_loads():
+        loads = list(power_input.successors)
+        random.Random(0).shuffle(loads)
+        for load in loads:
+            net.forest.get_next_sibling(load)
+            net.forest.delete_leaf(load)
+
+    timings = {}
+    timings['indexing'], _ = measure(lambda: [load.index_by_parent() for load in power_input.successors])
+    timings['deleting'], _ = measure(delete_loads)
+    return timings
+
+
+# Reconnection checks and distances between random nodes of a deep net, with and without the ancestry index
+def bench_ancestry_queries(depth: int, queries_number: int) -> dict[str, float]:
+    net = build_chain_net(depth)
+    forest = net.forest
+    generator = random.Random(0)
+    nodes = list(forest)
+    for index in range(depth):
+        net.add_load(generator.choice(nodes[:-1]))
+    nodes = list(forest)
+    pairs = [(generator.choice(nodes), generator.choice(nodes)) for index in range(queries_number)]
+
+    def query():
+        for first, second in pairs:
+            forest.is_successor_of(second, first)
+            forest.find_lowest_common_row_level(first, second)
+
+    timings = {}
+    timings['walking'], _ = measure(query)
+    forest.set_ancestry_indexing(True)
+    timings['indexing'], _ = measure(query)
+    return timings
+
+
+# Generated nets are wide and shallow, and names of their parts are repeated
+def build_generated_net(nodes_number: int, name_table: StringTable | None = None) -> ElectricNet:
+    net = ElectricNet(name_table)
+    sources = [net.create_input()]
+    for index in range(nodes_number):
+        parent = sources[index % len(sources)]
+        if index % 4 == 0:
+            node = net.add_converter(parent)
+            sources.append(node)
+        else:
+            node = net.add_load(parent)
+        node.content.name = net.share_name(' '.join(['Part', str(index % PARTS_NAMES_NUMBER)]))
+    return net
+
+
+def build_generated_array_net(nodes_number: int) -> ArrayElectricNet:
+    net = ArrayElectricNet()
+    sources = [net.create_input()]
+    for index in range(nodes_number):
+        parent = sources[index % len(sources)]
+        if index % 4 == 0:
+            node = net.add_converter(parent)
+            sources.append(node)
+        else:
+            node = net.add_load(parent)
+        node.content.name = ' '.join(['Part', str(index % PARTS_NAMES_NUMBER)])
+    return net
+
+
+def measure_memory(action) -> tuple[int, object]:
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    result = action()
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return size, result
+
+
+def bench_memory(nodes_number: int) -> dict[str, float]:
+    sizes = {}
+    size, net = measure_memory(lambda: build_generated_net(nodes_number))
+    sizes['own names'] = size / (nodes_number + 1)
+    del net
+    size, net = measure_memory(lambda: build_generated_net(nodes_number, StringTable()))
+    sizes['shared names'] = size / (nodes_number + 1)
+    del net
+    size, net = measure_memory(lambda: build_generated_array_net(nodes_number))
+    sizes['columns'] = size / (nodes_number + 1)
+    return sizes
+
+
+# Full layout of a generated net and relayouts after adding leaves to random sources
+def bench_layout(nodes_number: int, relayouts_number: int) -> dict[str, float]:
+    net = build_generated_net(nodes_number)
+    forest = net.forest
+    layout = ForestLayout(1, 1)
+    sources = [node for node in forest if node.content.type != ElectricNodeType.LOAD]
+    generator = random.Random(0)
+
+    def relayout():
+        for index in range(relayouts_number):
+            layout.relayout(forest, net.add_load(generator.choice(sources)))
+
+    timings = {}
+    timings['full layout'], _ = measure(lambda: layout.calc(forest))
+    timings['relayouts'], _ = measure(relayout)
+    return timings
+
+
+# Loaded nets are placed in bulk, rendering and deleting of the view grow linearly with the number of nodes
+def bench_deep_chain_rendering(depth: int) -> dict[str, float]:
+    from main import QApplication, Ui_MainWindow, MainWindow
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    net = build_chain_net(depth)
+    solver = Solver()
+    solver.set_net(net)
+    solver.solve()
+
+    ui = Ui_MainWindow()
+    window = MainWindow(ui)
+    net_view = ui.graphview
+    net_view.init_view()
+    timings = {}
+    timings['rendering'], _ = measure(lambda: net_view.set_net(net, LastHrids(1, depth + 1, 2)))
+    # Items are polished by the event loop, Qt deletes unpolished ones in quadratic time
+    app.processEvents()
+    timings['view deleting'], _ = measure(net_view.reset)
+    return timings
+
+
+def print_timings(title: str, timings: dict[str, float]):
+    print(title)
+    for name, timing in timings.items():
+        print('    {name:<20}{timing:>10.3f} s'.format(name=name, timing=timing))
+
+
+def print_sizes(title: str, sizes: dict[str, float]):
+    print(title)
+    for name, size in sizes.items():
+        print('    {name:<20}{size:>10.1f} bytes per node'.format(name=name, size=size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks of the power tree solver')
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH,
+                        help='number of converters in the chain to be solved and traversed')
+    parser.add_argument('--rendering-depth', type=int, default=DEFAULT_RENDERING_DEPTH,
+                        help='number of converters in the chain to be rendered, 0 to skip rendering')
+    parser.add_argument('--growing-size', type=int, default=DEFAULT_GROWING_SIZE,
+                        help='number of nodes added one by one with layout queries')
+    parser.add_argument('--rail-width', type=int, default=DEFAULT_RAIL_WIDTH,
+                        help='number of consumers on one rail')
+    parser.add_argument('--queries-number', type=int, default=DEFAULT_QUERIES_NUMBER,
+                        help='number of ancestry queries between random nodes of a deep net')
+    parser.add_argument('--ancestry-depth', type=int, default=DEFAULT_ANCESTRY_DEPTH,
+                        help='number of converters in the chain of the net for ancestry queries')
+    parser.add_argument('--memory-size', type=int, default=DEFAULT_MEMORY_SIZE,
+                        help='number of nodes in the net, which memory is measured')
+    parser.add_argument('--layout-size', type=int, default=DEFAULT_LAYOUT_SIZE,
+                        help='number of nodes in the net to be laid out')
+    parser.add_argument('--relayouts-number', type=int, default=DEFAULT_RELAYOUTS_NUMBER,
+                        help='number of added leaves, after which the net is relaid out')
+    args = parser.parse_args()
+
+    print_timings('Chain of {depth} converters'.format(depth=args.depth), bench_deep_chain(args.depth))
+    print_timings('Growing of a net to {size} nodes'.format(size=args.growing_size),
+                  bench_growing_net(args.growing_size))
+    print_timings('Rail of {width} consumers'.format(width=args.rail_width), bench_wide_rail(args.rail_width))
+    print_timings('{number} ancestry queries in a net of depth {depth}'.format(number=args.queries_number,
+                                                                              depth=args.ancestry_depth),
+                  bench_ancestry_queries(args.ancestry_depth, args.queries_number))
+    print_sizes('Memory of a net of {size} nodes'.format(size=args.memory_size), bench_memory(args.memory_size))
+    print_timings('Layout of a net of {size} nodes'.format(size=args.layout_size),
+                  bench_layout(args.layout_size, args.relayouts_number))
+    if args.rendering_depth > 0:
+        print_timings('Rendering of a chain of {depth} converters'.format(depth=args.rendering_depth),
+                      bench_deep_chain_rendering(args.rendering_depth))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+from __future__ import annotations
+import math
+import struct
+from typing import Callable
+import numpy
+from settings import *
+from array_net import *
+
+
+BINARY_EXTENSION = '.ensb'
+# Progress of loading and saving is reported after every this number of nodes
+PROGRESS_REPORTING_STEP = 10000
+
+_NODE_TYPES = {member.value: member for member in ElectricNodeType}
+_CONVERTER_TYPES = {member.value: member for member in ConverterType}
+_CONSUMER_TYPES = {member.value: member for member in ConsumerType}
+
+
+# Layout of the file (little-endian):
+#     header: magic, version, reserved, last power input, converter and consumer HRIDs, nodes and strings numbers
+#     node records in pre-order of the net, a parent always precedes its successors
+#     lengths of the strings in bytes, then the strings in UTF-8; names and HRIDs of nodes are indices of strings,
+#     the null index stands for None
+# Values and loads, that are not floats, are stored unflagged: NaN for None, the number itself for ints
+class BinaryNetFormat:
+    # Public interface
+    MAGIC = b'PTSN'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHHqqqqq')
+    NODE_RECORD = numpy.dtype([('parent', '<i8'), ('type', 'i1'), ('subtype', 'i1'), ('flags', 'u1'),
+                               ('value', '<f8'), ('load', '<f8'), ('name', '<u4'), ('hrid', '<u4')])
+    STRING_LENGTH = numpy.dtype('<u4')
+    NULL_STRING = 0xFFFFFFFF
+
+    IS_VALUE_FLOAT = 1
+    IS_LOAD_FLOAT = 2
+
+
+    class InvalidFile(Exception): pass
+    class UnsupportedVersion(Exception): pass
+
+
+    # HRIDs are given in pre-order of the net nodes, empty ones are written if they are omitted
+    @staticmethod
+    def pack(net: ElectricNet, last_hrids: LastHrids, hrids: list[str] | None = None,
+             progress_callback: Callable[[int], None] | None = None) -> bytes:
+        strings = ['']
+        string_indices = {'': 0}
+        def get_string_index(string: str | None) -> int:
+            if string is None:
+                return BinaryNetFormat.NULL_STRING
+            if string not in string_indices:
+                string_indices[string] = len(strings)
+                strings.append(string)
+            return string_indices[string]
+
+        nodes_number = max(net.forest.calc_size(), 1)
+        node_indices = {}
+        parents, node_types, subtypes, flags, values, loads, names, node_hrids = [], [], [], [], [], [], [], []
+        for index, node in enumerate(net.forest):
+            if progress_callback is not None and index % PROGRESS_REPORTING_STEP == 0:
+                progress_callback(index * 100 // nodes_number)
+            node_indices[id(node)] = index
+            node_data: ElectricNode = node.content
+            parents.append(node_indices[id(node.parent)] if node.parent is not None else ArrayElectricNet.NO_INDEX)
+            node_types.append(node_data.type.value)
+            if node_data.type == ElectricNodeType.CONVERTER:
+                subtypes.append(node_data.converter_type.value)
+            elif node_data.type == ElectricNodeType.LOAD:
+                subtypes.append(node_data.consumer_type.value)
+            else:
+                subtypes.append(0)
+
+            value, is_value_float = BinaryNetFormat._pack_number(node_data.value)
+            load, is_load_float = (0.0, False)
+            if node_data.type != ElectricNodeType.LOAD:
+                load, is_load_float = BinaryNetFormat._pack_number(node_data.load)
+            flags.append(BinaryNetFormat.IS_VALUE_FLOAT * is_value_float
+                         + BinaryNetFormat.IS_LOAD_FLOAT * is_load_float)
+            values.append(value)
+            loads.append(load)
+            names.append(get_string_index(node_data.name))
+            node_hrids.append(get_string_index(hrids[index] if hrids is not None else ''))
+
+        records = numpy.empty(len(parents), dtype=BinaryNetFormat.NODE_RECORD)
+        records['parent'] = parents
+        records['type'] = node_types
+        records['subtype'] = subtypes
+        records['flags'] = flags
+        records['value'] = values
+        records['load'] = loads
+        records['name'] = names
+        records['hrid'] = node_hrids
+
+        encoded_strings = [string.encode('utf-8') for string in strings]
+        string_lengths = numpy.array([len(string) for string in encoded_strings], dtype=BinaryNetFormat.STRING_LENGTH)
+        header = BinaryNetFormat.HEADER.pack(BinaryNetFormat.MAGIC, BinaryNetFormat.VERSION, 0,
+                                             int(last_hrids.power_inputs), int(last_hrids.converters),
+                                             int(last_hrids.consumers), len(records), len(strings))
+        return b''.join([header, records.tobytes(), string_lengths.tobytes()] + encoded_strings)
+
+    # Progress callbacks get percents of processed nodes, they may raise to abort the operation
+    @staticmethod
+    def unpack(buffer, net: ElectricNet | None = None, progress_callback: Callable[[int], None] | None = None) \
+            -> tuple[ElectricNet, LastHrids, list[str]]:
+        last_hrids, records, strings = BinaryNetFormat._unpack_parts(buffer)
+        if net is None:
+            net = ElectricNet()
+
+        parents = records['parent'].tolist()
+        node_types = records['type'].tolist()
+        subtypes = records['subtype'].tolist()
+        flags = records['flags'].tolist()
+        values = records['value'].tolist()
+        loads = records['load'].tolist()
+        names = records['name'].tolist()
+        nodes: list[Forest.ForestNode] = []
+        for index in range(len(parents)):
+            if progress_callback is not None and index % PROGRESS_REPORTING_STEP == 0:
+                progress_callback(index * 100 // len(parents))
+            node_type = _NODE_TYPES[node_types[index]]
+            if node_type == ElectricNodeType.INPUT:
+                node = net.create_input()
+            elif node_type == ElectricNodeType.CONVERTER:
+                node = net.add_converter(nodes[parents[index]])
+                node.content.converter_type = _CONVERTER_TYPES[subtypes[index]]
+            else:
+                node = net.add_load(nodes[parents[index]])
+                node.content.consumer_type = _CONSUMER_TYPES[subtypes[index]]
+
+            node.content.name = net.share_name(BinaryNetFormat._get_string(strings, names[index]))
+            node.content.value = BinaryNetFormat._unpack_number(values[index],
+                                                                flags[index] & BinaryNetFormat.IS_VALUE_FLOAT)
+            if node_type != ElectricNodeType.LOAD:
+                node.content.load = BinaryNetFormat._unpack_number(loads[index],
+                                                                   flags[index] & BinaryNetFormat.IS_LOAD_FLOAT)
+            nodes.append(node)
+
+        hrids = [BinaryNetFormat._get_string(strings, hrid) for hrid in records['hrid'].tolist()]
+        return net, last_hrids, hrids
+
+    # Columns are copied from the buffer at once, nodes are not created
+    @staticmethod
+    def unpack_columns(buffer) -> tuple[ArrayElectricNet, LastHrids, list[str]]:
+        last_hrids, records, strings = BinaryNetFormat._unpack_parts(buffer)
+        value_flags = (records['flags'] & BinaryNetFormat.IS_VALUE_FLOAT) != 0
+        load_flags = (records['flags'] & BinaryNetFormat.IS_LOAD_FLOAT) != 0
+        name_ids = records['name']
+        names = strings
+        is_name_null = name_ids == BinaryNetFormat.NULL_STRING
+        if is_name_null.any():
+            name_ids = numpy.where(is_name_null, len(strings), name_ids)
+            names = strings + [None]
+        array_net = ArrayElectricNet.from_columns(records['parent'], records['type'], records['subtype'],
+                                                  records['value'], value_flags, records['load'], load_flags,
+                                                  names, name_ids)
+        for index in numpy.flatnonzero(~value_flags).tolist():
+            array_net.set_value(index, BinaryNetFormat._unpack_number(float(records['value'][index]), False))
+        is_source = records['type'] != ElectricNodeType.LOAD.value
+        for index in numpy.flatnonzero(~load_flags & is_source).tolist():
+            array_net.set_load(index, BinaryNetFormat._unpack_number(float(records['load'][index]), False))
+
+        hrids = [BinaryNetFormat._get_string(strings, hrid) for hrid in records['hrid'].tolist()]
+        return array_net, last_hrids, hrids
+
+    # The file is memory-mapped, records are read from the mapping without copying the whole file
+    @staticmethod
+    def read(path: str, net: ElectricNet | None = None, progress_callback: Callable[[int], None] | None = None) \
+            -> tuple[ElectricNet, LastHrids, list[str]]:
+        return BinaryNetFormat.unpack(BinaryNetFormat.map_file(path), net, progress_callback)
+
+    @staticmethod
+    def read_columns(path: str) -> tuple[ArrayElectricNet, LastHrids, list[str]]:
+        return BinaryNetFormat.unpack_columns(BinaryNetFormat.map_file(path))
+
+    @staticmethod
+    def is_binary_file(path: str) -> bool:
+        with open(path, 'rb') as file:
+            return file.read(len(BinaryNetFormat.MAGIC)) == BinaryNetFormat.MAGIC
+
+    @staticmethod
+    def map_file(path: str) -> numpy.ndarray:
+        try:
+            return numpy.memmap(path, dtype=numpy.uint8, mode='r')
+        except ValueError:
+            raise BinaryNetFormat.InvalidFile
+
+
+    # Private part
+
+    @staticmethod
+    def _unpack_parts(buffer) -> tuple[LastHrids, numpy.ndarray, list[str]]:
+        buffer = numpy.frombuffer(buffer, dtype=numpy.uint8)
+        header_size = BinaryNetFormat.HEADER.size
+        if len(buffer) < header_size:
+            raise BinaryNetFormat.InvalidFile
+        magic, version, reserved, last_power_input, last_converter, last_consumer, nodes_number, strings_number = \
+            BinaryNetFormat.HEADER.unpack(buffer[:header_size].tobytes())
+        if magic != BinaryNetFormat.MAGIC:
+            raise BinaryNetFormat.InvalidFile
+        if version != BinaryNetFormat.VERSION:
+            raise BinaryNetFormat.UnsupportedVersion
+
+        records_end = header_size + nodes_number * BinaryNetFormat.NODE_RECORD.itemsize
+        lengths_end = records_end + strings_number * BinaryNetFormat.STRING_LENGTH.itemsize
+        if len(buffer) < lengths_end:
+            raise BinaryNetFormat.InvalidFile
+        records = numpy.frombuffer(buffer, dtype=BinaryNetFormat.NODE_RECORD, count=nodes_number, offset=header_size)
+        string_lengths = numpy.frombuffer(buffer, dtype=BinaryNetFormat.STRING_LENGTH, count=strings_number,
+                                          offset=records_end)
+
+        string_bounds = (lengths_end + numpy.concatenate(([0], numpy.cumsum(string_lengths, dtype=numpy.int64))))
+        string_bounds = string_bounds.tolist()
+        if string_bounds[-1] > len(buffer):
+            raise BinaryNetFormat.InvalidFile
+        strings_bytes = buffer[lengths_end:string_bounds[-1]].tobytes()
+        strings = [strings_bytes[start - lengths_end:end - lengths_end].decode('utf-8')
+                   for start, end in zip(string_bounds[:-1], string_bounds[1:])]
+
+        if nodes_number > 0:
+            parents = records['parent']
+            is_parent_valid = (parents == ArrayElectricNet.NO_INDEX) | ((parents >= 0)
+                                                                        & (parents < numpy.arange(nodes_number)))
+            is_input = records['type'] == ElectricNodeType.INPUT.value
+            is_type_valid = (records['type'] >= ElectricNodeType.INPUT.value) \
+                            & (records['type'] <= ElectricNodeType.LOAD.value) \
+                            & (is_input == (parents == ArrayElectricNet.NO_INDEX))
+            is_string_valid = ((records['name'] < strings_number) | (records['name'] == BinaryNetFormat.NULL_STRING)) \
+                              & ((records['hrid'] < strings_number) | (records['hrid'] == BinaryNetFormat.NULL_STRING))
+            if not is_parent_valid.all() or not is_type_valid.all() or not is_string_valid.all():
+                raise BinaryNetFormat.InvalidFile
+        last_hrids = LastHrids(power_inputs=last_power_input, converters=last_converter, consumers=last_consumer)
+        return last_hrids, records, strings
+
+    @staticmethod
+    def _get_string(strings: list[str], index: int) -> str | None:
+        return strings[index] if index != BinaryNetFormat.NULL_STRING else None
+
+    @staticmethod
+    def _pack_number(number) -> tuple[float, bool]:
+        if type(number) is float:
+            return number, True
+        if number is None:
+            return math.nan, False
+        return float(number), False
+
+    @staticmethod
+    def _unpack_number(number: float, is_float) -> float | int | None:
+        if is_float:
+            return number
+        if math.isnan(number):
+            return None
+        return int(number)
@@ -17,11 +17,28 @@ class ConsumerType(Enum):
     RESISTIVE = 2
 
 
+# Equal strings are stored once, names of parts are repeated a lot in nets generated from netlists
+class StringTable:
+    __slots__ = ('_strings',)
+
+    def __init__(self):
+        self._strings: dict[str, str] = {}
+
+    def share(self, string: str) -> str:
+        return self._strings.setdefault(string, string)
+
+    def __len__(self):
+        return len(self._strings)
+
+
 class ElectricNode:
     class AccessToLoadLoad(Exception): pass
     class NotConverter(Exception): pass
     class NotConsumer(Exception): pass
 
+    # Converter and consumer types are set only for the nodes of the corresponding types
+    __slots__ = ('_name', '_value', '_type', '_load', '_converter_type', '_consumer_type')
+
     def __init__(self, node_type: ElectricNodeType):
         self._name = ''
         self._value = 0
@@ -86,8 +103,9 @@ class ElectricNode:
 
 
 class ElectricNet:
-    def __init__(self):
+    def __init__(self, name_table: StringTable | None = None):
         self._forest = Forest()
+        self._name_table = name_table
 
     def create_input(self) -> Forest.ForestNode:
         root = self._forest.create_root()
@@ -123,6 +141,37 @@ class ElectricNet:
             sinks.append(successor)
         return sinks
 
+    # Subtrees of all inputs are always built, LazyElectricNet builds them on demand
+    def is_materialized(self, power_input: Forest.ForestNode) -> bool:
+        return True
+
+    def materialize(self, power_input: Forest.ForestNode):
+        pass
+
+    def materialize_all(self):
+        pass
+
+    # Sinks of a deleted input are never materialized
+    def discard_input(self, power_input: Forest.ForestNode):
+        pass
+
+    def share_name(self, name: str) -> str:
+        if self._name_table is None:
+            return name
+        return self._name_table.share(name)
+
+    # Nodes without content, e.g. just created by the forest, are never yielded when a type is given
+    def traverse(self, node_type: ElectricNodeType | None = None, order=TraversalOrder.PRE_ORDER) \
+            -> Iterator[Forest.ForestNode]:
+        if node_type is None:
+            return self._forest.traverse(order)
+        return self._forest.traverse(order, lambda node: isinstance(node.content, ElectricNode) and
+                                                         node.content.type == node_type)
+
     @property
     def forest(self):
         return self._forest
+
+    @property
+    def name_table(self):
+        return self._name_table
@@ -1,4 +1,321 @@
+import os
+import time
+import hashlib
+import tempfile
 import unittest
+from file_saver import *
+from solver import Solver
+
+
+NET_FILE_CONTENT = '''
+Last Power Input HRID: 1
+Last Converter HRID: 1
+Last Consumer HRID: 3
+
+
+
+Level 1 Power_Input 1 Main input:
+    Value: 12.0V
+    Load: 1.5A
+
+Level 2 Switching_Converter 1 Buck:
+    Value: 5.0V
+    Load: 2.0A
+
+Level 3 Constant_Current_Consumer 1 Fan:
+    Value: 2.0A
+
+Level 3 Resistive_Consumer 2 Heater:
+    Value: 10.0Ohm
+
+Level 2 Constant_Current_Consumer 3 LED:
+    Value: 0.5A
+
+
+'''
+
+
+class TestFileLoader(unittest.TestCase):
+    def setUp(self):
+        file_descriptor, self.path = tempfile.mkstemp(suffix=EXTENSION)
+        with os.fdopen(file_descriptor, 'w') as file:
+            file.write(NET_FILE_CONTENT)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_load_net(self):
+        tested_net, tested_hrids = FileLoader().load_net_from_file(self.path)
+        self.assertEqual(('1', '1', '3'), (tested_hrids.power_inputs, tested_hrids.converters, tested_hrids.consumers))
+
+        power_input = tested_net.get_inputs()[0]
+        converter, led = power_input.successors
+        fan, heater = converter.successors
+        self.assertEqual(1, len(tested_net.get_inputs()))
+        self.assertEqual((12.0, 1.5), (power_input.content.value, power_input.content.load))
+        self.assertEqual((5.0, 2.0), (converter.content.value, converter.content.load))
+        self.assertEqual(ConverterType.SWITCHING, converter.content.converter_type)
+        self.assertEqual(ConsumerType.RESISTIVE, heater.content.consumer_type)
+        self.assertEqual(10.0, heater.content.value)
+        self.assertEqual(2.0, fan.content.value)
+        self.assertEqual(0.5, led.content.value)
+        self.assertEqual('Heater', heater.content.name)
+
+    def test_loading_info(self):
+        tested_loader = FileLoader()
+        tested_loader.load_net_from_file(self.path)
+        loading_info = tested_loader.loading_info
+        self.assertEqual((self.path, os.path.getsize(self.path)), (loading_info.path, loading_info.size))
+        with open(self.path, 'rb') as file:
+            self.assertEqual(hashlib.sha256(file.read()).hexdigest(), loading_info.content_hash)
+        self.assertEqual((1, 1, 3), (loading_info.power_inputs, loading_info.converters, loading_info.consumers))
+
+    def test_load_broken_net(self):
+        with open(self.path, 'a') as file:
+            file.write('Level 5 Resistive_Consumer 4 Lamp:\n')
+        self.assertIsNone(FileLoader().load_net_from_file(self.path))
+
+
+class TestFileSaverReplacing(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'net' + EXTENSION)
+        with open(self.path, 'w') as file:
+            file.write(NET_FILE_CONTENT)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_file_is_replaced(self):
+        FileSaver.replace_file(self.path, 'New content')
+        with open(self.path) as file:
+            self.assertEqual('New content', file.read())
+        self.assertEqual(['net' + EXTENSION], os.listdir(self.directory.name))
+
+    def test_file_is_kept_on_failure(self):
+        with self.assertRaises(TypeError):
+            FileSaver.replace_file(self.path, None)
+        with open(self.path) as file:
+            self.assertEqual(NET_FILE_CONTENT, file.read())
+        self.assertEqual(['net' + EXTENSION], os.listdir(self.directory.name))
+
+
+class TestBinaryNetFormat(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.text_path = os.path.join(self.directory.name, 'net' + EXTENSION)
+        self.binary_path = os.path.join(self.directory.name, 'net' + BINARY_EXTENSION)
+        with open(self.text_path, 'w') as file:
+            file.write(NET_FILE_CONTENT)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_text_conversion_is_lossless(self):
+        converted_path = os.path.join(self.directory.name, 'converted' + EXTENSION)
+        self.assertTrue(convert_net_file(self.text_path, self.binary_path))
+        self.assertTrue(BinaryNetFormat.is_binary_file(self.binary_path))
+        self.assertTrue(convert_net_file(self.binary_path, converted_path))
+        with open(converted_path) as file:
+            self.assertEqual(NET_FILE_CONTENT, file.read())
+
+    def test_load_binary_net(self):
+        convert_net_file(self.text_path, self.binary_path)
+        tested_loader = FileLoader()
+        tested_net, tested_hrids = tested_loader.load_net_from_file(self.binary_path)
+        self.assertEqual((1, 1, 3), (tested_hrids.power_inputs, tested_hrids.converters, tested_hrids.consumers))
+        self.assertEqual(['1', '1', '1', '2', '3'], tested_loader.hrids)
+        with open(self.binary_path, 'rb') as file:
+            self.assertEqual(hashlib.sha256(file.read()).hexdigest(), tested_loader.loading_info.content_hash)
+
+        proper_net, proper_hrids = FileLoader().load_net_from_file(self.text_path)
+        for proper_node, tested_node in zip(proper_net.forest, tested_net.forest):
+            self.assertEqual(proper_node.content.type, tested_node.content.type)
+            self.assertEqual(proper_node.content.name, tested_node.content.name)
+            self.assertEqual(proper_node.content.value, tested_node.content.value)
+        self.assertEqual(proper_net.forest.calc_size(), tested_net.forest.calc_size())
+
+    def test_unset_values_are_kept(self):
+        proper_net = ElectricNet()
+        power_input = proper_net.create_input()
+        power_input.content.value = None
+        proper_net.add_converter(power_input)
+        buffer = BinaryNetFormat.pack(proper_net, LastHrids(1, 1, 0))
+
+        tested_net, tested_hrids, hrids = BinaryNetFormat.unpack(buffer)
+        tested_input = tested_net.get_inputs()[0]
+        self.assertIsNone(tested_input.content.value)
+        self.assertIs(int, type(tested_input.successors[0].content.value))
+        self.assertEqual(['', ''], hrids)
+
+        tested_columns, tested_hrids, hrids = BinaryNetFormat.unpack_columns(buffer)
+        self.assertIsNone(tested_columns.get_inputs()[0].content.value)
+        self.assertEqual(0, tested_columns.get_inputs()[0].content.load)
+
+    def test_null_names_are_kept(self):
+        proper_net = ElectricNet(StringTable())
+        power_input = proper_net.create_input()
+        power_input.content.name = None
+        proper_net.add_load(power_input).content.name = 'Lamp'
+        NetFileWriter.write_net(self.binary_path, proper_net, LastHrids(1, 0, 1), [None, '1'])
+
+        tested_net, tested_hrids = FileLoader().load_net_from_file(self.binary_path)
+        tested_input = tested_net.get_inputs()[0]
+        self.assertIsNone(tested_input.content.name)
+        self.assertEqual('Lamp', tested_input.successors[0].content.name)
+
+        tested_columns, tested_hrids, hrids = BinaryNetFormat.read_columns(self.binary_path)
+        self.assertIsNone(tested_columns.get_inputs()[0].content.name)
+        self.assertEqual([None, '1'], hrids)
+
+    def test_solve_columns(self):
+        convert_net_file(self.text_path, self.binary_path)
+        tested_net, tested_hrids, hrids = BinaryNetFormat.read_columns(self.binary_path)
+        tested_net.solve()
+
+        proper_net, proper_hrids = FileLoader().load_net_from_file(self.text_path)
+        proper_solver = Solver()
+        proper_solver.set_net(proper_net)
+        proper_solver.solve()
+        self.assertEqual(proper_net.get_inputs()[0].content.load, tested_net.get_inputs()[0].content.load)
+        self.assertEqual(proper_net.get_inputs()[0].successors[0].content.load,
+                         tested_net.get_inputs()[0].successors[0].content.load)
+
+    def test_broken_file(self):
+        convert_net_file(self.text_path, self.binary_path)
+        with open(self.binary_path, 'rb') as file:
+            content = file.read()
+        with open(self.binary_path, 'wb') as file:
+            file.write(content[:BinaryNetFormat.HEADER.size + 10])
+        self.assertIsNone(FileLoader().load_net_from_file(self.binary_path))
+        with self.assertRaises(BinaryNetFormat.UnsupportedVersion):
+            BinaryNetFormat.unpack(content[:4] + bytes([2, 0]) + content[6:])
+
+
+class TestFileLoaderLazyOpening(unittest.TestCase):
+    def setUp(self):
+        file_descriptor, self.path = tempfile.mkstemp(suffix=EXTENSION)
+        second_input = NET_FILE_CONTENT.split('\n\n\n\n')[1].replace('Main input', 'Second input')
+        with os.fdopen(file_descriptor, 'w') as file:
+            file.write(NET_FILE_CONTENT.rstrip('\n') + '\n\n' + second_input)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_only_inputs_are_built(self):
+        tested_net, tested_hrids = FileLoader().open_net_lazily(self.path)
+        self.assertEqual(('1', '1', '3'), (tested_hrids.power_inputs, tested_hrids.converters, tested_hrids.consumers))
+        self.assertEqual(2, tested_net.forest.calc_size())
+        self.assertEqual(['Main input', 'Second input'], [node.content.name for node in tested_net.get_inputs()])
+        self.assertEqual([1.5, 1.5], [node.content.load for node in tested_net.get_inputs()])
+        self.assertFalse(tested_net.is_materialized(tested_net.get_inputs()[0]))
+
+    def test_materialize(self):
+        proper_net, proper_hrids = FileLoader().load_net_from_file(self.path)
+        tested_net, tested_hrids = FileLoader().open_net_lazily(self.path)
+        tested_net.materialize(tested_net.get_inputs()[1])
+        self.assertEqual(6, tested_net.forest.calc_size())
+        self.assertFalse(tested_net.is_fully_materialized())
+
+        tested_net.materialize_all()
+        self.assertTrue(tested_net.is_fully_materialized())
+        for proper_node, tested_node in zip(proper_net.forest, tested_net.forest):
+            self.assertEqual(proper_node.content.type, tested_node.content.type)
+            self.assertEqual(proper_node.content.name, tested_node.content.name)
+            self.assertEqual(proper_node.content.value, tested_node.content.value)
+        self.assertEqual(proper_net.forest.calc_size(), tested_net.forest.calc_size())
+
+    def test_discard_deleted_inputs(self):
+        tested_net, tested_hrids = FileLoader().open_net_lazily(self.path)
+        first_input, second_input = tested_net.get_inputs()
+        tested_net.forest.delete_leaf(first_input)
+        tested_net.discard_input(first_input)
+        self.assertEqual(1, len(tested_net._subtree_bounds))
+        self.assertFalse(tested_net._mapped_file.closed)
+
+        tested_net.materialize(second_input)
+        self.assertTrue(tested_net.is_fully_materialized())
+        self.assertTrue(tested_net._mapped_file.closed)
+        self.assertEqual(5, tested_net.forest.calc_size())
+
+        tested_net, tested_hrids = FileLoader().open_net_lazily(self.path)
+        for power_input in tested_net.get_inputs():
+            tested_net.forest.delete_leaf(power_input)
+            tested_net.discard_input(power_input)
+        self.assertTrue(tested_net.is_fully_materialized())
+        self.assertTrue(tested_net._mapped_file.closed)
+
+    def test_not_materialized_inputs_are_not_solved(self):
+        tested_net, tested_hrids = FileLoader().open_net_lazily(self.path)
+        tested_net.materialize(tested_net.get_inputs()[0])
+        tested_net.get_inputs()[1].content.value = 24.0
+        tested_solver = Solver()
+        tested_solver.set_net(tested_net)
+        tested_solver.solve()
+        self.assertEqual(1.5, tested_net.get_inputs()[1].content.load)
+        self.assertNotEqual(1.5, tested_net.get_inputs()[0].content.load)
+
+
+class TestBackgroundFileOperation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        file_descriptor, self.path = tempfile.mkstemp(suffix=EXTENSION)
+        with os.fdopen(file_descriptor, 'w') as file:
+            file.write(NET_FILE_CONTENT)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_load_net(self):
+        tested_loader = FileLoader()
+        tested_operation = BackgroundFileOperation(lambda progress_callback:
+                                                   tested_loader.load_net_from_file(self.path, progress_callback))
+        tested_net, tested_hrids = tested_operation.execute('Loading')
+        self.assertFalse(tested_operation.is_cancelled)
+        self.assertEqual(5, tested_net.forest.calc_size())
+
+    def test_cancel_loading(self):
+        def load(progress_callback):
+            tested_operation.cancel()
+            return FileLoader().load_net_from_file(self.path, progress_callback)
+
+        tested_operation = BackgroundFileOperation(load)
+        self.assertIsNone(tested_operation.execute('Loading'))
+        self.assertTrue(tested_operation.is_cancelled)
+
+    def test_cancel_saving(self):
+        def cancel(percent):
+            raise BackgroundFileOperation.Cancelled
+
+        net, last_hrids = FileLoader().load_net_from_file(self.path)
+        with self.assertRaises(BackgroundFileOperation.Cancelled):
+            FileSaver.write_net(self.path, net, LastHrids(0, 0, 0), ['', '', '', '', ''], cancel)
+        with open(self.path) as file:
+            self.assertEqual(NET_FILE_CONTENT, file.read())
+
+    def test_input_is_blocked(self):
+        line_edit = QLineEdit()
+        def type_letter():
+            QApplication.sendEvent(line_edit, QKeyEvent(QEvent.Type.KeyPress, Qt.Key.Key_A,
+                                                        Qt.KeyboardModifier.NoModifier, 'a'))
+
+        def load(progress_callback):
+            time.sleep(0.2)
+            return FileLoader().load_net_from_file(self.path, progress_callback)
+
+        QTimer.singleShot(0, type_letter)
+        BackgroundFileOperation(load).execute('Loading')
+        self.assertEqual('', line_edit.text())
+        type_letter()
+        self.assertEqual('a', line_edit.text())
+
+    def test_error_is_raised(self):
+        tested_operation = BackgroundFileOperation(lambda progress_callback: FileSaver.replace_file(self.path, None))
+        with self.assertRaises(TypeError):
+            tested_operation.execute('Saving')
 
 
 class MyTestCase(unittest.TestCase):
@@ -6,6 +6,7 @@
 
 from PyQt6 import QtCore
 from tree import *
+from layout import *
 from graph_gui_int import *
 
 
@@ -34,6 +35,8 @@ class GraphView(QGraphicsView):
         self._scene = QGraphicsScene()
         self.setScene(self._scene)
         self._graph_forest = Forest()
+        self._layout = GraphView._create_layout()
+        self._is_placing_in_bulk = False
 
 
     nodeSideWidgetClicked = pyqtSignal('PyQt_PyObject', int, name='nodeSideWidgetClicked')
@@ -53,11 +56,13 @@ class GraphView(QGraphicsView):
         return cross
 
     def add_root(self, widget: QWidget=None, side_widgets: list=None) -> GraphNode:
-        position = self._calc_new_root_position()
-        root = self._create_node_on_scene(position, widget, side_widgets)
         forest_node = self._graph_forest.create_root()
+        changed_subroots = self._lay_out_new_node(forest_node)
+        root = self._create_node_on_scene(self._get_layout_position(forest_node), widget, side_widgets)
         self._link_graph_and_forest_nodes(root, forest_node)
-        self._update_scene_rect()
+        if not self._is_placing_in_bulk:
+            self._apply_layout_to_subtrees(changed_subroots[1:])
+            self._update_scene_rect()
 
         return root
 
@@ -65,41 +70,51 @@ class GraphView(QGraphicsView):
     #       it also requires to change Forest methods' signatures - not internal _ForestNode, but visible for user Node
     def add_child(self, parent: GraphNode, widget: QWidget=None, side_widgets: list[SideWidget]=None) -> GraphNode:
         parent_forest_node = parent.data(GraphView._FOREST_NODE_DATA_KEY)
-        if len(parent_forest_node.successors) > 0:
-            furthest_parent_leaf = self._graph_forest.find_furthest_leaf(parent_forest_node)
-            self._move_nodes_below(furthest_parent_leaf)
-
-        position = GraphView._calc_new_child_position(parent)
-        child = self._create_node_on_scene(position, widget, side_widgets)
-        a = child.pos()
         forest_node = self._graph_forest.add_leaf(parent_forest_node)
+        changed_subroots = self._lay_out_new_node(forest_node)
+        child = self._create_node_on_scene(self._get_layout_position(forest_node), widget, side_widgets)
         self._link_graph_and_forest_nodes(child, forest_node)
         self._draw_connection(parent, child)
-        line = child.parentPort.multiline._branch_line.line()
 
-        self._update_scene_rect()
+        if not self._is_placing_in_bulk:
+            self._apply_layout_to_subtrees(changed_subroots[1:])
+            self._update_scene_rect()
 
         return child
 
+    # Nodes added between starting and finishing of bulk placing must be added in pre-order below all the placed
+    # ones, e.g. when a whole net is loaded. They are appended to the layout in O(1), so no placed nodes are
+    # moved, and the scene rect is updated once at the finishing.
+    def start_bulk_placing(self):
+        self._layout.calc(self._graph_forest)
+        self._is_placing_in_bulk = True
+
+    def finish_bulk_placing(self):
+        if not self._is_placing_in_bulk:
+            return
+        self._is_placing_in_bulk = False
+        self._update_scene_rect()
+
+    @property
+    def is_placing_in_bulk(self):
+        return self._is_placing_in_bulk
+
+    # Graph nodes and connection lines are moved to the positions of the layout of the graph forest. Edits, that
+    # change levels of nodes, are applied so, the other ones relay out and move only the changed subtrees.
+    def apply_layout(self):
+        self._layout.calc(self._graph_forest)
+        self._apply_layout_to_subtrees(self._graph_forest.roots)
+        self._update_scene_rect()
+
     def delete_leaf(self, graph_node: GraphNode):
         forest_node: Forest.ForestNode = graph_node.data(GraphView._FOREST_NODE_DATA_KEY)
         if forest_node.is_parent():
             raise GraphView.DeletingParentAsLeaf
 
-        if forest_node.is_root():
-            is_moving_above_needed = True
-        elif len(forest_node.parent.successors) > 1:
-            is_moving_above_needed = True
-        else:
-            is_moving_above_needed = False
-
-        if is_moving_above_needed:
-            self._move_nodes_above(forest_node)
-
         if forest_node.is_successor():
             graph_node.parentPort.multiline.deleteChild(graph_node.parentPort.port_number)
-        self._graph_forest.delete_leaf(forest_node)
         self._scene.removeItem(graph_node)
+        self._delete_laid_out_subtree(forest_node, self._graph_forest.delete_leaf)
 
         self._update_scene_rect()
 
@@ -118,24 +133,12 @@ class GraphView(QGraphicsView):
         forest_node: Forest.ForestNode = graph_node.data(GraphView._FOREST_NODE_DATA_KEY)
 
         if new_parent is None:
-            furthest_leaf, subtree_width = self._graph_forest.find_furthest_leaf_with_distance(forest_node)
-            if forest_node.is_root():
-                distance = subtree_width + 1
-            elif len(forest_node.parent.successors) == 1:
-                distance = subtree_width
-            else:
-                distance = subtree_width + 1
-
-            for i in range(distance):
-                self._move_nodes_above(furthest_leaf)
             self._remove_subtree(forest_node)
-            self._graph_forest.delete_subtree(forest_node)
+            self._delete_laid_out_subtree(forest_node, self._graph_forest.delete_subtree)
+            self._update_scene_rect()
 
         elif is_promotion_needed(forest_node, new_parent):
             children = forest_node.successors
-            for child in children:
-                self._move_subtree_left(child)
-
             parent_multiline = new_parent.childrenLine
             parent_multiline.deleteChild(graph_node.parentPort.port_number)
 
@@ -154,62 +157,29 @@ class GraphView(QGraphicsView):
 
             self._graph_forest.cut_node(forest_node, is_needed_to_replace_node_with_successors=True)
             self._scene.removeItem(graph_node)
+            self.apply_layout()
 
         else:
             new_parent_forest_node: Node = new_parent.data(GraphView._FOREST_NODE_DATA_KEY)
-            children = forest_node.successors
+            children = list(forest_node.successors)
 
             if forest_node.is_ancestor(new_parent_forest_node):
                 raise GraphView.ClosingSubtreeReconnection
 
-            furthest_leaf, subtree_width = self._graph_forest.find_furthest_leaf_with_distance(forest_node)
-            if forest_node.is_root():
-                distance = subtree_width + 1
-            elif len(forest_node.parent.successors) == 1:
-                distance = subtree_width
-            else:
-                distance = subtree_width + 1
-            for i in range(distance):
-                self._move_nodes_above(furthest_leaf)
-
-            delta_x = self._graph_forest.calc_distance(forest_node, new_parent_forest_node)[0]
-            new_parent_furthest_leaf = self._graph_forest.find_furthest_leaf(new_parent_forest_node)
-            delta_y = self._graph_forest.calc_distance(forest_node, new_parent_furthest_leaf)[1]
-            if id(new_parent_furthest_leaf) != id(new_parent_forest_node):
-                delta_y -= 1
-            if delta_y < 0:
-                delta_y += distance
-
-            cur_ancestor = new_parent_forest_node
-            top_moving_node = self._graph_forest.get_next_sibling(cur_ancestor)
-            while top_moving_node is None:
-                cur_ancestor = cur_ancestor.parent
-                if cur_ancestor is not None:
-                    top_moving_node = self._graph_forest.get_next_sibling(new_parent_forest_node.parent)
-                else:
-                    break
-
-            if top_moving_node is not None:
-                if delta_y > 0:
-                    delta_y += len(children)
-                for i in range(len(children)):
-                    top_moving_forest_node: GraphNode = top_moving_node.content
-                    top_moving_forest_node.parentPort.multiline.stretch(top_moving_forest_node.parentPort.port_number,
-                                                                        GraphView.VERTICAL_STEP)
-                    self._move_subtree_below(top_moving_node)
-                    self._move_nodes_below(top_moving_node, GraphView.VERTICAL_STEP)
-
-            for child in children:
-                self._move_subtree_left(child, delta_x * GraphView.HORIZONTAL_STEP)
-                self._move_subtree_below(child, -delta_y * GraphView.VERTICAL_STEP)
-
             if forest_node.is_successor():
                 parent_multiline = forest_node.parent.content.childrenLine
                 parent_multiline.deleteChild(graph_node.parentPort.port_number)
-
             for index in reversed(range(len(children))):
                 graph_node.childrenLine.deleteChild(index + 1)
 
+            self._graph_forest.move_subtree(forest_node, new_parent_forest_node)
+            self._graph_forest.cut_node(forest_node, is_needed_to_replace_node_with_successors=True)
+            self._scene.removeItem(graph_node)
+
+            # The first child must be aligned with the new parent, if the parent gets its first connection, so nodes
+            # are moved before connecting, and the lines are drawn by the same layout after it
+            self._layout.calc(self._graph_forest)
+            self._move_subtrees_to_layout(self._graph_forest.roots)
             new_parent_multiline = new_parent.childrenLine
             if new_parent_multiline is not None:
                 new_parent_multiline.addChild(children[0].content)
@@ -217,16 +187,17 @@ class GraphView(QGraphicsView):
                 new_parent_multiline = ConnectionMultiline(new_parent, children[0].content)
             for child in children[1:]:
                 new_parent_multiline.addChild(child.content)
+            self._draw_subtrees_lines(self._graph_forest.roots)
+            self._update_scene_rect()
 
-            self._graph_forest.move_subtree(forest_node, new_parent_forest_node)
-            self._graph_forest.cut_node(forest_node, is_needed_to_replace_node_with_successors=True)
-            self._scene.removeItem(graph_node)
-
-        self._update_scene_rect()
-
+    # Qt deletes widgets, that are children of other items, in quadratic time, and top-level ones in linear
     def reset(self):
+        for forest_node in self._graph_forest:
+            forest_node.content.detachWidgets()
         self._scene.clear()
         self._graph_forest = Forest()
+        self._layout = GraphView._create_layout()
+        self._is_placing_in_bulk = False
         self._update_scene_rect()
 
 
@@ -243,19 +214,55 @@ class GraphView(QGraphicsView):
         graph_node.setData(GraphView._FOREST_NODE_DATA_KEY, forest_node)
 
     @staticmethod
-    def _calc_new_child_position(parent: GraphNode) -> QPointF:
-        x = parent.pos().x() + GraphView.HORIZONTAL_STEP
-
-        parent_forest_node = parent.data(GraphView._FOREST_NODE_DATA_KEY)
-        if parent_forest_node.is_leaf():
-            delta_y = 0
-        else:
-            parent_width = parent_forest_node.calc_subtree_width()
-            delta_y = (parent_width + 1) * GraphView.VERTICAL_STEP
-        y = parent.pos().y() + delta_y
-
-        return QPointF(x, y)
-
+    def _create_layout() -> ForestLayout:
+        return ForestLayout(GraphView.HORIZONTAL_STEP, GraphView.VERTICAL_STEP, GraphView.HORIZONTAL_INDENT,
+                            GraphView.VERTICAL_INDENT, GraphNode.WIDTH, GraphNode.HEIGHT,
+                            ConnectionMultiline.BRANCH_INDENT)
+
+    # Nodes placed in bulk are appended to the layout, the other ones are relaid out with the shifted subtrees
+    def _lay_out_new_node(self, forest_node: Forest.ForestNode) -> list[Forest.ForestNode]:
+        if self._is_placing_in_bulk:
+            self._layout.append(forest_node)
+            return [forest_node]
+        return self._layout.relayout(self._graph_forest, forest_node)
+
+    def _get_layout_position(self, forest_node: Forest.ForestNode) -> QPointF:
+        position = self._layout.get_position(forest_node)
+        return QPointF(position.x, position.y)
+
+    # The following nodes are relaid out after the deleting, their subtrees are moved to the new positions
+    def _delete_laid_out_subtree(self, subroot: Forest.ForestNode, delete: Callable[[Forest.ForestNode], None]):
+        following_node = subroot.parent
+        if following_node is None:
+            root_index = self._graph_forest.node_parent_index(subroot)
+            roots = self._graph_forest.roots
+            following_node = roots[root_index+1] if root_index + 1 < len(roots) else None
+
+        self._layout.discard(subroot)
+        delete(subroot)
+        if following_node is not None:
+            self._apply_layout_to_subtrees(self._layout.relayout(self._graph_forest, following_node))
+
+    def _apply_layout_to_subtrees(self, subroots: list[Forest.ForestNode]):
+        self._move_subtrees_to_layout(subroots)
+        self._draw_subtrees_lines(subroots)
+
+    def _move_subtrees_to_layout(self, subroots: list[Forest.ForestNode]):
+        for subroot in subroots:
+            for forest_node in subroot:
+                forest_node.content.setPos(self._get_layout_position(forest_node))
+
+    # Lines of the parents of the subtrees are redrawn too, as their branches reach the moved successors
+    def _draw_subtrees_lines(self, subroots: list[Forest.ForestNode]):
+        parents = {}
+        for subroot in subroots:
+            if subroot.is_successor():
+                parents[id(subroot.parent)] = subroot.parent
+            for forest_node in subroot:
+                if forest_node.is_parent():
+                    parents[id(forest_node)] = forest_node
+        for parent in parents.values():
+            parent.content.childrenLine.setLines(self._layout.get_connection_lines(parent))
 
     def _create_node_on_scene(self, position: QPointF, widget: QWidget=None, side_widgets: list=None) -> GraphNode:
         graph_node = GraphNode(widget, side_widgets)
@@ -272,91 +279,15 @@ class GraphView(QGraphicsView):
         else:
             parent.childrenLine.addChild(child)
 
-    def _move_nodes_below(self, node: Node, delta_y=VERTICAL_STEP):
-        if node is None:
-            return
-
-        node_forest_root = self._graph_forest.find_root(node)
-        root_index = self._graph_forest.roots.index(node_forest_root)
-        for root in self._graph_forest.roots[root_index + 1:]:
-            self._move_subtree_below(root, delta_y)
-
-        ancestors = self._graph_forest.get_path_to_root(node)
-        for ancestor in ancestors:
-            ancestor_index = ancestor.index_by_parent()
-            ancestor_younger_siblings = ancestor.parent.successors[ancestor_index+1:]
-            for ancestor_sibling in ancestor_younger_siblings:
-                self._move_subtree_below(ancestor_sibling, delta_y)
-
-            if len(ancestor_younger_siblings) > 0:
-                top_moving_port = ancestor_younger_siblings[0].content.parentPort.port_number
-                ancestor_parent_multiline = ancestor.content.parentPort.multiline
-                ancestor_parent_multiline.stretch(top_moving_port, delta_y)
-
-    def _move_nodes_above(self, node: Node):
-        siblings = self._graph_forest.get_siblings_from(node)[1:]
-        for sibling in siblings:
-            self._move_subtree_above(sibling)
-        if len(siblings) > 0:
-            parent_multiline = node.content.parentPort.multiline
-            parent_multiline.stretch(siblings[0].content.parentPort.port_number, -GraphView.VERTICAL_STEP)
-
-        ancestors = self._graph_forest.get_path_to_root(node)
-        for ancestor in ancestors:
-            ancestor_index = ancestor.index_by_parent()
-            ancestor_younger_siblings = ancestor.parent.successors[ancestor_index+1:]
-            for ancestor_sibling in ancestor_younger_siblings:
-                self._move_subtree_above(ancestor_sibling)
-
-            if len(ancestor_younger_siblings) > 0:
-                top_moving_port = ancestor_younger_siblings[0].content.parentPort.port_number
-                ancestor_parent_multiline = ancestor.content.parentPort.multiline
-                ancestor_parent_multiline.stretch(top_moving_port, -GraphView.VERTICAL_STEP)
-
-        node_forest_root = self._graph_forest.find_root(node)
-        root_index = self._graph_forest.roots.index(node_forest_root)
-        for root in self._graph_forest.roots[root_index + 1:]:
-            self._move_subtree_above(root)
-
-    # TODO: Implement via ConnectionMultiline
-    # TODO: Implement everywhere via moveBelowBy(step)
-    def _move_subtree_below(self, subroot: Node, delta_y=VERTICAL_STEP):
-        graph_subroot = subroot.content
-        graph_subroot.moveBy(0, delta_y)
-        if subroot.is_parent():
-            graph_subroot.childrenLine.moveBy(0, delta_y)
-        for successor in subroot.successors:
-            self._move_subtree_below(successor)
-
-    def _move_subtree_above(self, subroot: Node):
-        graph_subroot = subroot.content
-        graph_subroot.moveBy(0, -GraphView.VERTICAL_STEP)
-        if subroot.is_parent():
-            graph_subroot.childrenLine.moveBy(0, -GraphView.VERTICAL_STEP)
-        for successor in subroot.successors:
-            self._move_subtree_above(successor)
-
-    def _move_subtree_left(self, subroot: Forest.ForestNode, delta_x=HORIZONTAL_STEP):
-        graph_subroot = subroot.content
-        graph_subroot.moveBy(-delta_x, 0)
-        if subroot.is_parent():
-            graph_subroot.childrenLine.moveBy(-delta_x, 0)
-        for successor in subroot.successors:
-            self._move_subtree_left(successor)
-
     def _remove_subtree(self, subroot: Forest.ForestNode):
-        graph_node = subroot.content
-        if subroot.is_successor():
-            graph_node.parentPort.multiline.deleteChild(graph_node.parentPort.port_number)
-        self._scene.removeItem(graph_node)
-        for child in reversed(subroot.successors):
-            self._remove_subtree(child)
-
-    def _calc_new_root_position(self) -> QPointF:
-        x = GraphView.HORIZONTAL_INDENT
-        layer = self._graph_forest.calc_width() + 1
-        y = GraphView.VERTICAL_INDENT + layer * GraphView.VERTICAL_STEP
-        return QPointF(x, y)
+        nodes = [subroot]
+        while len(nodes) > 0:
+            node = nodes.pop()
+            graph_node = node.content
+            if node.is_successor():
+                graph_node.parentPort.multiline.deleteChild(graph_node.parentPort.port_number)
+            self._scene.removeItem(graph_node)
+            nodes.extend(node.successors)
 
     def _update_scene_rect(self):
         items_rect = self._scene.itemsBoundingRect()
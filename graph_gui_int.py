@@ -36,14 +36,20 @@ class GraphNode(QGraphicsObject):
     WIDGET_HORIZONTAL_GAP = 5
     WIDGET_STEP = 90
 
+    SUMMARY_COLOR = QColorConstants.White
+
     def __init__(self, widget: QWidget=None, side_widgets: list[SideWidget]=None):
         super().__init__(None)
         self.parentPort: NodePortToParent | None = None
         self.childrenLine: ConnectionMultiline | None = None
+        self._proxy_widget: QGraphicsProxyWidget | None = None
+        self._summary_provider: typing.Callable[[GraphNode], list[str]] | None = None
+        self._side_widgets = side_widgets if side_widgets is not None else []
 
-        proxy_widget = QGraphicsProxyWidget(self)
-        proxy_widget.setWidget(widget)
-        proxy_widget.moveBy(GraphNode.WIDGET_HORIZONTAL_GAP, GraphNode.WIDGET_VERTICAL_GAP)
+        if widget is not None:
+            proxy_widget = QGraphicsProxyWidget()
+            proxy_widget.setWidget(widget)
+            self.setProxyWidget(proxy_widget)
 
         if side_widgets is not None:
             side_widget_points = GraphNode._calcSideWidgetsCoords(len(side_widgets))
@@ -78,6 +84,45 @@ class GraphNode(QGraphicsObject):
         painter.setBrush(brush)
         painter.drawRoundedRect(0, 0, GraphNode.WIDTH, GraphNode.HEIGHT, GraphNode.ROUNDING, GraphNode.ROUNDING)
 
+        if self._proxy_widget is None and self._summary_provider is not None:
+            painter.setPen(GraphNode.SUMMARY_COLOR)
+            text_rect = QRectF(GraphNode.WIDGET_HORIZONTAL_GAP, GraphNode.WIDGET_VERTICAL_GAP,
+                               GraphNode.WIDTH - 2*GraphNode.WIDGET_HORIZONTAL_GAP,
+                               GraphNode.HEIGHT - 2*GraphNode.WIDGET_VERTICAL_GAP)
+            painter.drawText(text_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop,
+                             '\n'.join(self._summary_provider(self)))
+
+    # A node can be shown without a widget, e.g. when it is out of the viewport, then it is painted as a summary.
+    # The detached proxy widget is returned, so it can be reused by another node.
+    def setProxyWidget(self, proxy_widget: QGraphicsProxyWidget | None) -> QGraphicsProxyWidget | None:
+        detached_proxy_widget = self._proxy_widget
+        if detached_proxy_widget is not None:
+            detached_proxy_widget.setParentItem(None)
+            if detached_proxy_widget.scene() is not None:
+                detached_proxy_widget.scene().removeItem(detached_proxy_widget)
+
+        self._proxy_widget = proxy_widget
+        if proxy_widget is not None:
+            proxy_widget.setParentItem(self)
+            proxy_widget.setPos(GraphNode.WIDGET_HORIZONTAL_GAP, GraphNode.WIDGET_VERTICAL_GAP)
+        self.update()
+        return detached_proxy_widget
+
+    def proxyWidget(self) -> QGraphicsProxyWidget | None:
+        return self._proxy_widget
+
+    # Side and proxy widgets become top-level items of the scene, the node doesn't move them anymore
+    def detachWidgets(self):
+        for side_widget in self._side_widgets:
+            side_widget.setParentItem(None)
+        if self._proxy_widget is not None:
+            self._proxy_widget.setParentItem(None)
+
+    # The provider gets the node and returns lines of the text painted instead of the widget
+    def setSummaryProvider(self, summary_provider: typing.Callable[[GraphNode], list[str]] | None):
+        self._summary_provider = summary_provider
+        self.update()
+
     clicked = pyqtSignal('PyQt_PyObject', name='clicked')
     sideWidgetClicked = pyqtSignal('PyQt_PyObject', int, name='sideWidgetClicked')
 
@@ -102,8 +147,7 @@ class GraphNode(QGraphicsObject):
     # Private part
     @pyqtSlot('PyQt_PyObject')
     def _receiveSideWidgetClick(self, side_widget: PlusIcon):
-        side_widgets = self.childItems()
-        widget_num = side_widgets.index(side_widget) - 1
+        widget_num = self._side_widgets.index(side_widget)
         self.sideWidgetClicked.emit(self, widget_num)
 
     @staticmethod
@@ -298,38 +342,12 @@ class ConnectionMultiline:
                 self._scene.removeItem(self._branch_line)
                 self._parent.childrenLine = None
 
-    def stretch(self, port_number, delta_y):
-        branch_qlinef = self._branch_line.line()
-        new_bottom_branch_point = QPointF(branch_qlinef.p2().x(), branch_qlinef.p2().y() + delta_y)
-        branch_qlinef.setP2(new_bottom_branch_point)
-        self._branch_line.setLine(branch_qlinef)
-
-        for port in self._children_ports[port_number-1:]:
-            child_line_p1 = port.line.line().p1()
-            child_line_p2 = port.line.line().p2()
-            port.line.setLine(child_line_p1.x(), child_line_p1.y() + delta_y,
-                              child_line_p2.x(), child_line_p2.y() + delta_y)
-
-    # TODO: Replace with simple moveBy method
-    def moveBy(self, delta_x, delta_y):
-        for port in self._children_ports:
-            child_line = port.line
-            new_child_line_p1 = QPointF(child_line.line().p1().x() + delta_x, child_line.line().p1().y() + delta_y)
-            new_child_line_p2 = QPointF(child_line.line().p2().x() + delta_x, child_line.line().p2().y() + delta_y)
-            new_line = QLineF(new_child_line_p1, new_child_line_p2)
-            child_line.setLine(new_line)
-
-        parent_line = self._parent_line
-        new_child_line_p1 = QPointF(parent_line.line().p1().x() + delta_x, parent_line.line().p1().y() + delta_y)
-        new_child_line_p2 = QPointF(parent_line.line().p2().x() + delta_x, parent_line.line().p2().y() + delta_y)
-        new_line = QLineF(new_child_line_p1, new_child_line_p2)
-        parent_line.setLine(new_line)
-
-        branch_line = self._branch_line
-        new_child_line_p1 = QPointF(branch_line.line().p1().x() + delta_x, branch_line.line().p1().y() + delta_y)
-        new_child_line_p2 = QPointF(branch_line.line().p2().x() + delta_x, branch_line.line().p2().y() + delta_y)
-        new_line = QLineF(new_child_line_p1, new_child_line_p2)
-        branch_line.setLine(new_line)
+    # Lines are given by a layout, ports of the children must be in the same order
+    def setLines(self, connection_lines):
+        for port, child_line in zip(self._children_ports, connection_lines.child_lines):
+            port.line.setLine(*child_line.start, *child_line.end)
+        self._parent_line.setLine(*connection_lines.parent_line.start, *connection_lines.parent_line.end)
+        self._branch_line.setLine(*connection_lines.branch_line.start, *connection_lines.branch_line.end)
 
     def clear(self):
         if len(self._children_ports) > 0:
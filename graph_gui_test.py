@@ -0,0 +1,151 @@
+import os
+import random
+import unittest
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from graph_gui import *
+
+
+app = QApplication.instance() or QApplication([])
+
+
+def place_chain_in_bulk(depth: int, view: GraphView | None = None) -> GraphView:
+    view = view if view is not None else GraphView()
+    view.start_bulk_placing()
+    node = view.add_root()
+    for level in range(depth):
+        node = view.add_child(node, side_widgets=[PlusIcon(), CrossIcon()])
+    view.finish_bulk_placing()
+    return view
+
+
+# The methods of the target are replaced with the counting ones, the returned counts are updated on every call
+def count_calls(target, method_names: list[str]) -> dict[str, int]:
+    counts = dict.fromkeys(method_names, 0)
+    for method_name in method_names:
+        def counted_method(*args, method=getattr(target, method_name), method_name=method_name, **kwargs):
+            counts[method_name] += 1
+            return method(*args, **kwargs)
+        setattr(target, method_name, counted_method)
+    return counts
+
+def count_attached_widgets(scene: QGraphicsScene) -> int:
+    return sum(1 for item in scene.items() if isinstance(item, QGraphicsWidget) and item.parentItem() is not None)
+
+
+def build_random_view(nodes_number, generator: random.Random) -> GraphView:
+    view = GraphView()
+    graph_nodes = [view.add_root()]
+    for index in range(nodes_number):
+        if generator.random() < 0.1:
+            graph_nodes.append(view.add_root())
+        else:
+            graph_nodes.append(view.add_child(generator.choice(graph_nodes)))
+    return view
+
+def get_line_points(line: QGraphicsLineItem) -> Segment:
+    return Segment(Point(line.line().x1(), line.line().y1()), Point(line.line().x2(), line.line().y2()))
+
+def get_view_layout(view: GraphView) -> tuple[list, list]:
+    positions, lines = [], []
+    for forest_node in view._graph_forest:
+        graph_node: GraphNode = forest_node.content
+        positions.append(Point(graph_node.pos().x(), graph_node.pos().y()))
+        multiline = graph_node.childrenLine
+        if multiline is not None:
+            lines.append(ConnectionLines(get_line_points(multiline._parent_line),
+                                         get_line_points(multiline._branch_line),
+                                         [get_line_points(port.line) for port in multiline._children_ports]))
+    return positions, lines
+
+def get_proper_layout(view: GraphView) -> tuple[list, list]:
+    layout = GraphView._create_layout()
+    layout.calc(view._graph_forest)
+    positions = [layout.get_position(forest_node) for forest_node in view._graph_forest]
+    lines = [layout.get_connection_lines(forest_node) for forest_node in view._graph_forest
+             if forest_node.is_parent()]
+    return positions, lines
+
+
+class TestGraphViewLayout(unittest.TestCase):
+    def setUp(self):
+        self.generator = random.Random(0)
+        self.view = build_random_view(60, self.generator)
+
+    def assert_view_is_laid_out(self):
+        self.assertEqual(get_proper_layout(self.view), get_view_layout(self.view))
+
+    def get_graph_nodes(self, condition) -> list[GraphNode]:
+        return [forest_node.content for forest_node in self.view._graph_forest if condition(forest_node)]
+
+    def test_adding(self):
+        self.assert_view_is_laid_out()
+        for index in range(20):
+            self.view.add_child(self.generator.choice(self.get_graph_nodes(lambda forest_node: True)))
+            self.assert_view_is_laid_out()
+
+    def test_deleting_leaves(self):
+        for index in range(30):
+            self.view.delete_leaf(self.generator.choice(self.get_graph_nodes(lambda forest_node:
+                                                                             forest_node.is_leaf())))
+            self.assert_view_is_laid_out()
+
+    def test_deleting_subtrees(self):
+        for index in range(5):
+            self.view.delete_parent(self.generator.choice(self.get_graph_nodes(lambda forest_node:
+                                                                               forest_node.is_parent())))
+            self.assert_view_is_laid_out()
+
+    def test_promoting_successors(self):
+        for index in range(5):
+            graph_node = self.generator.choice(self.get_graph_nodes(lambda forest_node: forest_node.is_parent()
+                                                                    and forest_node.is_successor()))
+            self.view.delete_parent(graph_node, graph_node.data(GraphView._FOREST_NODE_DATA_KEY).parent.content)
+            self.assert_view_is_laid_out()
+
+    def test_reconnecting_successors(self):
+        layout_counts = count_calls(self.view._layout, ['calc'])
+        for index in range(5):
+            graph_node = self.generator.choice(self.get_graph_nodes(lambda forest_node: forest_node.is_parent()))
+            forest_node = graph_node.data(GraphView._FOREST_NODE_DATA_KEY)
+            new_parent = self.generator.choice(self.get_graph_nodes(
+                lambda candidate: candidate is not forest_node and candidate is not forest_node.parent
+                                  and not forest_node.is_ancestor(candidate)))
+            self.view.delete_parent(graph_node, new_parent)
+            self.assert_view_is_laid_out()
+            self.assertEqual(index + 1, layout_counts['calc'])
+
+
+class TestGraphViewBulkPlacing(unittest.TestCase):
+    # Every node is appended to the layout, which is calculated once, and no placed node is moved
+    def test_placing_is_linear(self):
+        tested_view = GraphView()
+        layout_counts = count_calls(tested_view._layout, ['calc', 'relayout', 'append'])
+        view_counts = count_calls(tested_view, ['_move_subtrees_to_layout', '_draw_subtrees_lines',
+                                                '_update_scene_rect'])
+        place_chain_in_bulk(500, tested_view)
+        self.assertEqual({'calc': 1, 'relayout': 0, 'append': 501}, layout_counts)
+        self.assertEqual({'_move_subtrees_to_layout': 0, '_draw_subtrees_lines': 0, '_update_scene_rect': 1},
+                         view_counts)
+        self.assertEqual(get_proper_layout(tested_view), get_view_layout(tested_view))
+
+    # Qt clears widgets, which are children of other items, in quadratic time, so they are detached before
+    def test_resetting_is_linear(self):
+        tested_view = place_chain_in_bulk(500)
+        scene = tested_view.scene()
+        attached_widgets_numbers = []
+        clear = scene.clear
+
+        def check_and_clear():
+            attached_widgets_numbers.append(count_attached_widgets(scene))
+            clear()
+
+        scene.clear = check_and_clear
+        self.assertGreater(count_attached_widgets(scene), 0)
+        tested_view.reset()
+        self.assertEqual([0], attached_widgets_numbers)
+        self.assertEqual([], scene.items())
+        self.assertEqual(0, tested_view._graph_forest.calc_size())
+
+
+if __name__ == '__main__':
+    unittest.main()
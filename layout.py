@@ -0,0 +1,192 @@
+from __future__ import annotations
+from collections import namedtuple
+from tree import *
+
+
+Point = namedtuple('Point', 'x y')
+Segment = namedtuple('Segment', 'start end')
+ConnectionLines = namedtuple('ConnectionLines', 'parent_line branch_line child_lines')
+
+
+# Maps nodes of a forest to positions on the grid of levels and rows, no graphics is used.
+# Nodes are laid out in pre-order: a root and every not first successor take the next free row, the first successor
+# takes the row of its parent. The level of a node is its depth.
+# Rows of successors are stored relatively to the rows of their parents, so a change of the width of a subtree shifts
+# only younger siblings of its ancestors and the following roots. Absolute rows are cached until the next shift.
+class ForestLayout:
+    # Public interface
+    class NotLaidOutNode(Exception): pass
+
+
+    def __init__(self, horizontal_step, vertical_step, horizontal_indent=0, vertical_indent=0,
+                 node_width=0, node_height=0, branch_indent=0):
+        self._horizontal_step = horizontal_step
+        self._vertical_step = vertical_step
+        self._horizontal_indent = horizontal_indent
+        self._vertical_indent = vertical_indent
+        self._node_width = node_width
+        self._node_height = node_height
+        self._branch_indent = branch_indent
+        self._cells: dict[int, tuple[int, int]] = {}
+        self._rows: dict[int, int] = {}
+        self._rows_number = 0
+
+    def calc(self, forest: Forest):
+        self._cells = {}
+        self._rows = {}
+        next_row = 0
+        for root in forest.roots:
+            next_row += self._lay_out_subtree(root, 0, next_row, next_row)
+        self._rows_number = next_row
+
+    # A node added in pre-order below all the laid out ones takes the row of its parent, if it's the first
+    # successor, or the next free row otherwise. No laid out node is shifted, so appending takes O(1).
+    def append(self, node: Forest.ForestNode):
+        if node.is_root():
+            row = self._rows_number
+            self._cells[id(node)] = (0, row)
+        else:
+            parent = node.parent
+            try:
+                level = self._cells[id(parent)][0] + 1
+            except KeyError:
+                raise ForestLayout.NotLaidOutNode
+            parent_row = self.get_row(parent)
+            row = parent_row if parent.successors[0] is node else self._rows_number
+            self._cells[id(node)] = (level, row - parent_row)
+        self._rows[id(node)] = row
+        self._rows_number = max(self._rows_number, row + 1)
+
+    # The subtree of the node is laid out again, then younger siblings of its ancestors and the following roots are
+    # shifted, until one of them is found in its place. Roots of the subtrees, which positions are changed, are
+    # returned. The layout must be actual for all the nodes before the node in pre-order, so a few changes are
+    # relaid out in pre-order.
+    def relayout(self, forest: Forest, node: Forest.ForestNode) -> list[Forest.ForestNode]:
+        if node.is_root():
+            index = forest.node_parent_index(node)
+            offset = 0 if index == 0 else self._calc_next_offset(forest.roots[index-1])
+            self._lay_out_subtree(node, 0, offset, offset)
+        else:
+            level = self.get_cell(node.parent)[0] + 1
+            index = node.index_by_parent()
+            offset = 0 if index == 0 else self._calc_next_offset(node.parent.successors[index-1])
+            self._lay_out_subtree(node, level, offset, self.get_row(node.parent) + offset)
+
+        changed_subroots = [node]
+        cur_node = node
+        while cur_node is not None:
+            siblings = cur_node.parent.successors if cur_node.is_successor() else forest.roots
+            if siblings[-1] is not cur_node:
+                younger_siblings = siblings[forest.node_parent_index(cur_node)+1:]
+                delta_rows = self._calc_next_offset(cur_node) - self._cells[id(younger_siblings[0])][1]
+                if delta_rows == 0:
+                    return changed_subroots
+                self._rows = {}
+                for sibling in younger_siblings:
+                    level, offset = self._cells[id(sibling)]
+                    self._cells[id(sibling)] = (level, offset + delta_rows)
+                    changed_subroots.append(sibling)
+            cur_node = cur_node.parent
+        self._rows_number = self._calc_next_offset(forest.roots[-1])
+        return changed_subroots
+
+    # Positions of the deleted nodes are to be discarded before the deleting. The following nodes are to be relaid
+    # out after it, only the deleting of the last root doesn't need it.
+    def discard(self, subroot: Forest.ForestNode):
+        if subroot.is_root() and self._calc_next_offset(subroot) == self._rows_number:
+            self._rows_number = self._cells[id(subroot)][1]
+        for node in subroot:
+            self._cells.pop(id(node), None)
+            self._rows.pop(id(node), None)
+
+    def is_laid_out(self, node: Forest.ForestNode) -> bool:
+        return id(node) in self._cells
+
+    # Levels and absolute rows of nodes
+    def get_cell(self, node: Forest.ForestNode) -> tuple[int, int]:
+        try:
+            return self._cells[id(node)][0], self.get_row(node)
+        except KeyError:
+            raise ForestLayout.NotLaidOutNode
+
+    def get_row(self, node: Forest.ForestNode) -> int:
+        rows = self._rows
+        if id(node) in rows:
+            return rows[id(node)]
+
+        path = []
+        cur_node = node
+        while cur_node is not None and id(cur_node) not in rows:
+            path.append(cur_node)
+            cur_node = cur_node.parent
+        row = rows[id(cur_node)] if cur_node is not None else 0
+        try:
+            for cur_node in reversed(path):
+                row = row + self._cells[id(cur_node)][1]
+                rows[id(cur_node)] = row
+        except KeyError:
+            raise ForestLayout.NotLaidOutNode
+        return row
+
+    def get_position(self, node: Forest.ForestNode) -> Point:
+        level, row = self.get_cell(node)
+        return Point(self._horizontal_indent + level * self._horizontal_step,
+                     self._vertical_indent + row * self._vertical_step)
+
+    # Lines connect the right middle point of the parent with the branch point, the branch point with the one of
+    # the last successor, and every row of the branch with the left middle point of the successor in it
+    def get_connection_lines(self, parent: Forest.ForestNode) -> ConnectionLines | None:
+        if parent.is_leaf():
+            return None
+
+        parent_position = self.get_position(parent)
+        middle_y = parent_position.y + self._node_height / 2
+        parent_point = Point(parent_position.x + self._node_width, middle_y)
+        branch_x = parent_point.x + self._branch_indent
+        child_lines = []
+        for successor in parent.successors:
+            successor_position = self.get_position(successor)
+            successor_y = successor_position.y + self._node_height / 2
+            child_lines.append(Segment(Point(branch_x, successor_y), Point(successor_position.x, successor_y)))
+
+        parent_line = Segment(parent_point, Point(branch_x, middle_y))
+        branch_line = Segment(Point(branch_x, middle_y), child_lines[-1].start)
+        return ConnectionLines(parent_line, branch_line, child_lines)
+
+    @property
+    def cells_number(self):
+        return len(self._cells)
+
+    @property
+    def rows_number(self):
+        return self._rows_number
+
+
+    # Private part
+    # Offset of the next sibling relatively to the row of the parent, or the row of the next root
+    def _calc_next_offset(self, node: Forest.ForestNode) -> int:
+        return self._cells[id(node)][1] + node.calc_subtree_width() + 1
+
+    # Offset is the row relatively to the parent row, the number of rows of the subtree is returned
+    def _lay_out_subtree(self, subroot: Forest.ForestNode, level: int, offset: int, row: int) -> int:
+        cells = self._cells
+        rows = self._rows
+        last_row = row - 1
+        nodes = [(subroot, level, offset, row)]
+        while len(nodes) > 0:
+            node, level, offset, row = nodes.pop()
+            if row is None:
+                last_row += 1
+                offset += last_row
+                row = last_row
+            else:
+                last_row = max(last_row, row)
+            cells[id(node)] = (level, offset)
+            rows[id(node)] = row
+
+            successors = node.successors
+            for successor in reversed(successors[1:]):
+                nodes.append((successor, level + 1, -row, None))
+            if len(successors) > 0:
+                nodes.append((successors[0], level + 1, 0, row))
+        return last_row - self._rows[id(subroot)] + 1
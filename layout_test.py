@@ -0,0 +1,129 @@
+import random
+import unittest
+from layout import *
+
+
+def build_forest():
+    forest = Forest()
+    first_root = forest.create_root('A')
+    first_child = forest.add_leaf(first_root, 'B')
+    forest.add_leaf(first_child, 'C')
+    forest.add_leaf(first_child, 'D')
+    forest.add_leaf(first_root, 'E')
+    forest.create_root('F')
+    return forest
+
+def build_random_forest(nodes_number, generator: random.Random):
+    forest = Forest()
+    nodes = [forest.create_root()]
+    for index in range(nodes_number):
+        if generator.random() < 0.1:
+            nodes.append(forest.create_root())
+        else:
+            nodes.append(forest.add_leaf(generator.choice(nodes)))
+    return forest, nodes
+
+def get_cells(layout: ForestLayout, forest: Forest):
+    return [layout.get_cell(node) for node in forest]
+
+
+class TestForestLayout(unittest.TestCase):
+    def test_calc(self):
+        forest = build_forest()
+        tested_layout = ForestLayout(10, 5, horizontal_indent=2, vertical_indent=1)
+        tested_layout.calc(forest)
+        self.assertEqual([(0, 0), (1, 0), (2, 0), (2, 1), (1, 2), (0, 3)], get_cells(tested_layout, forest))
+        self.assertEqual(Point(22, 6), tested_layout.get_position(forest.roots[0].successors[0].successors[1]))
+
+    def test_connection_lines(self):
+        forest = build_forest()
+        tested_layout = ForestLayout(10, 5, node_width=4, node_height=2, branch_indent=3)
+        tested_layout.calc(forest)
+        connection_lines = tested_layout.get_connection_lines(forest.roots[0])
+        self.assertEqual(Segment(Point(4, 1), Point(7, 1)), connection_lines.parent_line)
+        self.assertEqual(Segment(Point(7, 1), Point(7, 11)), connection_lines.branch_line)
+        self.assertEqual([Segment(Point(7, 1), Point(10, 1)), Segment(Point(7, 11), Point(10, 11))],
+                         connection_lines.child_lines)
+        self.assertIsNone(tested_layout.get_connection_lines(forest.roots[1]))
+
+    def test_relayout_added_leaf(self):
+        forest = build_forest()
+        tested_layout = ForestLayout(1, 1)
+        tested_layout.calc(forest)
+        leaf = forest.add_leaf(forest.roots[0].successors[0].successors[0], 'G')
+        changed_nodes = tested_layout.relayout(forest, leaf)
+        self.assertEqual(['G'], [node.content for node in changed_nodes])
+
+        leaf = forest.add_leaf(forest.roots[0].successors[0], 'H')
+        changed_nodes = tested_layout.relayout(forest, leaf)
+        self.assertEqual(['H', 'E', 'F'], [node.content for node in changed_nodes])
+        self.assertEqual((1, 3), tested_layout.get_cell(forest.roots[0].successors[1]))
+
+    def test_relayout_random_edits(self):
+        generator = random.Random(0)
+        forest, nodes = build_random_forest(300, generator)
+        tested_layout = ForestLayout(1, 1)
+        tested_layout.calc(forest)
+        for index in range(200):
+            if generator.random() < 0.6:
+                nodes.append(forest.add_leaf(generator.choice(nodes)))
+                tested_layout.relayout(forest, nodes[-1])
+            else:
+                leaves = [node for node in nodes if node.is_leaf() and node.is_successor()]
+                leaf = generator.choice(leaves)
+                parent = leaf.parent
+                tested_layout.discard(leaf)
+                forest.delete_leaf(leaf)
+                nodes = [node for node in nodes if node is not leaf]
+                tested_layout.relayout(forest, parent)
+
+            proper_layout = ForestLayout(1, 1)
+            proper_layout.calc(forest)
+            self.assertEqual(get_cells(proper_layout, forest), get_cells(tested_layout, forest))
+        self.assertEqual(len(nodes), tested_layout.cells_number)
+
+    def test_append(self):
+        generator = random.Random(1)
+        forest, nodes = build_random_forest(300, generator)
+        proper_layout = ForestLayout(1, 1)
+        proper_layout.calc(forest)
+
+        tested_layout = ForestLayout(1, 1)
+        tested_forest = Forest()
+        tested_nodes = {}
+        for node in forest:
+            if node.is_root():
+                tested_node = tested_forest.create_root()
+            else:
+                tested_node = tested_forest.add_leaf(tested_nodes[id(node.parent)])
+            tested_nodes[id(node)] = tested_node
+            tested_layout.append(tested_node)
+        self.assertEqual(get_cells(proper_layout, forest), get_cells(tested_layout, tested_forest))
+        self.assertEqual(proper_layout.rows_number, tested_layout.rows_number)
+
+        leaf = tested_forest.add_leaf(tested_forest.roots[0])
+        tested_layout.relayout(tested_forest, leaf)
+        last_root = tested_forest.roots[-1]
+        tested_layout.discard(last_root)
+        tested_forest.delete_subtree(last_root)
+        proper_layout.calc(tested_forest)
+        self.assertEqual(proper_layout.rows_number, tested_layout.rows_number)
+
+    def test_deep_chain(self):
+        forest = Forest()
+        node = forest.create_root()
+        for level in range(10000):
+            node = forest.add_leaf(node)
+        tested_layout = ForestLayout(1, 1)
+        tested_layout.calc(forest)
+        self.assertEqual((10000, 0), tested_layout.get_cell(node))
+
+    def test_not_laid_out_node(self):
+        forest = build_forest()
+        tested_layout = ForestLayout(1, 1)
+        with self.assertRaises(ForestLayout.NotLaidOutNode):
+            tested_layout.get_position(forest.roots[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
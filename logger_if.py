@@ -6,7 +6,7 @@ class LoggerIf:
     def create_log_file(self, path_to_net_file):
         raise NotImplementedError
 
-    def log_loading(self, file_path):
+    def log_loading(self, file_path, loading_info=None, is_file_copied=False):
         raise NotImplementedError
 
     def write_action(self, action, *argv):
@@ -1,19 +1,41 @@
 
-from os.path import dirname, basename
+import atexit
+import queue
+import shutil
+import threading
+import time
+import weakref
+from collections import namedtuple
+from os.path import splitext, getsize
 from datetime import datetime
 from net_view import *
+from binary_net_format import *
 
 
+# Records are queued by the calling thread and written by the background one, that keeps the log file open.
+# The file is flushed, when enough records are buffered or some time has passed, and closed by close().
+# The log file is placed next to the net file and named as it without the extension, both of .ens and .ensb.
 class LoggerImpl(LoggerIf):
     # Public interface
+    FLUSH_SIZE = 64 * 1024
+    FLUSH_INTERVAL = 1.0
+    # Records, that aren't written in this time at the exit of the interpreter, are lost
+    EXIT_TIMEOUT = 5.0
+
+
     class NoLogFile(Exception): pass
     class AttemptToInvalidateGoodView(Exception): pass
     class BadValidationResult(Exception): pass
 
+
     def __init__(self, file=None):
         super().__init__()
         self._log_file = None
         self._temp_log = '\n'
+        self._file = None
+        self._records: queue.Queue = queue.Queue()
+        self._writing_thread: threading.Thread | None = None
+        _active_loggers.add(self)
         if file is not None:
             self._activate_file(file)
 
@@ -21,16 +43,16 @@ class LoggerImpl(LoggerIf):
         self._activate_file(path_to_net_file)
         self._dump_temp_log_to_file()
 
-    def log_loading(self, file_path):
-        file = open(file_path, 'r')
-        file_content = file.read()
-        file.close()
-
+    # The summary of the loaded file is logged, the file itself is copied to the log by the writing thread only
+    # if it's requested
+    def log_loading(self, file_path, loading_info: LoadingInfo | None = None,
+                    is_file_copied=IS_LOGGING_LOADED_FILES):
         if self._log_file is None:
             raise LoggerImpl.NoLogFile
 
-        file_content += '\n\n'
-        self._write_new_record(file_content)
+        self._write_new_record(LoggerImpl._build_loading_record(file_path, loading_info))
+        if is_file_copied:
+            self._queue_record(LoggerImpl._CopiedFile(file_path))
 
     def write_action(self, action, *argv):
         action_record = LoggerImpl._build_action_record(action, *argv)
@@ -43,26 +65,138 @@ class LoggerImpl(LoggerIf):
     def write_generic_record(self, record):
         self._write_new_record(record)
 
+    # Waits until all the queued records are written to the file or the writing thread fails
+    def flush(self):
+        writing_thread = self._writing_thread
+        if writing_thread is None or not writing_thread.is_alive():
+            return
+        is_flushed = threading.Event()
+        self._records.put(is_flushed)
+        while not is_flushed.wait(LoggerImpl.FLUSH_INTERVAL):
+            if not writing_thread.is_alive():
+                break
+
+    # All the queued records are written before the file is closed, the logger can be activated again after it.
+    # If the timeout is given, the rest of records are abandoned after it
+    def close(self, timeout: float | None = None):
+        if self._writing_thread is None:
+            return
+        if self._writing_thread.is_alive():
+            self._records.put(LoggerImpl._CLOSING)
+            self._writing_thread.join(timeout)
+        self._writing_thread = None
+        self._file = None
+
     @property
     def log_file(self):
         return self._log_file
 
 
     # Private part
+    _CLOSING = None
+    _CopiedFile = namedtuple('_CopiedFile', 'path')
+
+    # Every writing thread gets its own queue, so records left by the previous one are not read by it
     def _activate_file(self, path_to_net_file):
-        directory = dirname(path_to_net_file)
-        net_name = basename(path_to_net_file).removesuffix('.ens')
-        log_file_full_path = directory + '/' + net_name
-        self._log_file = log_file_full_path
+        self.close()
+        self._log_file = splitext(path_to_net_file)[0]
 
-        file = open(self._log_file, 'a')
-        file.write('\n\n\n\nSession from {date_and_time}\n\n'.format(date_and_time=datetime.now()))
-        file.close()
+        self._file = open(self._log_file, 'a', buffering=LoggerImpl.FLUSH_SIZE)
+        self._records = queue.Queue()
+        self._writing_thread = threading.Thread(target=self._write_queued_records, args=(self._file, self._records),
+                                                name='LoggerWriting', daemon=True)
+        self._writing_thread.start()
+        self._queue_record('\n\n\n\nSession from {date_and_time}\n\n'.format(date_and_time=datetime.now()))
 
     def _dump_temp_log_to_file(self):
-        file = open(self._log_file, 'a')
-        file.write(self._temp_log)
-        file.close()
+        self._queue_record(self._temp_log)
+
+    # Records are dropped, if the writing thread has failed
+    def _queue_record(self, record):
+        if self._writing_thread is not None and self._writing_thread.is_alive():
+            self._records.put(record)
+
+    # Runs in the writing thread, that is the only user of the opened file. If writing fails, the error is reported
+    # by the thread, the file is closed and the waiting flushes are released, records queued after it are ignored
+    def _write_queued_records(self, file, records: queue.Queue):
+        buffered_size = 0
+        last_flush_time = time.monotonic()
+        is_closing = False
+        record = None
+        try:
+            while not is_closing:
+                timeout = None
+                if buffered_size > 0:
+                    timeout = max(0.0, LoggerImpl.FLUSH_INTERVAL - (time.monotonic() - last_flush_time))
+                try:
+                    record = records.get(timeout=timeout)
+                except queue.Empty:
+                    record = ''
+
+                is_closing = record is LoggerImpl._CLOSING
+                if isinstance(record, LoggerImpl._CopiedFile):
+                    buffered_size += LoggerImpl._copy_file(record.path, file)
+                elif isinstance(record, str):
+                    file.write(record)
+                    buffered_size += len(record)
+                is_flush_needed = buffered_size >= LoggerImpl.FLUSH_SIZE \
+                                  or time.monotonic() - last_flush_time >= LoggerImpl.FLUSH_INTERVAL
+                if is_closing or isinstance(record, threading.Event) or is_flush_needed:
+                    file.flush()
+                    buffered_size = 0
+                    last_flush_time = time.monotonic()
+                if isinstance(record, threading.Event):
+                    record.set()
+        finally:
+            if not is_closing:
+                LoggerImpl._release_flushes(records, record)
+            try:
+                file.close()
+            except (OSError, ValueError):
+                pass
+
+    @staticmethod
+    def _release_flushes(records: queue.Queue, current_record):
+        left_records = [current_record]
+        while True:
+            try:
+                left_records.append(records.get_nowait())
+            except queue.Empty:
+                break
+        for record in left_records:
+            if isinstance(record, threading.Event):
+                record.set()
+
+    # The file is copied by chunks, its size is returned. Binary nets are not copied to the text log.
+    @staticmethod
+    def _copy_file(path, log_file) -> int:
+        try:
+            if BinaryNetFormat.is_binary_file(path):
+                log_file.write('Loaded file is binary and is not copied')
+                copied_size = 0
+            else:
+                copied_size = getsize(path)
+                with open(path, 'r') as copied_file:
+                    shutil.copyfileobj(copied_file, log_file)
+        except (OSError, ValueError) as error:
+            log_file.write('Loaded file cannot be copied: {error}'.format(error=error))
+            copied_size = 0
+        log_file.write('\n\n')
+        return copied_size
+
+    @staticmethod
+    def _build_loading_record(file_path, loading_info: LoadingInfo | None):
+        if loading_info is None:
+            return 'Loading of {path}\n\n'.format(path=file_path)
+
+        content_hash = loading_info.content_hash if loading_info.content_hash is not None else 'not calculated'
+        new_record = 'Loading of {path}, Size: {size} bytes, SHA-256: {hash}'.format(path=loading_info.path,
+                                                                                   size=loading_info.size,
+                                                                                   hash=content_hash)
+        new_record += ', Power Inputs: {inputs}, Converters: {converters}, Consumers: {consumers}'.format(
+            inputs=loading_info.power_inputs, converters=loading_info.converters, consumers=loading_info.consumers)
+        new_record += ', Parse Time: {time:.3f} s\n\n'.format(time=loading_info.parse_time)
+        return new_record
 
     @staticmethod
     def _build_action_record(action, *argv):
@@ -98,6 +232,13 @@ class LoggerImpl(LoggerIf):
         if self._log_file is None:
             self._temp_log += record
         else:
-            file = open(self._log_file, 'a')
-            file.write(record)
-            file.close()
+            self._queue_record(record)
+
+
+# Loggers, that are not closed explicitly, write their records at the normal exit of the interpreter
+_active_loggers: weakref.WeakSet[LoggerImpl] = weakref.WeakSet()
+
+@atexit.register
+def _close_active_loggers():
+    for logger in list(_active_loggers):
+        logger.close(LoggerImpl.EXIT_TIMEOUT)
@@ -0,0 +1,140 @@
+import os
+import time
+import tempfile
+import unittest
+from logger_impl import *
+
+
+class TestLoggerImpl(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.net_file = os.path.join(self.directory.name, 'net.ens')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_log(self, logger: LoggerImpl):
+        with open(logger.log_file) as file:
+            return file.read()
+
+    def test_records_are_written_on_closing(self):
+        tested_logger = LoggerImpl(self.net_file)
+        for index in range(1000):
+            tested_logger.write_action('Add Power Input', 'PWIN-{number}'.format(number=index))
+        tested_logger.close()
+
+        log = self.read_log(tested_logger)
+        self.assertIn('Session from', log)
+        proper_records = ['Add Power Input, Name: PWIN-{number}\n\n'.format(number=index) for index in range(1000)]
+        self.assertTrue(log.endswith(''.join(proper_records)))
+
+    def test_temp_log_is_dumped(self):
+        tested_logger = LoggerImpl()
+        tested_logger.write_action('Add Converter', 'CNVR-1', 'PWIN-1')
+        tested_logger.create_log_file(self.net_file)
+        tested_logger.mark_as_invalid(False)
+        tested_logger.flush()
+
+        log = self.read_log(tested_logger)
+        self.assertTrue(log.endswith('Add Converter, Name: CNVR-1, Parent: PWIN-1\n\n'
+                                     'Has considered as invalid because validation fails.\n\n'))
+        tested_logger.close()
+
+    def test_loading_is_logged_compactly(self):
+        with open(self.net_file, 'w') as file:
+            file.write('Level 1 Power_Input PWIN-1 Input 1:\n')
+        loading_info = LoadingInfo(path=self.net_file, size=36, content_hash='0a1b', power_inputs=1, converters=0,
+                                   consumers=0, parse_time=0.25)
+        tested_logger = LoggerImpl(self.net_file)
+        tested_logger.log_loading(self.net_file, loading_info)
+        tested_logger.close()
+
+        log = self.read_log(tested_logger)
+        self.assertTrue(log.endswith('Loading of {path}, Size: 36 bytes, SHA-256: 0a1b, Power Inputs: 1, '
+                                     'Converters: 0, Consumers: 0, Parse Time: 0.250 s\n\n'.format(path=self.net_file)))
+        self.assertNotIn('PWIN-1', log)
+
+    def test_loaded_file_is_copied_on_demand(self):
+        with open(self.net_file, 'w') as file:
+            file.write('Level 1 Power_Input PWIN-1 Input 1:\n')
+        tested_logger = LoggerImpl(self.net_file)
+        tested_logger.log_loading(self.net_file, is_file_copied=True)
+        tested_logger.close()
+
+        log = self.read_log(tested_logger)
+        self.assertTrue(log.endswith('Loading of {path}\n\nLevel 1 Power_Input PWIN-1 Input 1:\n\n\n'
+                                     .format(path=self.net_file)))
+
+    def test_binary_net_is_not_logged_into(self):
+        binary_net_file = os.path.join(self.directory.name, 'net.ensb')
+        with open(binary_net_file, 'wb') as file:
+            file.write(b'binary net')
+        tested_logger = LoggerImpl(binary_net_file)
+        tested_logger.write_generic_record('Record\n')
+        tested_logger.close()
+
+        self.assertEqual(os.path.join(self.directory.name, 'net'), tested_logger.log_file)
+        self.assertIn('Record', self.read_log(tested_logger))
+        with open(binary_net_file, 'rb') as file:
+            self.assertEqual(b'binary net', file.read())
+
+    def test_binary_loaded_file_is_not_copied(self):
+        binary_net_file = os.path.join(self.directory.name, 'net.ensb')
+        with open(binary_net_file, 'wb') as file:
+            file.write(BinaryNetFormat.MAGIC + bytes(range(256)))
+        broken_net_file = os.path.join(self.directory.name, 'broken.ens')
+        with open(broken_net_file, 'wb') as file:
+            file.write(b'\xff\xfe\xfd')
+        tested_logger = LoggerImpl(self.net_file)
+        tested_logger.log_loading(binary_net_file, is_file_copied=True)
+        tested_logger.log_loading(broken_net_file, is_file_copied=True)
+        tested_logger.write_generic_record('Record after copying\n')
+        tested_logger.close()
+
+        log = self.read_log(tested_logger)
+        self.assertIn('Loaded file is binary and is not copied', log)
+        self.assertIn('Loaded file cannot be copied', log)
+        self.assertTrue(log.endswith('Record after copying\n'))
+
+    def test_sessions_are_appended(self):
+        for session in range(2):
+            tested_logger = LoggerImpl(self.net_file)
+            tested_logger.write_generic_record('Record {number}\n'.format(number=session))
+            tested_logger.close()
+
+        log = self.read_log(tested_logger)
+        self.assertEqual(2, log.count('Session from'))
+        self.assertLess(log.index('Record 0'), log.index('Record 1'))
+
+    def test_failed_writing_does_not_hang(self):
+        reported_errors = []
+        default_excepthook = threading.excepthook
+        threading.excepthook = lambda arguments: reported_errors.append(arguments.exc_type)
+        try:
+            tested_logger = LoggerImpl(self.net_file)
+            tested_logger.flush()
+            tested_logger._file.close()
+            tested_logger.write_generic_record('Lost record\n')
+            start = time.monotonic()
+            tested_logger.flush()
+            tested_logger.write_generic_record('Lost record\n')
+            tested_logger.flush()
+            self.assertLess(time.monotonic() - start, 5 * LoggerImpl.FLUSH_INTERVAL)
+            tested_logger._writing_thread.join()
+            tested_logger.write_generic_record('Lost record\n')
+            self.assertEqual(0, tested_logger._records.qsize())
+            tested_logger.close()
+        finally:
+            threading.excepthook = default_excepthook
+        self.assertEqual([ValueError], reported_errors)
+
+        tested_logger.create_log_file(self.net_file)
+        tested_logger.write_generic_record('Record after failure\n')
+        tested_logger.close()
+        log = self.read_log(tested_logger)
+        self.assertTrue(log.endswith('Record after failure\n'))
+        self.assertNotIn('Lost record', log)
+
+
+if __name__ == '__main__':
+    unittest.main()
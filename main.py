@@ -1,5 +1,7 @@
 
+import os
 import sys
+import multiprocessing
 
 from main_window import *
 from solver import *
@@ -19,27 +21,41 @@ class AppSupervisor(QObject):
         self._solver = solver
         self._active_net = None
         self._logger: LoggerImpl | None = None
+        self._is_saved = True
 
     # TODO: Ensure, that it's not needed to resolve the net manually when saving is called
     @pyqtSlot()
     def receiveSaveAsAction(self):
         file_url_tuple = QFileDialog.getSaveFileUrl(self._main_window,
                                                     caption='Save Electric Net',
-                                                    filter='Electric Net (*{extension})'.format(extension=EXTENSION))
+                                                    filter='Electric Net (*{extension});;Binary Electric Net (*{binary})'
+                                                    .format(extension=EXTENSION, binary=BINARY_EXTENSION))
         if file_url_tuple[0].isEmpty():
             return False
         file_path: str = file_url_tuple[0].toString().removeprefix('file:///')
-        if not file_path.endswith(EXTENSION):
+        if not file_path.endswith(EXTENSION) and not file_path.endswith(BINARY_EXTENSION):
             file_path += EXTENSION
 
         if self._logger.log_file is None:
             self._logger.create_log_file(file_path)
 
+        self._ui.graphview.expand_all_inputs()
+        self._solver.finish_solving()
+        self._is_saved = True
         self.needToSaveActiveNet.emit(self._ui.graphview, file_path)
-        return True
+        return self._is_saved
 
     needToSaveActiveNet = pyqtSignal('PyQt_PyObject', str, name='needToSaveActiveNet')
 
+    # Saving is finished, when the signal to save returns, so the result is known by the emitting method
+    @pyqtSlot(bool)
+    def receiveSavingResult(self, is_saved: bool):
+        self._is_saved = is_saved
+
+    @pyqtSlot(str)
+    def receiveSavingError(self, error: str):
+        QMessageBox.critical(self._main_window, 'Saving failed', 'The net cannot be saved: {error}'.format(error=error))
+
     def handleChangingNet(self):
         pressed_button = QMessageBox.question(self._main_window,
                                               'The net was probably changed', 'Do you want to save changes in the net?')
@@ -60,7 +76,7 @@ class AppSupervisor(QObject):
         self._solver.set_net(self._ui.graphview.electric_net)
         self._active_net = self._ui.graphview.electric_net
 
-        self._logger = LoggerImpl()
+        self._replaceLogger(LoggerImpl())
         self._ui.graphview.init_view(self._logger)
         self._ui.graphview._addInput()
 
@@ -75,14 +91,23 @@ class AppSupervisor(QObject):
             self._ui.graphview.reset()
 
         file_url_tuple = QFileDialog.getOpenFileUrl(self._main_window,
-                                                    caption="Open Electric Net", filter="Electric Net (*.ens)")
+                                                    caption="Open Electric Net",
+                                                    filter="Electric Net (*.ens *.ensb)")
         if file_url_tuple[0].toString() == '':
             return
 
         file_path = file_url_tuple[0].toString().removeprefix('file:///')
         file_loader = FileLoader()
 
-        reading_result = file_loader.load_net_from_file(file_path)
+        if os.path.getsize(file_path) >= LAZY_OPENING_FILE_SIZE and not BinaryNetFormat.is_binary_file(file_path):
+            loading = BackgroundFileOperation(lambda progress_callback: file_loader.open_net_lazily(file_path))
+        else:
+            loading = BackgroundFileOperation(lambda progress_callback:
+                                              file_loader.load_net_from_file(file_path, progress_callback))
+        reading_result = loading.execute('Loading {file}'.format(file=os.path.basename(file_path)),
+                                         self._main_window)
+        if loading.is_cancelled:
+            return
         if reading_result is None:
             message_box_title = 'Bad .ens file'
             message_box_text = 'The pts application cannot parse the file you have specified'
@@ -93,13 +118,51 @@ class AppSupervisor(QObject):
         self._solver.set_net(net)
         self._active_net = net
 
-        self._logger = LoggerImpl(file_path)
+        self._replaceLogger(LoggerImpl(file_path))
         self._ui.graphview.init_view(self._logger)
-        self._ui.graphview.set_net(net, first_hrids)
-        self._logger.log_loading(file_path)
+        if not self._placeNet(net, first_hrids):
+            self._ui.graphview.reset()
+            self._solver.set_net(None)
+            self._active_net = None
+            self._ui.actionSaveAs.setEnabled(False)
+            return
+        self._logger.log_loading(file_path, file_loader.loading_info)
 
         self._ui.actionSaveAs.setEnabled(True)
 
+    # Queued records of the log are written, before the application quits
+    @pyqtSlot()
+    def shutdown(self):
+        if self._logger is not None:
+            self._logger.close()
+
+
+    # Private part
+    def _replaceLogger(self, logger: LoggerImpl):
+        if self._logger is not None:
+            self._logger.close()
+        self._logger = logger
+
+    # The scene is populated by chunks with processing of events between them, so the window stays responsive.
+    # Input is blocked meanwhile, only the progress dialog gets it.
+    def _placeNet(self, net: ElectricNet, last_hrids: LastHrids) -> bool:
+        nodes_number = net.forest.calc_size()
+        progress_dialog = QProgressDialog('Placing the net', 'Cancel', 0, nodes_number, self._main_window)
+        progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        progress_dialog.setMinimumDuration(PROGRESS_DIALOG_DELAY)
+        input_blocker = InputBlocker(progress_dialog)
+        input_blocker.start()
+        try:
+            for placed_nodes_number in self._ui.graphview.place_net_by_chunks(net, last_hrids):
+                progress_dialog.setValue(min(placed_nodes_number, nodes_number))
+                QApplication.processEvents()
+                if progress_dialog.wasCanceled():
+                    return False
+        finally:
+            input_blocker.stop()
+        progress_dialog.close()
+        return True
+
 
 class MainWindow(QMainWindow):
     def __init__(self, ui: Ui_MainWindow):
@@ -177,14 +240,20 @@ def main():
 
     net_view = ui.graphview
     solver = Solver()
+    solver.start_background_solving()
     net_view.contentChanged.connect(solver.recalculateChanges)
-    solver.loadCalculated.connect(net_view.updateLoads)
+    net_view.nodeContentChanged.connect(solver.recalculateNodeChanges)
+    solver.loadsChanged.connect(net_view.updateLoads)
+    app.aboutToQuit.connect(solver.shutdown)
 
     supervisor = AppSupervisor(window, ui, solver)
     window.set_supervisor(supervisor)
+    app.aboutToQuit.connect(supervisor.shutdown)
     file_saver = FileSaver()
     ui.actionSaveAs.triggered.connect(supervisor.receiveSaveAsAction)
     supervisor.needToSaveActiveNet.connect(file_saver.saveNetToFile)
+    file_saver.savingFinished.connect(supervisor.receiveSavingResult)
+    file_saver.savingFailed.connect(supervisor.receiveSavingError)
 
     ui.actionCreateNew.triggered.connect(supervisor.receiveCreateNewAction)
     ui.actionLoadFrom.triggered.connect(supervisor.receiveLoadFromAction)
@@ -195,4 +264,5 @@ def main():
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,413 @@
+from __future__ import annotations
+import os
+import mmap
+import time
+import hashlib
+import stat
+import tempfile
+from typing import Callable, Iterator
+from binary_net_format import *
+
+
+EXTENSION = '.ens'
+
+
+# Raised by progress callbacks to abort loading or saving, it's passed through by the loader
+class FileOperationCancelled(Exception): pass
+
+
+# Nets are written without the view, HRIDs are taken by the caller
+class NetFileWriter:
+    # The whole content is built in memory and written to a temporary file, that replaces the target one at once,
+    # so the previous file stays untouched if saving fails. HRIDs are given in pre-order of the net nodes.
+    @staticmethod
+    def write_net(path: str, net: ElectricNet, last_hrids: LastHrids, hrids: list[str],
+                  progress_callback: Callable[[int], None] | None = None):
+        if path.endswith(BINARY_EXTENSION):
+            NetFileWriter.replace_file(path, BinaryNetFormat.pack(net, last_hrids, hrids, progress_callback))
+        else:
+            records = NetFileWriter.build_records(net, last_hrids, hrids, progress_callback)
+            NetFileWriter.replace_file(path, ''.join(records))
+
+    @staticmethod
+    def build_records(net: ElectricNet, last_hrids: LastHrids, hrids: list[str],
+                      progress_callback: Callable[[int], None] | None = None) -> list[str]:
+        records = ['\n']
+        records.append('Last Power Input HRID: {hrid}\n'.format(hrid=last_hrids.power_inputs))
+        records.append('Last Converter HRID: {hrid}\n'.format(hrid=last_hrids.converters))
+        records.append('Last Consumer HRID: {hrid}\n'.format(hrid=last_hrids.consumers))
+        records.append('\n\n\n')
+
+        nodes_number = max(net.forest.calc_size(), 1)
+        levels = {}
+        for index, node in enumerate(net.forest):
+            if progress_callback is not None and index % PROGRESS_REPORTING_STEP == 0:
+                progress_callback(index * 100 // nodes_number)
+            level = levels[id(node.parent)] + 1 if node.parent is not None else 1
+            levels[id(node)] = level
+            records.append('Level {level} {type} {hrid} {name}:\n{params}\n\n'
+                           .format(level=level, type=NetFileWriter.extract_node_type(node), hrid=hrids[index],
+                                   name=node.content.name, params=NetFileWriter._extract_node_params(node)))
+        records.append('\n')
+        return records
+
+    # The temporary file is created in the directory of the target one, so it's replaced by renaming
+    @staticmethod
+    def replace_file(path: str, content: str | bytes):
+        file_descriptor, temp_path = tempfile.mkstemp(suffix=EXTENSION, dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            os.chmod(temp_path, NetFileWriter._get_file_mode(path))
+            with os.fdopen(file_descriptor, 'wb' if type(content) is bytes else 'w') as file:
+                file.write(content)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    # Temporary files are created only accessible by the owner, the saved file gets usual permissions instead
+    @staticmethod
+    def _get_file_mode(path: str) -> int:
+        if os.path.exists(path):
+            return stat.S_IMODE(os.stat(path).st_mode)
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+    # Names of node types as they are written in records of the text format
+    @staticmethod
+    def extract_node_type(node: Forest.ForestNode) -> str:
+        node_type: ElectricNodeType = node.content.type
+        if node_type == ElectricNodeType.INPUT:
+            return 'Power_Input'
+        elif node_type == ElectricNodeType.CONVERTER:
+            converter_type: ConverterType = node.content.converter_type
+            if converter_type == ConverterType.LINEAR:
+                return 'Linear_Converter'
+            else:
+                return 'Switching_Converter'
+        else:
+            consumer_type: ConverterType = node.content.consumer_type
+            if consumer_type == ConsumerType.CONSTANT_CURRENT:
+                return 'Constant_Current_Consumer'
+            else:
+                return 'Resistive_Consumer'
+
+    @staticmethod
+    def _extract_node_params(node: Forest.ForestNode) -> str:
+        node_data: ElectricNode = node.content
+        params_str = '    Value: {value}{unit}'.format(value=node_data.value,
+                                                       unit=NetFileWriter._extract_node_value_unit(node))
+        if node_data.type != ElectricNodeType.LOAD:
+            params_str += '\n    Load: {load}A'.format(load=node_data.load)
+
+        return params_str
+
+    @staticmethod
+    def _extract_node_value_unit(node: Forest.ForestNode) -> str:
+        node_data: ElectricNode = node.content
+        if node_data.type != ElectricNodeType.LOAD:
+            return 'V'
+        else:
+            consumer_type = node_data.consumer_type
+            if consumer_type == ConsumerType.CONSTANT_CURRENT:
+                return 'A'
+            else:
+                return 'Ohm'
+
+
+class FileLoader:
+    class IncorrectNodeLevel(Exception): pass
+    class InvalidRecord(Exception): pass
+
+    # Names of loaded nodes are shared by default, a net with the table doesn't differ for the rest of the app
+    def __init__(self, is_sharing_names=True):
+        self._file = None
+        self._net: ElectricNet | None = None
+        self._is_sharing_names = is_sharing_names
+        self._hrids: list[str] = []
+        self._loading_info: LoadingInfo | None = None
+
+    # The file is parsed in one pass while it's being read, nodes are built as their records arrive, and the hash
+    # of the content is calculated on the way. Files in the binary format are recognized by their content.
+    # The progress callback gets percents of the read file, cancelling of a background operation is passed through.
+    def load_net_from_file(self, path: str, progress_callback: Callable[[int], None] | None = None) \
+            -> tuple[ElectricNet, LastHrids] | None:
+        self._hrids = []
+        self._loading_info = None
+        if BinaryNetFormat.is_binary_file(path):
+            return self._load_net_from_binary_file(path, progress_callback)
+
+        start_time = time.perf_counter()
+        content_hash = hashlib.sha256()
+        with open(path, 'rb') as self._file:
+            file_lines = FileLoader._read_file_lines(self._file, os.path.getsize(path), progress_callback,
+                                                     content_hash)
+            try:
+                self._net = ElectricNet(StringTable() if self._is_sharing_names else None)
+                last_hrids = self._extract_last_hrids_from_file(file_lines)
+                self._build_net_by_file(file_lines)
+            except FileOperationCancelled:
+                raise
+            except Exception as exception:
+                return None
+            finally:
+                self._file = None
+
+        self._loading_info = self._build_loading_info(path, content_hash.hexdigest(), start_time)
+        return self._net, last_hrids
+
+    # Only power inputs are built at opening, records of their sinks are parsed from the memory-mapped file when
+    # they are materialized. The file is scanned for the records of inputs without reading the rest of it, so
+    # the hash of the content is not calculated.
+    def open_net_lazily(self, path: str) -> tuple[LazyElectricNet, LastHrids] | None:
+        self._hrids = []
+        self._loading_info = None
+        start_time = time.perf_counter()
+        with open(path, 'rb') as file:
+            try:
+                mapped_file = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return None
+
+        try:
+            self._net = LazyElectricNet(mapped_file, self, StringTable() if self._is_sharing_names else None)
+            last_hrids = self._extract_last_hrids_from_file(self._net.read_lines(0, len(mapped_file)))
+
+            input_starts = []
+            input_start = mapped_file.find(FileLoader._INPUT_RECORD_START)
+            while input_start != -1:
+                input_starts.append(input_start + 1)
+                input_start = mapped_file.find(FileLoader._INPUT_RECORD_START, input_start + 1)
+
+            for index, input_start in enumerate(input_starts):
+                input_end = input_starts[index+1] if index + 1 < len(input_starts) else len(mapped_file)
+                sinks_start = mapped_file.find(FileLoader._RECORD_START, input_start, input_end)
+                sinks_start = input_end if sinks_start == -1 else sinks_start + 1
+                self._build_net_by_file(self._net.read_lines(input_start, sinks_start))
+                self._net.add_subtree_bounds(self._net.forest.roots[-1], sinks_start, input_end)
+            if self._net.is_fully_materialized():
+                self._net.close()
+        except Exception as exception:
+            mapped_file.close()
+            return None
+
+        self._loading_info = self._build_loading_info(path, None, start_time)
+        return self._net, last_hrids
+
+    def build_subtree(self, net: ElectricNet, power_input: Forest.ForestNode, file_lines: Iterator[str]):
+        self._net = net
+        self._build_net_by_file(file_lines, [power_input])
+
+    # HRIDs of the nodes of the last loaded net in pre-order
+    @property
+    def hrids(self):
+        return self._hrids
+
+    # Summary of the last loaded file, the numbers of nodes of a lazily opened net are the numbers of opened ones
+    @property
+    def loading_info(self) -> LoadingInfo | None:
+        return self._loading_info
+
+    _RECORD_START = b'\nLevel '
+    _INPUT_RECORD_START = b'\nLevel 1 '
+
+    def _load_net_from_binary_file(self, path: str, progress_callback: Callable[[int], None] | None = None) \
+            -> tuple[ElectricNet, LastHrids] | None:
+        start_time = time.perf_counter()
+        try:
+            self._net = ElectricNet(StringTable() if self._is_sharing_names else None)
+            mapped_file = BinaryNetFormat.map_file(path)
+            net, last_hrids, self._hrids = BinaryNetFormat.unpack(mapped_file, self._net, progress_callback)
+        except FileOperationCancelled:
+            raise
+        except Exception as exception:
+            return None
+        self._loading_info = self._build_loading_info(path, hashlib.sha256(mapped_file).hexdigest(), start_time)
+        return self._net, last_hrids
+
+    def _build_loading_info(self, path: str, content_hash: str | None, start_time: float) -> LoadingInfo:
+        nodes_numbers = {node_type: 0 for node_type in ElectricNodeType}
+        for node in self._net.forest:
+            nodes_numbers[node.content.type] += 1
+        return LoadingInfo(path=path, size=os.path.getsize(path), content_hash=content_hash,
+                           power_inputs=nodes_numbers[ElectricNodeType.INPUT],
+                           converters=nodes_numbers[ElectricNodeType.CONVERTER],
+                           consumers=nodes_numbers[ElectricNodeType.LOAD],
+                           parse_time=time.perf_counter() - start_time)
+
+    # Lines are read from the file opened in the binary mode, the hash gets them before decoding
+    @staticmethod
+    def _read_file_lines(file, file_size=0, progress_callback: Callable[[int], None] | None = None,
+                         content_hash=None) -> Iterator[str]:
+        read_size = 0
+        for index, line in enumerate(file):
+            if progress_callback is not None and index % PROGRESS_REPORTING_STEP == 0:
+                progress_callback(min(read_size * 100 // max(file_size, 1), 100))
+            read_size += len(line)
+            if content_hash is not None:
+                content_hash.update(line)
+            line = line.decode('utf-8').rstrip('\r\n')
+            if not len(line) == 0:
+                yield line
+
+    @staticmethod
+    def _extract_last_hrids_from_file(file_lines: Iterator[str]) -> LastHrids:
+        last_hrids = LastHrids(power_inputs=next(file_lines).split()[-1],
+                               converters=next(file_lines).split()[-1],
+                               consumers=next(file_lines).split()[-1])
+        return last_hrids
+
+    def _build_net_by_file(self, file_lines: Iterator[str], cur_path: list[Forest.ForestNode] | None = None):
+        if cur_path is None:
+            cur_path = []
+        for line in file_lines:
+            # if len(line.split()) == 0:
+            #     continue
+
+            tokens = line.split()
+            leading_token = tokens[0]
+            if leading_token == 'Level':
+                level = int(tokens[1])
+                self._hrids.append(tokens[3] if len(tokens) > 3 else '')
+                if level == 1:
+                    node = self._net.create_input()
+                    node.content.name = self._net.share_name(FileLoader._build_name_by_line_tokens(tokens))
+                    cur_path = [node]
+                elif level < len(cur_path):
+                    del cur_path[level:]
+                    parent = cur_path[-2]
+                    node = self._build_node_by_record(parent, tokens)
+                    cur_path[-1] = node
+                elif level == len(cur_path):
+                    parent = cur_path[-2]
+                    node = self._build_node_by_record(parent, tokens)
+                    cur_path[-1] = node
+                elif level == len(cur_path)+1:
+                    parent = cur_path[-1]
+                    node = self._build_node_by_record(parent, tokens)
+                    cur_path.append(node)
+                else:
+                    raise FileLoader.IncorrectNodeLevel
+            elif leading_token == 'Value:':
+                if cur_path[-1].content.type == ElectricNodeType.LOAD:
+                    if cur_path[-1].content.consumer_type == ConsumerType.RESISTIVE:
+                        value = tokens[1][:-3]
+                    else:
+                        value = tokens[1][:-1]
+                else:
+                    value = tokens[1][:-1]
+                cur_path[-1].content.value = float(value)
+            elif leading_token == 'Load:':
+                if cur_path[-1].content.type == ElectricNodeType.LOAD:
+                    raise FileLoader.InvalidRecord
+                load = tokens[1][:-1]
+                cur_path[-1].content.load = float(load)
+
+    @staticmethod
+    def _build_name_by_line_tokens(tokens: list[str]):
+        if len(tokens) < 5:
+            raise FileLoader.InvalidRecord
+
+        name = ' '.join(tokens[4:])
+        name = name[:-1]
+        return name
+
+    def _build_node_by_record(self, parent: Forest.ForestNode, tokens: list[str]) -> Forest.ForestNode:
+        type_token = tokens[2]
+        if type_token == 'Power_input':
+            raise FileLoader.IncorrectNodeLevel
+
+        elif type_token == 'Switching_Converter':
+            node = self._net.add_converter(parent)
+            node.content.converter_type = ConverterType.SWITCHING
+            node.content.name = self._net.share_name(FileLoader._build_name_by_line_tokens(tokens))
+            return node
+        elif type_token == 'Linear_Converter':
+            node = self._net.add_converter(parent)
+            node.content.converter_type = ConverterType.LINEAR
+            node.content.name = self._net.share_name(FileLoader._build_name_by_line_tokens(tokens))
+            return node
+        elif type_token == 'Constant_Current_Consumer':
+            node = self._net.add_load(parent)
+            node.content.consumer_type = ConsumerType.CONSTANT_CURRENT
+            node.content.name = self._net.share_name(FileLoader._build_name_by_line_tokens(tokens))
+            return node
+        elif type_token == 'Resistive_Consumer':
+            node = self._net.add_load(parent)
+            node.content.consumer_type = ConsumerType.RESISTIVE
+            node.content.name = self._net.share_name(FileLoader._build_name_by_line_tokens(tokens))
+            return node
+        else:
+            raise FileLoader.InvalidRecord
+
+
+# Sinks of power inputs are kept in the memory-mapped file until they are materialized, then the file is released
+class LazyElectricNet(ElectricNet):
+    def __init__(self, mapped_file: mmap.mmap, loader: FileLoader, name_table: StringTable | None = None):
+        super().__init__(name_table)
+        self._mapped_file = mapped_file
+        self._loader = loader
+        self._subtree_bounds: dict[int, tuple[Forest.ForestNode, int, int]] = {}
+
+    def add_subtree_bounds(self, power_input: Forest.ForestNode, start: int, end: int):
+        if start < end:
+            self._subtree_bounds[id(power_input)] = (power_input, start, end)
+
+    def is_materialized(self, power_input: Forest.ForestNode) -> bool:
+        bounds = self._subtree_bounds.get(id(power_input))
+        return bounds is None or bounds[0] is not power_input
+
+    def materialize(self, power_input: Forest.ForestNode):
+        if self.is_materialized(power_input):
+            return
+
+        node, start, end = self._subtree_bounds.pop(id(power_input))
+        try:
+            self._loader.build_subtree(self, power_input, self.read_lines(start, end))
+        finally:
+            if self.is_fully_materialized():
+                self.close()
+
+    def materialize_all(self):
+        for power_input in self.get_inputs():
+            self.materialize(power_input)
+
+    def discard_input(self, power_input: Forest.ForestNode):
+        if self.is_materialized(power_input):
+            return
+
+        del self._subtree_bounds[id(power_input)]
+        if self.is_fully_materialized():
+            self.close()
+
+    def is_fully_materialized(self) -> bool:
+        return len(self._subtree_bounds) == 0
+
+    def close(self):
+        self._subtree_bounds = {}
+        self._mapped_file.close()
+
+    def read_lines(self, start: int, end: int) -> Iterator[str]:
+        position = start
+        while position < end:
+            line_end = self._mapped_file.find(b'\n', position, end)
+            if line_end == -1:
+                line_end = end
+            line = self._mapped_file[position:line_end].decode('utf-8').rstrip('\r')
+            position = line_end + 1
+            if not len(line) == 0:
+                yield line
+
+
+# Nets are converted between the text and the binary formats without losses, the formats are chosen by extensions
+def convert_net_file(source_path: str, target_path: str) -> bool:
+    file_loader = FileLoader()
+    loading_result = file_loader.load_net_from_file(source_path)
+    if loading_result is None:
+        return False
+
+    net, last_hrids = loading_result
+    NetFileWriter.write_net(target_path, net, last_hrids, file_loader.hrids)
+    return True
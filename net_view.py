@@ -1,6 +1,6 @@
 
 from __future__ import annotations
-from typing import Optional
+import time
 
 from settings import *
 
@@ -40,23 +40,60 @@ class NetView(GraphView):
         self._cur_new_converter_number = 1
         self._cur_new_consumer_number = 1
 
-        self._nodes = 0
-        self._lines = 0
+        self._last_validation_time = 0.0
+
+        self._loads_generation = 0
+        self._collapsed_inputs: dict[int, GraphNode] = {}
+
+        self._is_virtualized = False
+        self._bound_nodes: dict[int, GraphNode] = {}
+        self._widgets_by_nodes: dict[int, ElectricNodeWidget] = {}
+        self._widget_pools: dict[ElectricNodeType, list[QGraphicsProxyWidget]] = {}
+        self._visibility_timer = QTimer(self)
+        self._visibility_timer.setSingleShot(True)
+        self._visibility_timer.setInterval(0)
+        self._visibility_timer.timeout.connect(self._updateVisibleWidgets)
 
 
     def init_net(self):
         self._electric_net = ElectricNet()
+        self._electric_net.forest.set_ancestry_indexing(True)
 
         self._cur_new_power_input_number = 1
         self._cur_new_converter_number = 1
         self._cur_new_consumer_number = 1
 
     def set_net(self, net: ElectricNet, last_hrids: LastHrids):
+        for placed_nodes_number in self.place_net_by_chunks(net, last_hrids):
+            pass
+
+    # Nodes are placed by chunks, the number of placed nodes is yielded after every chunk, so the caller can
+    # process events between them. Signals of the view are blocked only while a chunk is being placed.
+    # The whole net is placed in bulk, so the positions are calculated once and no placed node is moved.
+    # Big nets are virtualized, their nodes get widgets only when they are scrolled into the viewport.
+    def place_net_by_chunks(self, net: ElectricNet, last_hrids: LastHrids, chunk_size=SCENE_CHUNK_SIZE) \
+            -> Iterator[int]:
         self._electric_net = net
-        self.blockSignals(True)
-        for power_input in self._electric_net.get_inputs():
-            self._placeSubtree(power_input)
-        self.blockSignals(False)
+        self._electric_net.forest.set_ancestry_indexing(True)
+        self._update_virtualization()
+        placed_nodes_number = 0
+        placed_nodes = (node for power_input in self._electric_net.get_inputs()
+                        for node in self._placeSubtreeNodes(power_input))
+        is_placed = False
+        self.start_bulk_placing()
+        while not is_placed:
+            self.blockSignals(True)
+            try:
+                for chunk_index in range(chunk_size):
+                    if next(placed_nodes, None) is None:
+                        is_placed = True
+                        break
+                    placed_nodes_number += 1
+            finally:
+                self.blockSignals(False)
+            yield placed_nodes_number
+        self.finish_bulk_placing()
+        self._scheduleVisibilityUpdate()
 
         self._cur_new_power_input_number = int(last_hrids.power_inputs)
         self._cur_new_converter_number = int(last_hrids.converters)
@@ -75,35 +112,39 @@ class NetView(GraphView):
         self._parent_to_be_deleted: GraphNode | None = None
         self._parent_to_be_deleted_forest_node: Forest.ForestNode | None = None
 
-        self._nodes = 0
-        self._lines = 0
+        self._last_validation_time = 0.0
+        self._collapsed_inputs = {}
+        self._is_virtualized = False
+        self._bound_nodes = {}
+        self._widgets_by_nodes = {}
 
         self.validityStatusChanged.emit(True)
 
     contentChanged = pyqtSignal(name='contentChanged')
+    nodeContentChanged = pyqtSignal('PyQt_PyObject', name='nodeContentChanged')
     validityStatusChanged = pyqtSignal(bool, name='becomeInvalid')
 
     @pyqtSlot('PyQt_PyObject')
     def nodeSelected(self, selected_node: GraphNode):
+        # The net forest is not modified while a new parent is being selected, so its ancestry index is built once
         def is_reconnection_correct(new_parent: Node):
             result = True
             if new_parent.content.type == ElectricNodeType.LOAD:
                 result = False
-            elif self._parent_to_be_deleted_forest_node.is_ancestor(new_parent):
+            elif new_parent is not self._parent_to_be_deleted_forest_node and \
+                    self._electric_net.forest.is_successor_of(new_parent, self._parent_to_be_deleted_forest_node):
                 result = False
             return result
 
+        selected_forest_node = NetView._get_electric_node(selected_node)
+        if selected_forest_node is not None:
+            self.expandInput(selected_forest_node)
+
         if self._is_waiting_for_node_selection:
             if self._parent_to_be_deleted is None:
                 raise NetView.NotSpecifiedParentForDeletion
-
-            selected_forest_node = None
-            for child_item in selected_node.childItems():
-                if isinstance(child_item, QGraphicsProxyWidget):
-                    widget = child_item.widget()
-                    if not isinstance(widget, ElectricNodeWidget):
-                        raise NetView.InvalidNodeWidget
-                    selected_forest_node = widget.electric_node
+            if selected_forest_node is None:
+                raise NetView.InvalidNodeWidget
 
             if not is_reconnection_correct(selected_forest_node):
                 message_box_title = 'Incorrect choice of new parent'
@@ -121,18 +162,10 @@ class NetView(GraphView):
             self.delete_parent(self._parent_to_be_deleted, selected_node)
             self._electric_net.forest.move_subtree(self._parent_to_be_deleted_forest_node, selected_forest_node)
             self._electric_net.forest.cut_node(self._parent_to_be_deleted_forest_node)
+            self._releaseRemovedWidgets()
 
-            deleted_node_hrid = ''
-            for item in self._parent_to_be_deleted.childItems():
-                if isinstance(item, QGraphicsProxyWidget):
-                    deleted_widget = item.widget()
-                    deleted_node_hrid = deleted_widget.hrid
-
-            selected_node_hrid = ''
-            for item in selected_forest_node.content.childItems():
-                if isinstance(item, QGraphicsProxyWidget):
-                    selected_widget = item.widget()
-                    selected_node_hrid = selected_widget.hrid
+            deleted_node_hrid = NetView._get_hrid(self._parent_to_be_deleted)
+            selected_node_hrid = NetView._get_hrid(selected_node)
 
             self._log('Delete Ancestor Reconnecting', deleted_node_hrid, selected_node_hrid)
 
@@ -142,6 +175,37 @@ class NetView(GraphView):
 
             self.contentChanged.emit()
 
+    # Sinks of an input of a lazily opened net are materialized and placed, when the input is selected or changed
+    @pyqtSlot('PyQt_PyObject')
+    def expandInput(self, power_input: Forest.ForestNode):
+        graph_node = self._collapsed_inputs.pop(id(power_input), None)
+        if graph_node is None:
+            return
+
+        try:
+            self._electric_net.materialize(power_input)
+        except Exception as exception:
+            message_box_title = 'Bad .ens file'
+            message_box_text = 'The pts application cannot parse sinks of the input'
+            QMessageBox.critical(self, message_box_title, message_box_text)
+
+        graph_node.setToolTip('')
+        self._update_virtualization()
+        were_signals_blocked = self.blockSignals(True)
+        for sink in ElectricNet.get_sinks(power_input):
+            self._placeSubtree(sink, graph_node)
+        self.blockSignals(were_signals_blocked)
+        self._scheduleVisibilityUpdate()
+        self.contentChanged.emit()
+
+    def expand_all_inputs(self):
+        for power_input in self._electric_net.get_inputs():
+            self.expandInput(power_input)
+
+    # HRIDs of the placed nodes in pre-order
+    def get_hrids(self) -> list[str]:
+        return [NetView._get_hrid(graph_forest_node.content) for graph_forest_node in self._graph_forest]
+
     def get_actual_last_hrids(self) -> LastHrids:
         last_hrids = LastHrids(power_inputs=self._cur_new_power_input_number,
                                converters=self._cur_new_converter_number,
@@ -152,200 +216,125 @@ class NetView(GraphView):
     def electric_net(self):
         return self._electric_net
 
+    @property
+    def is_virtualized(self):
+        return self._is_virtualized
+
+    def reset(self):
+        super().reset()
+        self._bound_nodes = {}
+        self._widgets_by_nodes = {}
+
+    def scrollContentsBy(self, dx: int, dy: int):
+        super().scrollContentsBy(dx, dy)
+        self._scheduleVisibilityUpdate()
+
+    def resizeEvent(self, event: QResizeEvent):
+        super().resizeEvent(event)
+        self._scheduleVisibilityUpdate()
+
     # Private part
+    # Nodes are placed in the same depth-first order as they were added, parents are placed before their sinks
     def _placeSubtree(self, subroot: Forest.ForestNode, parent_graph_node: GraphNode | None = None):
-        subroot_data: ElectricNode = subroot.content
-        if subroot_data.type == ElectricNodeType.INPUT:
-            graph_node = self.placeInput(subroot)
-        elif subroot_data.type == ElectricNodeType.CONVERTER:
-            graph_node = self.placeConverter(subroot, parent_graph_node)
-        else:
-            graph_node = self.placeLoad(subroot, parent_graph_node)
-
-        for child_item in graph_node.childItems():
-            if isinstance(child_item, QGraphicsProxyWidget):
-                widget = child_item.widget()
-                if widget.ui.nameLineEdit.text != '':
-                    name = subroot.content.name
-                else:
-                    if isinstance(widget, SourceWidget):
-                        name = 'Input ' + str(self._cur_new_power_input_number)
-                        self._cur_new_power_input_number += 1
-                    elif isinstance(widget, ConverterWidget):
-                        name = 'Converter ' + str(self._cur_new_converter_number)
-                        self._cur_new_converter_number += 1
-                    else:
-                        name = 'Consumer ' + str(self._cur_new_consumer_number)
-                        self._cur_new_consumer_number += 1
-                widget.ui.nameLineEdit.setText(name)
-
-                widget.ui.valueLineEdit.setText(str(subroot.content.value))
-                if not isinstance(widget, LoadWidget):
-                    widget.ui.loadValueLabel.setText(str(subroot.content.load))
-                    if isinstance(widget, ConverterWidget):
-                        if subroot.content.converter_type == ConverterType.SWITCHING:
-                            widget.ui.switchingRadioButton.setChecked(True)
-                        else:
-                            widget.ui.linearRadioButton.setChecked(True)
-                else:
-                    if subroot.content.consumer_type == ConsumerType.CONSTANT_CURRENT:
-                        widget.ui.currentRadioButton.setChecked(True)
-                    else:
-                        widget.ui.resistiveRadioButton.setChecked(True)
+        for graph_node in self._placeSubtreeNodes(subroot, parent_graph_node):
+            pass
+
+    def _placeSubtreeNodes(self, subroot: Forest.ForestNode, parent_graph_node: GraphNode | None = None) \
+            -> Iterator[GraphNode]:
+        nodes = [(subroot, parent_graph_node)]
+        while len(nodes) > 0:
+            subroot, parent_graph_node = nodes.pop()
+            subroot_data: ElectricNode = subroot.content
+            if subroot_data.type == ElectricNodeType.INPUT:
+                graph_node = self.placeInput(subroot)
+            elif subroot_data.type == ElectricNodeType.CONVERTER:
+                graph_node = self.placeConverter(subroot, parent_graph_node)
+            else:
+                graph_node = self.placeLoad(subroot, parent_graph_node)
 
-        # TODO: Neet to eliminate term 'input'
-        for sink in ElectricNet.get_sinks(subroot):
-            self._placeSubtree(sink, graph_node)
+            widget = NetView._get_widget(graph_node)
+            if widget is not None:
+                self._fillWidget(widget, subroot)
 
-    def placeInput(self, node: Forest.ForestNode) -> GraphNode:
-        widget, ui_form = self._prepare_source_widget()
-        side_widgets = NetView._prepareSourceSideWidgets()
-        power_input = self.add_root(widget, side_widgets)
-        widget.electric_node = node
+            if not self._electric_net.is_materialized(subroot):
+                self._collapsed_inputs[id(subroot)] = graph_node
+                graph_node.setToolTip('Click to load the sinks')
 
-        power_input.clicked.connect(self.nodeSelected)
-        power_input.sideWidgetClicked.connect(widget.receiveNodeSideWidgetClick)
-        widget.deleted.connect(self._deleteNode)
-        widget.converterAdded.connect(self._addConverter)
-        widget.loadAdded.connect(self._addLoad)
-        ui_form.valueLineEdit.textChanged.connect(widget.changeValue)
-        ui_form.valueLineEdit.textChanged.connect(self.contentChanged)
-        ui_form.nameLineEdit.textChanged.connect(widget.changeName)
-        ui_form.nameLineEdit.textChanged.connect(self.contentChanged)
+            # TODO: Neet to eliminate term 'input'
+            for sink in reversed(ElectricNet.get_sinks(subroot)):
+                nodes.append((sink, graph_node))
+            yield graph_node
 
+    # Placed nodes get widgets at once, unless the view is virtualized
+    def placeInput(self, node: Forest.ForestNode) -> GraphNode:
+        power_input = self.add_root(None, NetView._prepareSourceSideWidgets())
+        self._initGraphNode(power_input, node,
+                            SourceWidget.HRID_FORMAT.format(number=self._cur_new_power_input_number))
         return power_input
 
     def placeConverter(self, node: Forest.ForestNode, source: GraphNode) -> GraphNode:
-        widget, ui_form = self._prepare_converter_widget()
-        side_widgets = NetView._prepareSourceSideWidgets()
-        converter = self.add_child(source, widget, side_widgets)
-        widget.electric_node = node
-
-        converter.clicked.connect(self.nodeSelected)
-        converter.sideWidgetClicked.connect(widget.receiveNodeSideWidgetClick)
-        widget.deleted.connect(self._deleteNode)
-        widget.converterAdded.connect(self._addConverter)
-        widget.loadAdded.connect(self._addLoad)
-        ui_form.valueLineEdit.textChanged.connect(widget.changeValue)
-        ui_form.valueLineEdit.textChanged.connect(self.contentChanged)
-        ui_form.nameLineEdit.textChanged.connect(widget.changeName)
-        ui_form.nameLineEdit.textChanged.connect(self.contentChanged)
-        ui_form.linearRadioButton.toggled.connect(widget.changeType)
-        ui_form.linearRadioButton.toggled.connect(self.contentChanged)
-
+        converter = self.add_child(source, None, NetView._prepareSourceSideWidgets())
+        self._initGraphNode(converter, node,
+                            ConverterWidget.HRID_FORMAT.format(number=self._cur_new_converter_number))
         return converter
 
     def placeLoad(self, node: Forest.ForestNode, source: GraphNode) -> GraphNode:
-        widget, ui_form = self._prepare_load_widget()
-        side_widgets = NetView._prepareConsumerSideWidgets()
-        load = self.add_child(source, widget, side_widgets)
-        widget.electric_node = node
-
-        load.clicked.connect(self.nodeSelected)
-        load.sideWidgetClicked.connect(widget.receiveNodeSideWidgetClick)
-        widget.deleted.connect(self._deleteNode)
-        ui_form.valueLineEdit.textChanged.connect(widget.changeValue)
-        ui_form.valueLineEdit.textChanged.connect(self.contentChanged)
-        ui_form.nameLineEdit.textChanged.connect(widget.changeName)
-        ui_form.nameLineEdit.textChanged.connect(self.contentChanged)
-        ui_form.currentRadioButton.toggled.connect(widget.changeType)
-        ui_form.currentRadioButton.toggled.connect(self.contentChanged)
-
+        load = self.add_child(source, None, NetView._prepareConsumerSideWidgets())
+        self._initGraphNode(load, node, LoadWidget.HRID_FORMAT.format(number=self._cur_new_consumer_number))
         return load
 
     @pyqtSlot()
     def _addInput(self):
-        widget, ui_form = self._prepare_source_widget()
-        side_widgets = NetView._prepareSourceSideWidgets()
-        power_input = self.add_root(widget, side_widgets)
         new_input = self._electric_net.create_input()
-        widget.electric_node = new_input
-
-        power_input.clicked.connect(self.nodeSelected)
-        power_input.sideWidgetClicked.connect(widget.receiveNodeSideWidgetClick)
-        widget.deleted.connect(self._deleteNode)
-        widget.converterAdded.connect(self._addConverter)
-        widget.loadAdded.connect(self._addLoad)
-        ui_form.valueLineEdit.textChanged.connect(widget.changeValue)
-        ui_form.valueLineEdit.textChanged.connect(self.contentChanged)
-        ui_form.nameLineEdit.textChanged.connect(widget.changeName)
-        ui_form.nameLineEdit.textChanged.connect(self.contentChanged)
+        power_input = self.placeInput(new_input)
+        widget = self._bindWidget(power_input)
 
         name = 'Input ' + str(self._cur_new_power_input_number)
-        ui_form.nameLineEdit.setText(name)
+        widget.ui.nameLineEdit.setText(name)
         self._cur_new_power_input_number += 1
 
         self._log('Add Power Input', widget.hrid)
+        self._scheduleVisibilityUpdate()
 
         # TODO: Do using decorators
         self.contentChanged.emit()
 
+    # Sinks of a collapsed input must be placed before a new one is added
     @pyqtSlot('PyQt_PyObject', 'PyQt_PyObject')
     def _addConverter(self, source: GraphNode, parent: Forest.ForestNode):
-        widget, ui_form = self._prepare_converter_widget()
-        side_widgets = NetView._prepareSourceSideWidgets()
-        converter = self.add_child(source, widget, side_widgets)
+        self.expandInput(parent)
         new_converter = self._electric_net.add_converter(parent)
-        widget.electric_node = new_converter
-
-        converter.clicked.connect(self.nodeSelected)
-        converter.sideWidgetClicked.connect(widget.receiveNodeSideWidgetClick)
-        widget.deleted.connect(self._deleteNode)
-        widget.converterAdded.connect(self._addConverter)
-        widget.loadAdded.connect(self._addLoad)
-        ui_form.valueLineEdit.textChanged.connect(widget.changeValue)
-        ui_form.valueLineEdit.textChanged.connect(self.contentChanged)
-        ui_form.nameLineEdit.textChanged.connect(widget.changeName)
-        ui_form.nameLineEdit.textChanged.connect(self.contentChanged)
-        ui_form.linearRadioButton.toggled.connect(widget.changeType)
-        ui_form.linearRadioButton.toggled.connect(self.contentChanged)
+        converter = self.placeConverter(new_converter, source)
+        widget = self._bindWidget(converter)
 
         name = 'Converter ' + str(self._cur_new_converter_number)
-        ui_form.nameLineEdit.setText(name)
+        widget.ui.nameLineEdit.setText(name)
         self._cur_new_converter_number += 1
 
-        source_hrid = ''
-        for item in source.childItems():
-            if isinstance(item, QGraphicsProxyWidget):
-                source_widget = item.widget()
-                source_hrid = source_widget.hrid
-        self._log('Add Converter', widget.hrid, source_hrid)
+        self._log('Add Converter', widget.hrid, NetView._get_hrid(source))
+        self._scheduleVisibilityUpdate()
 
         self.contentChanged.emit()
 
     @pyqtSlot('PyQt_PyObject', 'PyQt_PyObject')
     def _addLoad(self, source: GraphNode, parent: Forest.ForestNode):
-        widget, ui_form = self._prepare_load_widget()
-        side_widgets = NetView._prepareConsumerSideWidgets()
-        consumer = self.add_child(source, widget, side_widgets)
+        self.expandInput(parent)
         new_load = self._electric_net.add_load(parent)
-        widget.electric_node = new_load
-
-        consumer.clicked.connect(self.nodeSelected)
-        consumer.sideWidgetClicked.connect(widget.receiveNodeSideWidgetClick)
-        widget.deleted.connect(self._deleteNode)
-        ui_form.valueLineEdit.textChanged.connect(widget.changeValue)
-        ui_form.valueLineEdit.textChanged.connect(self.contentChanged)
-        ui_form.nameLineEdit.textChanged.connect(widget.changeName)
-        ui_form.nameLineEdit.textChanged.connect(self.contentChanged)
-        ui_form.currentRadioButton.toggled.connect(widget.changeType)
-        ui_form.currentRadioButton.toggled.connect(self.contentChanged)
+        consumer = self.placeLoad(new_load, source)
+        widget = self._bindWidget(consumer)
 
         name = 'Consumer ' + str(self._cur_new_consumer_number)
-        ui_form.nameLineEdit.setText(name)
+        widget.ui.nameLineEdit.setText(name)
         self._cur_new_consumer_number += 1
 
-        source_hrid = ''
-        for item in source.childItems():
-            if isinstance(item, QGraphicsProxyWidget):
-                source_widget = item.widget()
-                source_hrid = source_widget.hrid
-        self._log('Add Consumer', widget.hrid, source_hrid)
+        self._log('Add Consumer', widget.hrid, NetView._get_hrid(source))
+        self._scheduleVisibilityUpdate()
 
         self.contentChanged.emit()
 
     @pyqtSlot('PyQt_PyObject', 'PyQt_PyObject')
     def _deleteNode(self, graph_node: GraphNode, forest_node: Forest.ForestNode):
+        self.expandInput(forest_node)
         if forest_node.is_leaf():
             self.delete_leaf(graph_node)
             self._electric_net.forest.delete_leaf(forest_node)
@@ -358,6 +347,8 @@ class NetView(GraphView):
                 if button == QMessageBox.StandardButton.Yes:
                     self.delete_parent(graph_node)
                     self._electric_net.forest.delete_subtree(forest_node)
+                    self._electric_net.discard_input(forest_node)
+                    self._releaseRemovedWidgets()
                 return
 
             mode_selection_message_box = QMessageBox(QMessageBox.Icon.Question,
@@ -414,28 +405,195 @@ class NetView(GraphView):
                 # else:
                 #     return
 
-        node_hrid = ''
-        for item in graph_node.childItems():
-            if isinstance(item, QGraphicsProxyWidget):
-                node_widget = item.widget()
-                node_hrid = node_widget.hrid
-        self._log(log_action_str, node_hrid)
+        if forest_node.get_forest_ref() is None:
+            self._electric_net.discard_input(forest_node)
+        self._releaseRemovedWidgets()
+        self._log(log_action_str, NetView._get_hrid(graph_node))
+        self._scheduleVisibilityUpdate()
 
         self.contentChanged.emit()
 
-    # TODO: Very ugly
+    # Loads of a generation older than the shown one are outdated. Only labels of the changed nodes with widgets
+    # are updated, summaries of the others are painted from the net.
+    @pyqtSlot(int, 'PyQt_PyObject')
+    def updateLoads(self, generation: int, changed_nodes: list[Forest.ForestNode]):
+        if generation < self._loads_generation:
+            return
+        self._loads_generation = generation
+
+        for node in changed_nodes:
+            widget = self._widgets_by_nodes.get(id(node))
+            if isinstance(widget, SourceWidget) or isinstance(widget, ConverterWidget):
+                widget_node_data: ElectricNode = node.content
+                widget.ui.loadValueLabel.setText(str(widget_node_data.load))
+        if self._is_virtualized and len(changed_nodes) > 0:
+            self.viewport().update()
+
+    # Nodes are identified by their graph nodes, so they are known without widgets
+    @staticmethod
+    def _get_electric_node(graph_node: GraphNode) -> Forest.ForestNode | None:
+        return graph_node.data(NetView._ELECTRIC_NODE_DATA_KEY)
+
+    @staticmethod
+    def _get_hrid(graph_node: GraphNode) -> str:
+        hrid = graph_node.data(NetView._HRID_DATA_KEY)
+        return hrid if hrid is not None else ''
+
+    def _initGraphNode(self, graph_node: GraphNode, node: Forest.ForestNode, hrid: str):
+        graph_node.setData(NetView._ELECTRIC_NODE_DATA_KEY, node)
+        graph_node.setData(NetView._HRID_DATA_KEY, hrid)
+        graph_node.setSummaryProvider(NetView._summarizeNode)
+        graph_node.clicked.connect(self.nodeSelected)
+        if not self._is_virtualized:
+            self._bindWidget(graph_node)
+
+    @staticmethod
+    def _summarizeNode(graph_node: GraphNode) -> list[str]:
+        node_data: ElectricNode = NetView._get_electric_node(graph_node).content
+        summary = [str(node_data.name), 'Value: ' + str(node_data.value)]
+        if node_data.type != ElectricNodeType.LOAD:
+            summary.append('Load: ' + str(node_data.load))
+        return summary
+
+    def _update_virtualization(self):
+        if self._electric_net.forest.calc_size() >= VIRTUALIZATION_NODES_NUMBER:
+            self._is_virtualized = True
+
+    # Widgets are taken from the pool of the node type or created with all connections once. A reused widget is
+    # filled with the node data with blocked signals, so the net is not changed, as well as a new one if needed.
+    def _bindWidget(self, graph_node: GraphNode, is_filling_needed=False) -> ElectricNodeWidget:
+        widget = NetView._get_widget(graph_node)
+        if widget is not None:
+            return widget
+
+        node = NetView._get_electric_node(graph_node)
+        pool = self._widget_pools.setdefault(node.content.type, [])
+        if len(pool) > 0:
+            proxy_widget = pool.pop()
+            is_filling_needed = True
+        else:
+            proxy_widget = self._createProxyWidget(node.content.type)
+        widget = proxy_widget.widget()
+        widget.electric_node = node
+        widget.hrid = NetView._get_hrid(graph_node)
+        if is_filling_needed:
+            blocked_widgets = [widget] + widget.findChildren(QWidget)
+            for blocked_widget in blocked_widgets:
+                blocked_widget.blockSignals(True)
+            self._fillWidget(widget, node)
+            for blocked_widget in blocked_widgets:
+                blocked_widget.blockSignals(False)
+
+        graph_node.sideWidgetClicked.connect(widget.receiveNodeSideWidgetClick)
+        graph_node.setProxyWidget(proxy_widget)
+        self._bound_nodes[id(graph_node)] = graph_node
+        self._widgets_by_nodes[id(node)] = widget
+        return widget
+
+    def _unbindWidget(self, graph_node: GraphNode):
+        self._bound_nodes.pop(id(graph_node), None)
+        proxy_widget = graph_node.setProxyWidget(None)
+        if proxy_widget is None:
+            return
+
+        widget: ElectricNodeWidget = proxy_widget.widget()
+        graph_node.sideWidgetClicked.disconnect(widget.receiveNodeSideWidgetClick)
+        self._widgets_by_nodes.pop(id(widget.electric_node), None)
+        pool = self._widget_pools.setdefault(widget.electric_node.content.type, [])
+        widget.electric_node = None
+        widget.hrid = None
+        if len(pool) < WIDGET_POOL_SIZE:
+            pool.append(proxy_widget)
+        else:
+            proxy_widget.deleteLater()
+
+    def _createProxyWidget(self, node_type: ElectricNodeType) -> QGraphicsProxyWidget:
+        if node_type == ElectricNodeType.INPUT:
+            widget, ui_form = self._prepare_source_widget()
+        elif node_type == ElectricNodeType.CONVERTER:
+            widget, ui_form = self._prepare_converter_widget()
+            ui_form.linearRadioButton.toggled.connect(widget.changeType)
+        else:
+            widget, ui_form = self._prepare_load_widget()
+            ui_form.currentRadioButton.toggled.connect(widget.changeType)
+
+        widget.deleted.connect(self._deleteNode)
+        if node_type != ElectricNodeType.LOAD:
+            widget.converterAdded.connect(self._addConverter)
+            widget.loadAdded.connect(self._addLoad)
+        ui_form.valueLineEdit.textChanged.connect(widget.changeValue)
+        ui_form.nameLineEdit.textChanged.connect(widget.changeName)
+        widget.changed.connect(self._receiveNodeChange)
+
+        proxy_widget = QGraphicsProxyWidget()
+        proxy_widget.setWidget(widget)
+        return proxy_widget
+
+    def _fillWidget(self, widget: ElectricNodeWidget, node: Forest.ForestNode):
+        if widget.ui.nameLineEdit.text != '':
+            name = node.content.name
+        else:
+            if isinstance(widget, SourceWidget):
+                name = 'Input ' + str(self._cur_new_power_input_number)
+                self._cur_new_power_input_number += 1
+            elif isinstance(widget, ConverterWidget):
+                name = 'Converter ' + str(self._cur_new_converter_number)
+                self._cur_new_converter_number += 1
+            else:
+                name = 'Consumer ' + str(self._cur_new_consumer_number)
+                self._cur_new_consumer_number += 1
+        widget.ui.nameLineEdit.setText(name)
+
+        widget.ui.valueLineEdit.setText(str(node.content.value))
+        if not isinstance(widget, LoadWidget):
+            widget.ui.loadValueLabel.setText(str(node.content.load))
+            if isinstance(widget, ConverterWidget):
+                if node.content.converter_type == ConverterType.SWITCHING:
+                    widget.ui.switchingRadioButton.setChecked(True)
+                else:
+                    widget.ui.linearRadioButton.setChecked(True)
+        else:
+            if node.content.consumer_type == ConsumerType.CONSTANT_CURRENT:
+                widget.ui.currentRadioButton.setChecked(True)
+            else:
+                widget.ui.resistiveRadioButton.setChecked(True)
+
+    # Sinks of a collapsed input must be placed before the input is changed
+    @pyqtSlot('PyQt_PyObject')
+    def _receiveNodeChange(self, node: Forest.ForestNode):
+        self.expandInput(node)
+        self.nodeContentChanged.emit(node)
+
+    def _scheduleVisibilityUpdate(self):
+        if self._is_virtualized:
+            self._visibility_timer.start()
+
+    # Nodes in the viewport get widgets, widgets of the other nodes are returned to the pools, except the focused one
     @pyqtSlot()
-    def updateLoads(self):
-        items = self._scene.items()
-        for item in items:
-            if isinstance(item, GraphNode):
-                child_items = item.childItems()
-                for child_item in child_items:
-                    if isinstance(child_item, QGraphicsProxyWidget):
-                        widget = child_item.widget()
-                        if isinstance(widget, SourceWidget) or isinstance(widget, ConverterWidget):
-                            widget_node_data: ElectricNode = widget.electric_node.content
-                            widget.ui.loadValueLabel.setText(str(widget_node_data.load))
+    def _updateVisibleWidgets(self):
+        if not self._is_virtualized:
+            return
+
+        visible_rect = self.mapToScene(self.viewport().rect()).boundingRect()
+        visible_nodes = {id(item): item for item in self._scene.items(visible_rect) if isinstance(item, GraphNode)}
+        focus_item = self._scene.focusItem()
+        for graph_node in list(self._bound_nodes.values()):
+            if id(graph_node) in visible_nodes:
+                continue
+            if graph_node.scene() is not None and focus_item is not None and graph_node.isAncestorOf(focus_item):
+                continue
+            self._unbindWidget(graph_node)
+        for graph_node in visible_nodes.values():
+            self._bindWidget(graph_node, is_filling_needed=True)
+
+    # Widgets of the nodes removed from the scene are returned to the pools
+    def _releaseRemovedWidgets(self):
+        removed_nodes = [graph_node for graph_node in self._bound_nodes.values() if graph_node.scene() is None]
+        for graph_node in removed_nodes:
+            self._unbindWidget(graph_node)
+
+    _ELECTRIC_NODE_DATA_KEY = 1
+    _HRID_DATA_KEY = 2
 
     _SIDE_WIDGET_KEYS = {
         "Delete": 0,
@@ -445,7 +603,7 @@ class NetView(GraphView):
 
     def _prepare_source_widget(self) -> tuple[SourceWidget, Ui_SourceWidget]:
         input_ui = Ui_SourceWidget()
-        widget = SourceWidget(input_ui, self._cur_new_power_input_number)
+        widget = SourceWidget(input_ui)
         palette = QPalette(GraphNode.FILLING_COLOR)
         widget.setPalette(palette)
         input_ui.setupUi(widget)
@@ -479,7 +637,7 @@ class NetView(GraphView):
 
     def _prepare_converter_widget(self) -> tuple[ConverterWidget, Ui_ConverterWidget]:
         converter_ui = Ui_ConverterWidget()
-        widget = ConverterWidget(converter_ui, self._cur_new_converter_number)
+        widget = ConverterWidget(converter_ui)
         palette = QPalette(GraphNode.FILLING_COLOR)
         widget.setPalette(palette)
         converter_ui.setupUi(widget)
@@ -496,7 +654,7 @@ class NetView(GraphView):
 
     def _prepare_load_widget(self) -> tuple[LoadWidget, Ui_LoadWidget]:
         load_ui = Ui_LoadWidget()
-        widget = LoadWidget(load_ui, self._cur_new_consumer_number)
+        widget = LoadWidget(load_ui)
         palette = QPalette(GraphNode.FILLING_COLOR)
         widget.setPalette(palette)
         load_ui.setupUi(widget)
@@ -523,256 +681,110 @@ class NetView(GraphView):
                 self._is_valid = False
                 self.validityStatusChanged.emit(False)
 
-    def _validate(self):
+    # Positions of nodes and lines are compared with the layout of the graph forest, and the graph forest with the
+    # electric one, in one pass in pre-order. Views of big nets are validated not more often than once per interval.
+    def _validate(self, is_forced=False):
         try:
-            self._nodes = 0
-            self._lines = 0
-
-            initial_search_position = QPointF(GraphView.HORIZONTAL_INDENT, GraphView.VERTICAL_INDENT)
-            graphic_roots = self._collect_graphic_roots(initial_search_position)
-            if graphic_roots is None:
-                return False
-            total_width = self._check_siblings(graphic_roots, self._graph_forest.roots, initial_search_position)
-            if total_width is None:
-                return False
-
-            nodes_amount = len(self._get_all_items_of_type(GraphNode))
-            if nodes_amount != self._nodes:
+            if not is_forced and not self._is_validation_due():
+                return True
+            self._last_validation_time = time.monotonic()
+
+            layout = GraphView._create_layout()
+            layout.calc(self._graph_forest)
+            graph_forest_nodes = list(self._graph_forest)
+            electric_nodes = list(self._electric_net.forest)
+            if len(graph_forest_nodes) != len(electric_nodes):
                 return False
 
-            lines_amount = len(self._get_all_items_of_type(QGraphicsLineItem))
-            if lines_amount != self._lines:
+            electric_nodes_by_graph_nodes: dict[int, Forest.ForestNode] = {}
+            lines_number = 0
+            for graph_forest_node, electric_node in zip(graph_forest_nodes, electric_nodes):
+                electric_nodes_by_graph_nodes[id(graph_forest_node)] = electric_node
+                if not self._check_node(graph_forest_node, electric_node, electric_nodes_by_graph_nodes, layout):
+                    return False
+                if graph_forest_node.is_parent():
+                    lines_number += len(graph_forest_node.successors) + 2
+
+            nodes_on_scene_number = 0
+            lines_on_scene_number = 0
+            for item in self._scene.items():
+                if isinstance(item, GraphNode):
+                    nodes_on_scene_number += 1
+                elif isinstance(item, QGraphicsLineItem):
+                    lines_on_scene_number += 1
+            if nodes_on_scene_number != len(graph_forest_nodes) or lines_on_scene_number != lines_number:
                 return False
 
-            # is_scene_size_correct = self._check_scene_size()
-            # if not is_scene_size_correct:
-            #     return False
-
-            are_forests_coherent = self._check_forests_coherency()
-            if not are_forests_coherent:
-                return False
-
-            # is_graphic_forest_valid = self._forest.is_forest_valid()
-            # if not is_graphic_forest_valid:
-            #     return False
-            # is_electric_forest_valid = self._electric_net._forest.is_forest_valid()
-            # if not is_electric_forest_valid:
-            #     return False
-
         except Exception as exception:
             error_message = str(type(exception)) + ': ' + str(exception)
             return error_message
 
         return True
 
-    def _collect_graphic_roots(self, initial_search_position: QPointF) -> Optional[list[GraphNode]]:
-        def is_search_position_out_of_scene(net_view: NetView, position: QPointF):
-            scene_rect = net_view._scene.sceneRect()
-            scene_bottom_bound = scene_rect.bottom()
-            result = position.y() >= scene_bottom_bound
-            return result
-
-        roots = []
-        search_position = initial_search_position
-        while not is_search_position_out_of_scene(self, search_position):
-            node = self._get_single_item_at_point_by_type(search_position, GraphNode)
-            if isinstance(node, GraphNode):
-                roots.append(node)
-            search_position = QPointF(search_position.x(), search_position.y()+GraphView.VERTICAL_STEP)
-        return roots
-
-    def _check_siblings(self, graphic_siblings: list[GraphNode], forest_siblings: list[Forest.ForestNode],
-                        initial_search_position: QPointF):
-        total_width = 0
-        search_position = initial_search_position
-        for index in range(len(graphic_siblings)):
-            graphic_sibling: GraphNode = self._get_single_item_at_point_by_type(search_position, GraphNode)
-            if graphic_sibling is None:
-                return None
-            if id(graphic_sibling) != id(graphic_siblings[index]):
-                return None
-
-            forest_sibling = forest_siblings[index]
-            width = self._check_subtree(graphic_sibling, forest_sibling)
-            if width is None:
-                return None
-            search_position = QPointF(search_position.x(), search_position.y() + (width+1) * GraphView.VERTICAL_STEP)
-            total_width += width
-            index += 1
-
-        total_width += len(graphic_siblings) - 1
-        return total_width
-
-    def _check_subtree(self, graphic_subroot: GraphNode, forest_subroot: Forest.ForestNode) -> Optional[int]:
-        total_width = 0
-        self._nodes += 1
-
-        are_roots_coherent = self._check_nodes_coherency(graphic_subroot, forest_subroot)
-        if not are_roots_coherent:
-            return None
-
-        subroot_parent_port = graphic_subroot.parentPort
-        if subroot_parent_port:
-            subroot_in_parent_line = subroot_parent_port. \
-                multiline._children_ports[subroot_parent_port.port_number-1].node
-            if id(graphic_subroot) != id(subroot_in_parent_line):
-                return None
-
-            parent_branch_point = subroot_parent_port.multiline._parent.calcBranchPointForParent()
-            child_line = subroot_parent_port.multiline._children_ports[subroot_parent_port.port_number - 1].line
-            child_line_end = graphic_subroot.calcConnectionPointForChild()
-            child_line_start = QPointF(parent_branch_point.x(), child_line_end.y())
-            child_conn_point = graphic_subroot.calcConnectionPointForChild()
-            child_line_search_point = QPointF(child_conn_point.x() - GraphNode.OUTLINE_THICKNESS, child_conn_point.y())
-
-            if not self._check_line(child_line, child_line_start, child_line_end, child_line_search_point):
-                return None
-
-        subroot_children_line = graphic_subroot.childrenLine
-        if subroot_children_line:
-            if len(subroot_children_line._children_ports) != len(forest_subroot.successors):
-                return None
-
-            parent_line = subroot_children_line._parent_line
-            parent_line_start = graphic_subroot.calcConnectionPointForParent()
-            parent_line_end = graphic_subroot.calcBranchPointForParent()
-            subroot_parent_conn_point = graphic_subroot.calcConnectionPointForParent()
-            parent_line_search_point = QPointF(subroot_parent_conn_point.x() + GraphNode.OUTLINE_THICKNESS,
-                                               subroot_parent_conn_point.y())
-
-            if not self._check_line(parent_line, parent_line_start, parent_line_end, parent_line_search_point):
-                return None
-
-            graphic_children = []
-            for port in subroot_children_line._children_ports:
-                graphic_children.append(port.node)
-            initial_search_position = QPointF(subroot_parent_conn_point.x() + GraphView.HORIZONTAL_GAP,
-                                              subroot_parent_conn_point.y() - GraphNode.HEIGHT / 2)
-            total_width = self._check_siblings(graphic_children, forest_subroot.successors, initial_search_position)
-            if total_width is None:
-                return None
-
-            branch_line = subroot_children_line._branch_line
-            branch_line_start = parent_line_end
-            last_child_conn_point = graphic_children[-1].calcConnectionPointForChild()
-            branch_line_end_x = last_child_conn_point.x() - GraphView.HORIZONTAL_GAP + ConnectionMultiline.BRANCH_INDENT
-            branch_line_end = QPointF(branch_line_end_x, last_child_conn_point.y())
-
-            # TODO: There are two cases. It needs to rework multiline code to there will be only the second case
-            if len(graphic_children) == 1:
-                if not self._check_line_placement(branch_line, branch_line_start, branch_line_end):
-                    return None
-                self._lines += 1
-            else:
-                branch_line_search_point = QPointF(branch_line_end_x,
-                                                   last_child_conn_point.y() - GraphNode.OUTLINE_THICKNESS)
-                if not self._check_line(branch_line, branch_line_start, branch_line_end, branch_line_search_point):
-                    return None
-
-        return total_width
+    def _is_validation_due(self):
+        if self._graph_forest.calc_size() < VALIDATION_RATE_LIMIT_NODES_NUMBER:
+            return True
+        return time.monotonic() - self._last_validation_time >= VALIDATION_INTERVAL
 
-    def _check_nodes_coherency(self, graphic_node: GraphNode, forest_node: Forest.ForestNode):
-        if id(graphic_node.data(GraphView._FOREST_NODE_DATA_KEY)) != id(forest_node):
+    # Parents of the nodes are checked before, so only links to them are checked
+    def _check_node(self, graph_forest_node: Forest.ForestNode, electric_node: Forest.ForestNode,
+                    electric_nodes_by_graph_nodes: dict[int, Forest.ForestNode], layout: ForestLayout):
+        graph_node: GraphNode = graph_forest_node.content
+        if graph_node.data(GraphView._FOREST_NODE_DATA_KEY) is not graph_forest_node:
             return False
-        if id(forest_node.content) != id(graphic_node):
+        if NetView._get_electric_node(graph_node) is not electric_node or graph_node.scene() is not self._scene:
             return False
-
-        if forest_node.is_successor():
-            graphic_parent = graphic_node.parentPort.multiline._parent
-            forest_parent = forest_node.parent
-            if not self._check_nodes_coherency(graphic_parent, forest_parent):
-                return False
-
-        return True
-
-    def _get_all_items_of_type(self, item_type):
-        items = []
-        scene_items = self._scene.items()
-        for item in scene_items:
-            if isinstance(item, item_type):
-                items.append(item)
-        return items
-
-    def _check_scene_size(self):
-        forest_width = self._graph_forest.calc_width()
-        forest_depth = self._graph_forest.calc_depth()
-        proper_scene_right_x = GraphView.HORIZONTAL_INDENT + (forest_depth + 1) * GraphView.HORIZONTAL_STEP
-        proper_scene_bottom_y = GraphView.VERTICAL_INDENT + (forest_width + 1) * GraphView.VERTICAL_STEP
-        scene_rect = self._scene.sceneRect()
-
-        if not self._are_coordinates_equal(proper_scene_right_x, scene_rect.right()):
+        if len(graph_forest_node.successors) != len(electric_node.successors):
             return False
-        if not self._are_coordinates_equal(proper_scene_bottom_y, scene_rect.bottom()):
-            return False
-        return True
 
-    def _check_forests_coherency(self):
-        graphic_forest = self._graph_forest
-        electric_forest = self._electric_net.forest
-        if len(graphic_forest.roots) != len(electric_forest.roots):
-            return False
-
-        for index in range(len(graphic_forest.roots)):
-            if not self._check_subtrees_coherency(graphic_forest.roots[index], electric_forest.roots[index]):
+        if graph_forest_node.is_successor():
+            if electric_nodes_by_graph_nodes[id(graph_forest_node.parent)] is not electric_node.parent:
                 return False
-        return True
-
-    def _check_subtrees_coherency(self, graphic_subroot: Forest.ForestNode, electric_subroot: Forest.ForestNode):
-        graphic_subroot_graph_node = graphic_subroot.content
-        subroot_widget = self._get_widget(graphic_subroot_graph_node)
-        electric_subroot_candidate = subroot_widget.electric_node
+            parent_port = graph_node.parentPort
+            if parent_port is None or parent_port.multiline._parent is not graph_forest_node.parent.content:
+                return False
+            if parent_port.port_number != graph_forest_node.index_by_parent() + 1:
+                return False
+        elif graph_node.parentPort is not None:
+            return False
 
-        if id(electric_subroot) != id(electric_subroot_candidate):
+        position = layout.get_position(graph_forest_node)
+        if not NetView._are_coordinates_equal(graph_node.pos().x(), position.x):
             return False
-        if len(graphic_subroot.successors) != len(electric_subroot.successors):
+        if not NetView._are_coordinates_equal(graph_node.pos().y(), position.y):
             return False
-        for index in range(len(graphic_subroot.successors)):
-            if not self._check_subtrees_coherency(graphic_subroot.successors[index],
-                                                  electric_subroot.successors[index]):
-                return False
-        return True
 
-    @staticmethod
-    def _get_widget(node: GraphNode) -> ElectricNodeWidget | None:
-        child_items = node.childItems()
-        for item in child_items:
-            if isinstance(item, QGraphicsProxyWidget):
-                return item.widget()
-        return None
-
-    def _get_single_item_at_point_by_type(self, point: QPointF, desired_type):
-        items = self._scene.items(point)
-        if len(items) != 1:
-            return None
-        if not isinstance(items[0], desired_type):
-            return None
-        return items[0]
-
-    def _check_line(self, line: QGraphicsLineItem, proper_start: QPointF, proper_end: QPointF, search_point: QPointF):
-        if not NetView._check_line_placement(line, proper_start, proper_end):
+        children_line = graph_node.childrenLine
+        connection_lines = layout.get_connection_lines(graph_forest_node)
+        if connection_lines is None:
+            return children_line is None
+        if children_line is None or len(children_line._children_ports) != len(graph_forest_node.successors):
             return False
-        line_candidate = self._get_single_item_at_point_by_type(search_point, QGraphicsLineItem)
-        if line_candidate is None:
+        if not NetView._check_line_placement(children_line._parent_line, connection_lines.parent_line):
             return False
-        if id(line) != id(line_candidate):
+        if not NetView._check_line_placement(children_line._branch_line, connection_lines.branch_line):
             return False
-
-        self._lines += 1
+        for port, successor, child_line in zip(children_line._children_ports, graph_forest_node.successors,
+                                               connection_lines.child_lines):
+            if port.node is not successor.content:
+                return False
+            if not NetView._check_line_placement(port.line, child_line):
+                return False
         return True
 
     @staticmethod
-    def _check_line_placement(line: QGraphicsLineItem, proper_start: QPointF, proper_end: QPointF):
+    def _check_line_placement(line: QGraphicsLineItem, proper_segment: Segment):
         qlinef = line.line()
         qlinef_p1 = line.mapToScene(qlinef.p1())
         qlinef_p2 = line.mapToScene(qlinef.p2())
 
-        if not NetView._are_coordinates_equal(qlinef_p1.x(), proper_start.x()):
+        if not NetView._are_coordinates_equal(qlinef_p1.x(), proper_segment.start.x):
             return False
-        if not NetView._are_coordinates_equal(qlinef_p1.y(), proper_start.y()):
+        if not NetView._are_coordinates_equal(qlinef_p1.y(), proper_segment.start.y):
             return False
-        if not NetView._are_coordinates_equal(qlinef_p2.x(), proper_end.x()):
+        if not NetView._are_coordinates_equal(qlinef_p2.x(), proper_segment.end.x):
             return False
-        if not NetView._are_coordinates_equal(qlinef_p2.y(), proper_end.y()):
+        if not NetView._are_coordinates_equal(qlinef_p2.y(), proper_segment.end.y):
             return False
         return True
 
@@ -783,6 +795,13 @@ class NetView(GraphView):
             return False
         return True
 
+    @staticmethod
+    def _get_widget(node: GraphNode) -> ElectricNodeWidget | None:
+        proxy_widget = node.proxyWidget()
+        if proxy_widget is None:
+            return None
+        return proxy_widget.widget()
+
 
 class ElectricNodeWidget(QWidget):
     def __init__(self):
@@ -790,6 +809,8 @@ class ElectricNodeWidget(QWidget):
         self._electric_node = None
         self._hrid = None
 
+    changed = pyqtSignal('PyQt_PyObject', name='changed')
+
     @property
     def electric_node(self) -> Forest.ForestNode:
         return self._electric_node
@@ -800,13 +821,17 @@ class ElectricNodeWidget(QWidget):
     @property
     def hrid(self):
         return self._hrid
+    @hrid.setter
+    def hrid(self, value: str):
+        self._hrid = value
 
 
 class SourceWidget(ElectricNodeWidget):
-    def __init__(self, ui_form: Ui_SourceWidget, hrid_number):
+    HRID_FORMAT = 'PWIN-{number}'
+
+    def __init__(self, ui_form: Ui_SourceWidget):
         super().__init__()
         self.ui = ui_form
-        self._hrid = 'PWIN-{number}'.format(number=hrid_number)
 
     converterAdded = pyqtSignal('PyQt_PyObject', 'PyQt_PyObject', name='converterAdded')
     loadAdded = pyqtSignal('PyQt_PyObject', 'PyQt_PyObject', name='loadAdded')
@@ -819,6 +844,7 @@ class SourceWidget(ElectricNodeWidget):
         else:
             new_value = None
         self._electric_node.content.name = new_value
+        self.changed.emit(self._electric_node)
 
     @pyqtSlot(str)
     def changeValue(self, text: str):
@@ -830,6 +856,7 @@ class SourceWidget(ElectricNodeWidget):
         else:
             new_value = 0
         self._electric_node.content.value = new_value
+        self.changed.emit(self._electric_node)
 
     @pyqtSlot('PyQt_PyObject', int)
     def receiveNodeSideWidgetClick(self, source: QGraphicsItem, side_widget_num):
@@ -842,15 +869,16 @@ class SourceWidget(ElectricNodeWidget):
 
 
 class ConverterWidget(ElectricNodeWidget):
+    HRID_FORMAT = 'CNVR-{number}'
+
     _TYPE_BUTTON_IDS = {
         "Linear": 1,
         "Converter": 2
     }
 
-    def __init__(self, ui_form: Ui_ConverterWidget, hrid_number):
+    def __init__(self, ui_form: Ui_ConverterWidget):
         super().__init__()
         self.ui = ui_form
-        self._hrid = 'CNVR-{number}'.format(number=hrid_number)
 
     converterAdded = pyqtSignal('PyQt_PyObject', 'PyQt_PyObject', name='converterAdded')
     loadAdded = pyqtSignal('PyQt_PyObject', 'PyQt_PyObject', name='loadAdded')
@@ -863,6 +891,7 @@ class ConverterWidget(ElectricNodeWidget):
         else:
             new_value = None
         self._electric_node.content.name = new_value
+        self.changed.emit(self._electric_node)
 
     @pyqtSlot(str)
     def changeValue(self, text: str):
@@ -874,6 +903,7 @@ class ConverterWidget(ElectricNodeWidget):
         else:
             new_value = 0
         self._electric_node.content.value = new_value
+        self.changed.emit(self._electric_node)
 
     @pyqtSlot(bool)
     def changeType(self, is_linear_button_checked: bool):
@@ -881,6 +911,7 @@ class ConverterWidget(ElectricNodeWidget):
             self._electric_node.content.converter_type = ConverterType.LINEAR
         else:
             self._electric_node.content.converter_type = ConverterType.SWITCHING
+        self.changed.emit(self._electric_node)
 
     @pyqtSlot('PyQt_PyObject', int)
     def receiveNodeSideWidgetClick(self, source: QGraphicsItem, side_widget_num):
@@ -893,15 +924,16 @@ class ConverterWidget(ElectricNodeWidget):
 
 
 class LoadWidget(ElectricNodeWidget):
+    HRID_FORMAT = 'CSMR-{number}'
+
     _TYPE_BUTTON_IDS = {
         "Constant Current": 1,
         "Resistive": 2
     }
 
-    def __init__(self, ui_form: Ui_LoadWidget, hrid_number):
+    def __init__(self, ui_form: Ui_LoadWidget):
         super().__init__()
         self.ui = ui_form
-        self._hrid = 'CSMR-{number}'.format(number=hrid_number)
 
     @pyqtSlot(str)
     def changeName(self, text: str):
@@ -910,6 +942,7 @@ class LoadWidget(ElectricNodeWidget):
         else:
             new_value = None
         self._electric_node.content.name = new_value
+        self.changed.emit(self._electric_node)
 
     deleted = pyqtSignal('PyQt_PyObject', 'PyQt_PyObject', name='deleted')
 
@@ -925,6 +958,7 @@ class LoadWidget(ElectricNodeWidget):
         else:
             new_value = 0
         self._electric_node.content.value = new_value
+        self.changed.emit(self._electric_node)
 
     @pyqtSlot(bool)
     def changeType(self, is_current_button_checked: bool):
@@ -932,6 +966,7 @@ class LoadWidget(ElectricNodeWidget):
             self._electric_node.content.consumer_type = ConsumerType.CONSTANT_CURRENT
         else:
             self._electric_node.content.consumer_type = ConsumerType.RESISTIVE
+        self.changed.emit(self._electric_node)
 
     @pyqtSlot('PyQt_PyObject', int)
     def receiveNodeSideWidgetClick(self, source: QGraphicsItem, side_widget_num):
@@ -0,0 +1,81 @@
+from __future__ import annotations
+import os
+from concurrent.futures import ProcessPoolExecutor
+from array_solver import *
+
+
+def calc_packed_nets_loads(packed_nets: list[tuple]) -> list[tuple[numpy.ndarray, numpy.ndarray]]:
+    results = []
+    for packed_net in packed_nets:
+        results.append(CompiledNet.unpack(packed_net).calc_loads())
+    return results
+
+
+# Every power input tree is electrically independent, so the trees are distributed between processes of the pool.
+# Only packed arrays are sent to the processes, loads are written to the net nodes by the calling process.
+class ParallelSolver:
+    # Public interface
+    MIN_NODES_NUMBER_FOR_POOL = 20000
+
+    def __init__(self, max_workers: int | None = None, min_nodes_number=MIN_NODES_NUMBER_FOR_POOL):
+        self._electric_net = None
+        # The number of CPUs can be undetermined
+        self._max_workers = max_workers if max_workers is not None else os.cpu_count() or 1
+        self._min_nodes_number = min_nodes_number
+        self._executor: ProcessPoolExecutor | None = None
+
+    def set_net(self, net: ElectricNet):
+        self._electric_net = net
+
+    # Nodes with changed loads are returned
+    def solve(self) -> list[Forest.ForestNode]:
+        compiled_nets = []
+        for power_input in self._electric_net.get_inputs():
+            if not self._electric_net.is_materialized(power_input):
+                continue
+            compiled_nets.append(CompiledNet(self._electric_net, [power_input]))
+
+        nodes_number = sum(len(compiled_net.nodes) for compiled_net in compiled_nets)
+        changed_nodes = []
+        if len(compiled_nets) < 2 or nodes_number < self._min_nodes_number:
+            for compiled_net in compiled_nets:
+                changed_nodes.extend(compiled_net.write_loads(*compiled_net.calc_loads()))
+            return changed_nodes
+
+        parts = self._partition(compiled_nets)
+        executor = self._get_executor()
+        futures = []
+        for part in parts:
+            futures.append(executor.submit(calc_packed_nets_loads, [compiled_net.pack() for compiled_net in part]))
+
+        for part, future in zip(parts, futures):
+            for compiled_net, (loads, is_written) in zip(part, future.result()):
+                changed_nodes.extend(compiled_net.write_loads(loads, is_written))
+        return changed_nodes
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+
+    # Private part
+    # The biggest trees are distributed first, every next one goes to the least loaded part
+    def _partition(self, compiled_nets: list[CompiledNet]) -> list[list[CompiledNet]]:
+        parts_number = min(self._max_workers, len(compiled_nets))
+        parts = [[] for index in range(parts_number)]
+        part_sizes = [0] * parts_number
+        for compiled_net in sorted(compiled_nets, key=lambda net_part: len(net_part.nodes), reverse=True):
+            lightest_part = part_sizes.index(min(part_sizes))
+            parts[lightest_part].append(compiled_net)
+            part_sizes[lightest_part] += len(compiled_net.nodes)
+        return parts
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+        return self._executor
@@ -0,0 +1,111 @@
+import os
+import io
+import csv
+import sys
+import json
+import argparse
+from parallel_solver import *
+from net_file import *
+
+
+OUTPUT_FORMATS = ('ens', 'ensb', 'csv', 'json')
+# Solved nets are written with this suffix before the extension, so source nets are never overwritten
+SOLVED_FILE_SUFFIX = '.solved'
+TABLE_COLUMNS = ('index', 'parent', 'hrid', 'type', 'name', 'value', 'load')
+
+
+# Nets are solved by the array engine, its loads are the same as the ones of the recursive engine of the app.
+# Neither Qt nor the view is imported, so nets are solved in batches without the GUI.
+def solve_net(net: ElectricNet, parallel_solver: ParallelSolver | None = None):
+    solver = parallel_solver if parallel_solver is not None else ArraySolver()
+    solver.set_net(net)
+    solver.solve()
+
+
+def solve_net_file(source_path: str, target_path: str, parallel_solver: ParallelSolver | None = None) -> bool:
+    file_loader = FileLoader()
+    loading_result = file_loader.load_net_from_file(source_path)
+    if loading_result is None:
+        return False
+
+    net, last_hrids = loading_result
+    solve_net(net, parallel_solver)
+    write_solved_net(target_path, net, last_hrids, file_loader.hrids)
+    return True
+
+
+# The format is chosen by the extension: tables of nodes for CSV and JSON, the formats of the app otherwise
+def write_solved_net(path: str, net: ElectricNet, last_hrids: LastHrids, hrids: list[str]):
+    extension = os.path.splitext(path)[1]
+    if extension == '.csv':
+        content = io.StringIO(newline='')
+        writer = csv.DictWriter(content, TABLE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(build_rows(net, hrids))
+        NetFileWriter.replace_file(path, content.getvalue())
+    elif extension == '.json':
+        last_hrids = {field: int(hrid) for field, hrid in last_hrids._asdict().items()}
+        content = json.dumps({'last_hrids': last_hrids, 'nodes': build_rows(net, hrids)}, indent=1)
+        NetFileWriter.replace_file(path, content + '\n')
+    else:
+        NetFileWriter.write_net(path, net, last_hrids, hrids)
+
+
+# Rows of nodes in pre-order, parents are referenced by indices of rows, consumers have no loads
+def build_rows(net: ElectricNet, hrids: list[str]) -> list[dict]:
+    rows = []
+    node_indices = {}
+    for index, node in enumerate(net.forest):
+        node_indices[id(node)] = index
+        node_data: ElectricNode = node.content
+        rows.append({'index': index,
+                     'parent': node_indices[id(node.parent)] if node.parent is not None else None,
+                     'hrid': hrids[index],
+                     'type': NetFileWriter.extract_node_type(node),
+                     'name': node_data.name,
+                     'value': node_data.value,
+                     'load': node_data.load if node_data.type != ElectricNodeType.LOAD else None})
+    return rows
+
+
+def get_solved_file_path(source_path: str, output_format: str, output_directory: str | None = None) -> str:
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    directory = output_directory if output_directory is not None else os.path.dirname(source_path)
+    return os.path.join(directory, stem + SOLVED_FILE_SUFFIX + '.' + output_format)
+
+
+# All the nets are tried, the exit code is 1 if any of them is not solved
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='pts-solve', description='Solves nets of the power tree solver without GUI')
+    parser.add_argument('nets', nargs='+', help='.ens or .ensb files of the nets to be solved')
+    parser.add_argument('-f', '--format', choices=OUTPUT_FORMATS, default=OUTPUT_FORMATS[0],
+                        help='format of the solved nets')
+    parser.add_argument('-o', '--output-dir',
+                        help='directory for the solved nets, they are written next to the source ones by default')
+    parser.add_argument('--parallel', action='store_true',
+                        help='solve trees of power inputs in a pool of processes')
+    args = parser.parse_args(argv)
+
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+    parallel_solver = ParallelSolver() if args.parallel else None
+    failed_nets_number = 0
+    try:
+        for net_path in args.nets:
+            try:
+                is_solved = solve_net_file(net_path, get_solved_file_path(net_path, args.format, args.output_dir),
+                                           parallel_solver)
+                if not is_solved:
+                    print('pts-solve: cannot parse {path}'.format(path=net_path), file=sys.stderr)
+            except OSError as error:
+                is_solved = False
+                print('pts-solve: {error}'.format(error=error), file=sys.stderr)
+            failed_nets_number += not is_solved
+    finally:
+        if parallel_solver is not None:
+            parallel_solver.shutdown()
+    return 1 if failed_nets_number > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
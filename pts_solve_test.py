@@ -0,0 +1,78 @@
+import os
+import sys
+import csv
+import json
+import tempfile
+import unittest
+import subprocess
+from pts_solve import *
+from solver_test import build_random_net, collect_loads
+from solver import Solver
+
+
+class TestPtsSolve(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.net = build_random_net(0, 300)
+        self.hrids = [str(index) for index in range(self.net.forest.calc_size())]
+        self.path = os.path.join(self.directory.name, 'net' + EXTENSION)
+        NetFileWriter.write_net(self.path, self.net, LastHrids(3, 100, 200), self.hrids)
+
+        proper_net, proper_hrids = FileLoader().load_net_from_file(self.path)
+        proper_solver = Solver()
+        proper_solver.set_net(proper_net)
+        proper_solver.solve()
+        self.proper_loads = collect_loads(proper_net)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_no_qt_is_imported(self):
+        script = 'import sys, pts_solve; print(sorted(name for name in sys.modules if "PyQt" in name ' \
+                 'or name in ("net_view", "graph_gui_int", "solver", "file_saver")))'
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        self.assertEqual('[]', output.strip())
+
+    def test_solved_net_file(self):
+        self.assertEqual(0, main([self.path]))
+        tested_loader = FileLoader()
+        tested_net, tested_hrids = tested_loader.load_net_from_file(os.path.join(self.directory.name, 'net.solved.ens'))
+        self.assertEqual(self.proper_loads, collect_loads(tested_net))
+        self.assertEqual(self.hrids, tested_loader.hrids)
+
+    def test_solved_binary_net_file(self):
+        output_directory = os.path.join(self.directory.name, 'solved')
+        self.assertEqual(0, main([self.path, '--format', 'ensb', '--output-dir', output_directory]))
+        tested_net, tested_hrids = FileLoader().load_net_from_file(os.path.join(output_directory, 'net.solved.ensb'))
+        self.assertEqual(self.proper_loads, collect_loads(tested_net))
+
+    def test_tables(self):
+        self.assertEqual(0, main([self.path, '-f', 'json']))
+        with open(os.path.join(self.directory.name, 'net.solved.json')) as file:
+            tested_content = json.load(file)
+        self.assertEqual({'power_inputs': 3, 'converters': 100, 'consumers': 200}, tested_content['last_hrids'])
+        rows = tested_content['nodes']
+        self.assertEqual(self.proper_loads, [row['load'] for row in rows if row['load'] is not None])
+        self.assertEqual([None] * len(self.net.get_inputs()), [row['parent'] for row in rows
+                                                               if row['type'] == 'Power_Input'])
+
+        self.assertEqual(0, main([self.path, '-f', 'csv']))
+        with open(os.path.join(self.directory.name, 'net.solved.csv'), newline='') as file:
+            tested_rows = list(csv.DictReader(file))
+        self.assertEqual([str(row['hrid']) for row in rows], [row['hrid'] for row in tested_rows])
+        self.assertEqual([str(row['load']) for row in rows if row['load'] is not None],
+                         [row['load'] for row in tested_rows if row['load'] != ''])
+
+    def test_failed_nets(self):
+        broken_path = os.path.join(self.directory.name, 'broken' + EXTENSION)
+        with open(broken_path, 'w') as file:
+            file.write('\nLast Power Input HRID: 1\nLast Converter HRID: 1\nLast Consumer HRID: 1\n\n'
+                       'Level 3 Resistive_Consumer 1 Lamp:\n')
+        missing_path = os.path.join(self.directory.name, 'missing' + EXTENSION)
+        self.assertEqual(1, main([broken_path, missing_path, self.path]))
+        self.assertEqual(['broken.ens', 'net.ens', 'net.solved.ens'], sorted(os.listdir(self.directory.name)))
+
+
+if __name__ == '__main__':
+    unittest.main()
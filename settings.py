@@ -4,5 +4,23 @@ from collections import namedtuple
 
 IS_DEBUGGING = True
 EPSILON = 0.0000001
+# Text nets of this size and bigger are opened lazily: sinks of an input are loaded when the input is selected
+LAZY_OPENING_FILE_SIZE = 64 * 1024 * 1024
+# Loaded nets are placed on the scene by chunks of this number of nodes, events are processed between the chunks
+SCENE_CHUNK_SIZE = 200
+# Progress dialogs of file operations are shown only if the operation lasts longer than this number of milliseconds
+PROGRESS_DIALOG_DELAY = 500
+# Nets of this number of nodes and bigger are virtualized: widgets are shown only for nodes in the viewport,
+# other nodes are painted as summaries. Detached widgets are kept for reuse up to the pool size for every node type.
+VIRTUALIZATION_NODES_NUMBER = 500
+WIDGET_POOL_SIZE = 64
+# Views of nets of this number of nodes and bigger are validated after an action only if the last validation was
+# at least this number of seconds ago. Faults are kept in the view, so they are found by the next validation.
+VALIDATION_RATE_LIMIT_NODES_NUMBER = 5000
+VALIDATION_INTERVAL = 2.0
 
 LastHrids = namedtuple('LastHrids', 'power_inputs converters consumers')
+# Summary of a loaded net file for the log, the content hash is a SHA-256 hex digest or None, if it's not calculated
+LoadingInfo = namedtuple('LoadingInfo', 'path size content_hash power_inputs converters consumers parse_time')
+# Loaded net files are copied to the log entirely only if it's enabled, otherwise their summaries are logged
+IS_LOGGING_LOADED_FILES = False
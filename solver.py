@@ -1,65 +1,249 @@
 
 from typing import Optional
+from enum import Enum
 from numpy import isclose
 from PyQt6.QtCore import *
 from settings import *
 from electric_net import *
+from array_solver import *
+from parallel_solver import *
+
+
+class SolverEngine(Enum):
+    RECURSIVE = 1
+    ARRAY = 2
+    PARALLEL = 3
+
+
+# Calculates loads of net snapshots in the worker thread, the forest nodes are never touched by it.
+# A calculation is skipped or cancelled as soon as a newer generation is requested.
+class SolvingWorker(QObject):
+    def __init__(self, parent: QObject=None):
+        super().__init__(parent)
+        self.latest_generation = 0
+
+    solved = pyqtSignal(int, 'PyQt_PyObject', 'PyQt_PyObject', name='solved')
+
+    @pyqtSlot(int, 'PyQt_PyObject')
+    def solve(self, generation: int, packed_net: tuple):
+        if generation != self.latest_generation:
+            return
+
+        compiled_net = CompiledNet.unpack(packed_net)
+        try:
+            loads, is_written = compiled_net.calc_loads(lambda: generation != self.latest_generation)
+        except CompiledNet.CalculationCancelled:
+            return
+        self.solved.emit(generation, loads, is_written)
 
 
 class Solver(QObject):
     class LoadCalculationForLoad(Exception): pass
     class ConsumptionCalculationForInput(Exception): pass
 
+    DEBOUNCE_INTERVAL = 50
+
     def __init__(self, parent: QObject=None):
         super().__init__(parent)
         self._electric_net = None
+        self._cached_loads: dict[int, Optional[float]] = {}
+        self._engine = SolverEngine.RECURSIVE
+        self._array_solver = ArraySolver()
+        self._parallel_solver = ParallelSolver()
+
+        self._generation = 0
+        self._applied_generation = 0
+        self._worker: SolvingWorker | None = None
+        self._worker_thread: QThread | None = None
+        self._debounce_timer: QTimer | None = None
+        self._snapshot: CompiledNet | None = None
+        self._changed_nodes: list[Forest.ForestNode] = []
 
     def set_net(self, net: ElectricNet):
         self._electric_net = net
+        self._cached_loads = {}
+        self._array_solver.set_net(net)
+        self._parallel_solver.set_net(net)
+        self._snapshot = None
+        self._changed_nodes = []
+        self._generation += 1
+        self._applied_generation = self._generation
+        if self._worker is not None:
+            self._debounce_timer.stop()
+            self._worker.latest_generation = self._generation
+
+    # Changes are solved in the worker thread after a pause in editing, only the latest state of the net is solved
+    def start_background_solving(self, debounce_interval=DEBOUNCE_INTERVAL):
+        if self._worker is not None:
+            return
+
+        self._worker_thread = QThread()
+        self._worker = SolvingWorker()
+        self._worker.latest_generation = self._generation
+        self._worker.moveToThread(self._worker_thread)
+        self._solvingRequested.connect(self._worker.solve)
+        self._worker.solved.connect(self._receiveLoads)
 
-    def solve(self):
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(debounce_interval)
+        self._debounce_timer.timeout.connect(self._requestSolving)
+        self._worker_thread.start()
+
+    # Pending changes are solved right away in the calling thread, e.g. to save actual loads
+    def finish_solving(self):
+        if self._worker is None or self._applied_generation == self._generation:
+            return
+
+        self._debounce_timer.stop()
+        self._generation += 1
+        self._worker.latest_generation = self._generation
+        self._snapshot = CompiledNet(self._electric_net)
+        self._changed_nodes = []
+        changed_loads_nodes = self._snapshot.write_loads(*self._snapshot.calc_loads())
+        self._applied_generation = self._generation
+        self._reportLoads(self._generation, changed_loads_nodes)
+
+    def set_engine(self, engine: SolverEngine):
+        self._engine = engine
+        self._cached_loads = {}
+        self._array_solver.set_net(self._electric_net)
+
+    def shutdown(self):
+        self._parallel_solver.shutdown()
+        if self._worker_thread is not None:
+            self._debounce_timer.stop()
+            self._worker.latest_generation = -1
+            self._worker_thread.quit()
+            self._worker_thread.wait()
+            self._worker_thread = None
+            self._worker = None
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @property
+    def generation(self):
+        return self._generation
+
+    @property
+    def is_solving_in_background(self):
+        return self._worker is not None
+
+    # Solving methods return the nodes with changed loads
+    def solve(self) -> list[Forest.ForestNode]:
+        self._cached_loads = {}
+        if self._engine == SolverEngine.ARRAY:
+            return self._array_solver.solve()
+        if self._engine == SolverEngine.PARALLEL:
+            self._array_solver.set_net(self._electric_net)
+            return self._parallel_solver.solve()
+
+        changed_loads_nodes = []
         power_inputs = self._electric_net.get_inputs()
         for power_input in power_inputs:
-            self.calc_and_write_load(power_input)
-
-    def calc_and_write_load(self, source: Forest.ForestNode) -> Optional[float]:
-        source_data: ElectricNode = source.content
-        if source_data.type == ElectricNodeType.LOAD:
-            raise Solver.LoadCalculationForLoad
-
-        if type(source_data.value) is not float or isclose(source_data.value, 0.0, EPSILON):
-            return None
-
-        load = 0
-        sinks = ElectricNet.get_sinks(source)
-        for sink in sinks:
-            sink_data: ElectricNode = sink.content
-            if sink_data.type == ElectricNodeType.CONVERTER:
-                converter_load = self.calc_and_write_load(sink)
-                if type(converter_load) is float:
-                    converter_consumption = Solver.calc_consumption(sink)
-                    if converter_consumption is None:
-                        return None
-
-                    load += converter_consumption
-                else:
-                    return None
-            else:
-                load_value = sink_data.value
-                if type(load_value) is not float:
-                    return None
+            if self._electric_net.is_materialized(power_input):
+                self.calc_and_write_load(power_input, changed_loads_nodes)
+        return changed_loads_nodes
+
+    # Only the changed node and its ancestors are recalculated, other sources return their cached results.
+    # A change doesn't leave the tree of its power input, so the parallel engine solves it by the array one,
+    # which net is compiled again after every full solving.
+    def solve_incrementally(self, changed_node: Forest.ForestNode) -> list[Forest.ForestNode]:
+        if self._engine in (SolverEngine.ARRAY, SolverEngine.PARALLEL):
+            return self._array_solver.update(changed_node)
+
+        changed_loads_nodes = []
+        self.mark_dirty(changed_node)
+        power_input = self._electric_net.forest.find_root(changed_node)
+        if self._electric_net.is_materialized(power_input):
+            self.calc_and_write_load(power_input, changed_loads_nodes)
+        return changed_loads_nodes
+
+    def mark_dirty(self, node: Forest.ForestNode):
+        cur_node = node
+        while cur_node is not None:
+            self._cached_loads.pop(id(cur_node), None)
+            cur_node = cur_node.parent
+
+    # Sources are calculated in depth-first order with an explicit stack of frames [source, sinks, next sink index,
+    # accumulated load]. A converter sink pushes its own frame and is revisited, when its result is cached.
+    # Sources, which loads are changed, are appended to the given list.
+    def calc_and_write_load(self, source: Forest.ForestNode,
+                            changed_loads_nodes: list[Forest.ForestNode] | None = None) -> Optional[float]:
+        cached_loads = self._cached_loads
+        if id(source) in cached_loads:
+            return cached_loads[id(source)]
+
+        frames = [[source, None, 0, 0]]
+        while len(frames) > 0:
+            frame = frames[-1]
+            cur_source, sinks, sink_index, load = frame
+            source_data: ElectricNode = cur_source.content
+            if sinks is None:
+                if source_data.type == ElectricNodeType.LOAD:
+                    raise Solver.LoadCalculationForLoad
+                if type(source_data.value) is not float or isclose(source_data.value, 0.0, EPSILON):
+                    cached_loads[id(cur_source)] = None
+                    frames.pop()
+                    continue
+                sinks = ElectricNet.get_sinks(cur_source)
+
+            is_sink_pushed = False
+            is_failed = False
+            while sink_index < len(sinks):
+                sink = sinks[sink_index]
+                sink_data: ElectricNode = sink.content
+                if sink_data.type == ElectricNodeType.CONVERTER:
+                    if id(sink) not in cached_loads:
+                        frames.append([sink, None, 0, 0])
+                        is_sink_pushed = True
+                        break
+
+                    converter_load = cached_loads[id(sink)]
+                    if type(converter_load) is float:
+                        converter_consumption = Solver.calc_consumption(sink)
+                        if converter_consumption is None:
+                            is_failed = True
+                            break
+
+                        load += converter_consumption
+                    else:
+                        is_failed = True
+                        break
                 else:
-                    if sink_data.consumer_type == ConsumerType.CONSTANT_CURRENT:
-                        load += sink_data.value
+                    load_value = sink_data.value
+                    if type(load_value) is not float:
+                        is_failed = True
+                        break
                     else:
-                        try:
-                            current = source_data.value / sink_data.value
-                        except ZeroDivisionError:
-                            return None
-                        load += current
+                        if sink_data.consumer_type == ConsumerType.CONSTANT_CURRENT:
+                            load += sink_data.value
+                        else:
+                            try:
+                                current = source_data.value / sink_data.value
+                            except ZeroDivisionError:
+                                is_failed = True
+                                break
+                            load += current
+                sink_index += 1
+
+            if is_sink_pushed:
+                frame[1], frame[2], frame[3] = sinks, sink_index, load
+                continue
 
-        source_data.load = load
-        return load
+            frames.pop()
+            if is_failed:
+                cached_loads[id(cur_source)] = None
+            else:
+                is_load_changed = type(source_data.load) is not float or source_data.load != load
+                if changed_loads_nodes is not None and is_load_changed:
+                    changed_loads_nodes.append(cur_source)
+                source_data.load = load
+                cached_loads[id(cur_source)] = load
+
+        return cached_loads[id(source)]
 
     @staticmethod
     def calc_consumption(sink: Forest.ForestNode):
@@ -81,9 +265,69 @@ class Solver(QObject):
         else:
             return sink_data.value
 
-    loadCalculated = pyqtSignal(name='loadCalculated')
+    # Every request of solving gets the next generation, loads of the generation are reported by the signals,
+    # the second one also gets the nodes, which loads are changed
+    loadCalculated = pyqtSignal(int, name='loadCalculated')
+    loadsChanged = pyqtSignal(int, 'PyQt_PyObject', name='loadsChanged')
 
     @pyqtSlot()
     def recalculateChanges(self):
-        self.solve()
-        self.loadCalculated.emit()
+        self._generation += 1
+        if self._worker is not None:
+            self._snapshot = None
+            self._changed_nodes = []
+            self._scheduleSolving()
+            return
+
+        changed_loads_nodes = self.solve()
+        self._applied_generation = self._generation
+        self._reportLoads(self._generation, changed_loads_nodes)
+
+    @pyqtSlot('PyQt_PyObject')
+    def recalculateNodeChanges(self, changed_node: Forest.ForestNode):
+        self._generation += 1
+        if self._worker is not None:
+            if self._snapshot is not None:
+                self._changed_nodes.append(changed_node)
+            self._scheduleSolving()
+            return
+
+        changed_loads_nodes = self.solve_incrementally(changed_node)
+        self._applied_generation = self._generation
+        self._reportLoads(self._generation, changed_loads_nodes)
+
+
+    # Private part
+    _solvingRequested = pyqtSignal(int, 'PyQt_PyObject', name='_solvingRequested')
+
+    def _reportLoads(self, generation: int, changed_loads_nodes: list[Forest.ForestNode]):
+        self.loadCalculated.emit(generation)
+        self.loadsChanged.emit(generation, changed_loads_nodes)
+
+    # In-flight calculation is cancelled at once, a new one is requested when the debounce interval is over
+    def _scheduleSolving(self):
+        self._worker.latest_generation = self._generation
+        self._debounce_timer.start()
+
+    @pyqtSlot()
+    def _requestSolving(self):
+        if self._electric_net is None:
+            return
+
+        if self._snapshot is None or not all(self._snapshot.contains(node) for node in self._changed_nodes):
+            self._snapshot = CompiledNet(self._electric_net)
+        else:
+            for changed_node in self._changed_nodes:
+                self._snapshot.update_node(changed_node)
+        self._changed_nodes = []
+        self._solvingRequested.emit(self._generation, self._snapshot.snapshot())
+
+    # Loads are written by the GUI thread only if the net has not been changed since the request
+    @pyqtSlot(int, 'PyQt_PyObject', 'PyQt_PyObject')
+    def _receiveLoads(self, generation: int, loads, is_written):
+        if generation != self._generation:
+            return
+
+        changed_loads_nodes = self._snapshot.write_loads(loads, is_written)
+        self._applied_generation = generation
+        self._reportLoads(generation, changed_loads_nodes)
@@ -1,4 +1,524 @@
+import sys
 import unittest
+import random
+import numpy
+from solver import *
+from array_net import *
+
+
+NODE_KINDS = {
+    'input': (ElectricNodeType.INPUT, None),
+    'switching': (ElectricNodeType.CONVERTER, ConverterType.SWITCHING),
+    'linear': (ElectricNodeType.CONVERTER, ConverterType.LINEAR),
+    'current': (ElectricNodeType.LOAD, ConsumerType.CONSTANT_CURRENT),
+    'resistive': (ElectricNodeType.LOAD, ConsumerType.RESISTIVE)
+}
+
+
+# Every tree is a list like [('input', 12.0), ('current', 0.5), [('switching', 5.0), ('resistive', 10.0)]]
+def build_net(*argv: list) -> ElectricNet:
+    net = ElectricNet()
+    for tree in argv:
+        add_subtree(net, tree)
+    return net
+
+def add_subtree(net: ElectricNet, subtree, parent: Forest.ForestNode | None = None) -> Forest.ForestNode:
+    description = subtree[0] if type(subtree) == list else subtree
+    kind, value = description
+    node_type, subtype = NODE_KINDS[kind]
+    if node_type == ElectricNodeType.INPUT:
+        node = net.create_input()
+    elif node_type == ElectricNodeType.CONVERTER:
+        node = net.add_converter(parent)
+        node.content.converter_type = subtype
+    else:
+        node = net.add_load(parent)
+        node.content.consumer_type = subtype
+    node.content.value = value
+
+    if type(subtree) == list:
+        for successor in subtree[1:]:
+            add_subtree(net, successor, node)
+    return node
+
+def collect_loads(net: ElectricNet) -> list:
+    loads = []
+    for node in net.forest:
+        if node.content.type != ElectricNodeType.LOAD:
+            loads.append(node.content.load)
+    return loads
+
+
+def build_random_net(seed, nodes_number, inputs_number=3) -> ElectricNet:
+    generator = random.Random(seed)
+    net = ElectricNet()
+    sources = []
+    for index in range(inputs_number):
+        power_input = net.create_input()
+        power_input.content.value = generator.choice([3.3, 5.0, 12.0, 24.0])
+        sources.append(power_input)
+
+    nodes_left = nodes_number - inputs_number
+    while nodes_left > 0:
+        nodes_left -= 1
+        parent = generator.choice(sources)
+        if generator.random() < 0.3:
+            node = net.add_converter(parent)
+            node.content.converter_type = generator.choice([ConverterType.LINEAR, ConverterType.SWITCHING])
+            node.content.value = generator.choice([0.9, 1.8, 2.5, 3.3, 5.0])
+            sources.append(node)
+            if nodes_left > 0 and generator.random() < 0.9:
+                nodes_left -= 1
+                first_sink = net.add_load(node)
+                first_sink.content.value = generator.uniform(0.01, 1.0)
+        else:
+            node = net.add_load(parent)
+            node.content.consumer_type = generator.choice([ConsumerType.CONSTANT_CURRENT, ConsumerType.RESISTIVE])
+            node.content.value = generator.uniform(0.01, 100.0)
+
+        if generator.random() < 0.005:
+            node.content.value = generator.choice([0, 0.0])
+    return net
+
+
+TEST_NET = ([('input', 12.0), ('current', 0.5), [('switching', 5.0), ('resistive', 10.0), ('current', 1.0)],
+             [('linear', 3.3), ('current', 0.2), [('switching', 1.8), ('current', 0.9)]]],
+            [('input', 24.0), [('switching', 12.0), ('current', 2.0)], ('resistive', 48.0)])
+
+
+class TestSolverSolve(unittest.TestCase):
+    def test_solve_net(self):
+        tested_net = build_net(*TEST_NET)
+        solver = Solver()
+        solver.set_net(tested_net)
+        solver.solve()
+
+        proper_loads = [0.5 + 1.5 * 5.0 / 12.0 + 0.2 + 0.9 * 1.8 / 3.3, 1.5, 0.2 + 0.9 * 1.8 / 3.3, 0.9,
+                        2.0 * 12.0 / 24.0 + 0.5, 2.0]
+        for proper_load, tested_load in zip(proper_loads, collect_loads(tested_net)):
+            self.assertAlmostEqual(proper_load, tested_load)
+
+    def test_solve_net_with_unset_value(self):
+        tested_net = build_net([('input', 12.0), ('current', 0.5), [('switching', 5.0), ('current', 1.0)]],
+                               [('input', 24.0), ('current', 2.0)])
+        tested_net.forest.roots[0].successors[1].successors[0].content.value = 0
+        solver = Solver()
+        solver.set_net(tested_net)
+        solver.solve()
+        self.assertEqual([0, 0, 2.0], collect_loads(tested_net))
+
+    def test_solve_deep_chain(self):
+        tested_net = ElectricNet()
+        source = tested_net.create_input()
+        source.content.value = 12.0
+        chain_depth = 5 * sys.getrecursionlimit()
+        for level in range(chain_depth):
+            source = tested_net.add_converter(source)
+            source.content.converter_type = ConverterType.LINEAR
+            source.content.value = 5.0
+        tested_net.add_load(source).content.value = 0.5
+
+        solver = Solver()
+        solver.set_net(tested_net)
+        solver.solve()
+        self.assertEqual([0.5] * (chain_depth + 1), collect_loads(tested_net))
+
+
+class TestSolverSolveIncrementally(unittest.TestCase):
+    def test_change_consumer_value(self):
+        tested_net = build_net(*TEST_NET)
+        solver = Solver()
+        solver.set_net(tested_net)
+        solver.solve()
+
+        changed_node = tested_net.forest.roots[0].successors[2].successors[1].successors[0]
+        changed_node.content.value = 1.5
+        solver.solve_incrementally(changed_node)
+
+        proper_net = build_net(*TEST_NET)
+        proper_net.forest.roots[0].successors[2].successors[1].successors[0].content.value = 1.5
+        proper_solver = Solver()
+        proper_solver.set_net(proper_net)
+        proper_solver.solve()
+        self.assertEqual(collect_loads(proper_net), collect_loads(tested_net))
+
+    def test_change_converter_type(self):
+        tested_net = build_net(*TEST_NET)
+        solver = Solver()
+        solver.set_net(tested_net)
+        solver.solve()
+
+        changed_node = tested_net.forest.roots[0].successors[1]
+        changed_node.content.converter_type = ConverterType.LINEAR
+        solver.solve_incrementally(changed_node)
+
+        proper_net = build_net(*TEST_NET)
+        proper_net.forest.roots[0].successors[1].content.converter_type = ConverterType.LINEAR
+        proper_solver = Solver()
+        proper_solver.set_net(proper_net)
+        proper_solver.solve()
+        self.assertEqual(collect_loads(proper_net), collect_loads(tested_net))
+
+    def test_fix_unset_value(self):
+        tested_net = build_net(*TEST_NET)
+        changed_node = tested_net.forest.roots[0].successors[2].successors[0]
+        changed_node.content.value = 0
+        solver = Solver()
+        solver.set_net(tested_net)
+        solver.solve()
+
+        changed_node.content.value = 0.2
+        solver.solve_incrementally(changed_node)
+
+        proper_net = build_net(*TEST_NET)
+        proper_solver = Solver()
+        proper_solver.set_net(proper_net)
+        proper_solver.solve()
+        self.assertEqual(collect_loads(proper_net), collect_loads(tested_net))
+
+    def test_other_trees_are_not_recalculated(self):
+        tested_net = build_net(*TEST_NET)
+        solver = Solver()
+        solver.set_net(tested_net)
+        solver.solve()
+        untouched_loads = collect_loads(tested_net)[4:]
+
+        tested_net.forest.roots[1].successors[1].content.value = 12.0
+        changed_node = tested_net.forest.roots[0].successors[0]
+        changed_node.content.value = 0.7
+        solver.solve_incrementally(changed_node)
+
+        self.assertEqual(untouched_loads, collect_loads(tested_net)[4:])
+        proper_load = 0.7 + 1.5 * 5.0 / 12.0 + 0.2 + 0.9 * 1.8 / 3.3
+        self.assertAlmostEqual(proper_load, tested_net.forest.roots[0].content.load)
+
+    def test_changed_loads_are_reported(self):
+        for engine in (SolverEngine.RECURSIVE, SolverEngine.ARRAY):
+            tested_net = build_net(*TEST_NET)
+            solver = Solver()
+            solver.set_net(tested_net)
+            solver.set_engine(engine)
+            self.assertEqual(6, len(solver.solve()))
+
+            changed_node = tested_net.forest.roots[0].successors[2].successors[1].successors[0]
+            changed_node.content.value = 1.5
+            changed_loads_nodes = solver.solve_incrementally(changed_node)
+            proper_nodes = [changed_node.parent, changed_node.parent.parent, tested_net.forest.roots[0]]
+            self.assertEqual(sorted(map(id, proper_nodes)), sorted(map(id, changed_loads_nodes)))
+            self.assertEqual([], solver.solve_incrementally(changed_node))
+
+
+class TestSolverArrayEngine(unittest.TestCase):
+    def test_solve_net(self):
+        proper_net = build_net(*TEST_NET)
+        proper_solver = Solver()
+        proper_solver.set_net(proper_net)
+        proper_solver.solve()
+
+        tested_net = build_net(*TEST_NET)
+        tested_solver = Solver()
+        tested_solver.set_net(tested_net)
+        tested_solver.set_engine(SolverEngine.ARRAY)
+        tested_solver.solve()
+        self.assertEqual(collect_loads(proper_net), collect_loads(tested_net))
+
+    def test_solve_random_nets(self):
+        for seed in range(20):
+            proper_net = build_random_net(seed, 300)
+            proper_solver = Solver()
+            proper_solver.set_net(proper_net)
+            proper_solver.solve()
+
+            tested_net = build_random_net(seed, 300)
+            tested_solver = Solver()
+            tested_solver.set_net(tested_net)
+            tested_solver.set_engine(SolverEngine.ARRAY)
+            tested_solver.solve()
+            self.assertEqual(collect_loads(proper_net), collect_loads(tested_net))
+
+    def test_solve_incrementally(self):
+        tested_net = build_net(*TEST_NET)
+        tested_solver = Solver()
+        tested_solver.set_net(tested_net)
+        tested_solver.set_engine(SolverEngine.ARRAY)
+        tested_solver.solve()
+
+        changed_node = tested_net.forest.roots[0].successors[2]
+        changed_node.content.converter_type = ConverterType.SWITCHING
+        changed_node.content.value = 2.5
+        tested_solver.solve_incrementally(changed_node)
+
+        proper_net = build_net(*TEST_NET)
+        proper_net.forest.roots[0].successors[2].content.converter_type = ConverterType.SWITCHING
+        proper_net.forest.roots[0].successors[2].content.value = 2.5
+        proper_solver = Solver()
+        proper_solver.set_net(proper_net)
+        proper_solver.solve()
+        self.assertEqual(collect_loads(proper_net), collect_loads(tested_net))
+
+    def test_update_added_node(self):
+        tested_net = build_net(*TEST_NET)
+        tested_solver = Solver()
+        tested_solver.set_net(tested_net)
+        tested_solver.set_engine(SolverEngine.ARRAY)
+        tested_solver.solve()
+
+        added_node = tested_net.add_load(tested_net.forest.roots[0])
+        added_node.content.value = 0.3
+        tested_solver.solve_incrementally(added_node)
+
+        proper_net = build_net(*TEST_NET)
+        proper_net.add_load(proper_net.forest.roots[0]).content.value = 0.3
+        proper_solver = Solver()
+        proper_solver.set_net(proper_net)
+        proper_solver.solve()
+        self.assertEqual(collect_loads(proper_net), collect_loads(tested_net))
+
+
+class TestSolverParallelEngine(unittest.TestCase):
+    def test_solve_random_net(self):
+        proper_net = build_random_net(11, 3000, inputs_number=8)
+        proper_solver = Solver()
+        proper_solver.set_net(proper_net)
+        proper_solver.solve()
+
+        tested_net = build_random_net(11, 3000, inputs_number=8)
+        tested_solver = ParallelSolver(max_workers=2, min_nodes_number=0)
+        tested_solver.set_net(tested_net)
+        tested_solver.solve()
+        tested_solver.shutdown()
+        self.assertEqual(collect_loads(proper_net), collect_loads(tested_net))
+
+    def test_solve_small_net_in_process(self):
+        proper_net = build_net(*TEST_NET)
+        proper_solver = Solver()
+        proper_solver.set_net(proper_net)
+        proper_solver.solve()
+
+        tested_net = build_net(*TEST_NET)
+        tested_solver = Solver()
+        tested_solver.set_net(tested_net)
+        tested_solver.set_engine(SolverEngine.PARALLEL)
+        tested_solver.solve()
+        self.assertEqual(collect_loads(proper_net), collect_loads(tested_net))
+
+    def test_solve_incrementally(self):
+        tested_net = build_random_net(12, 300, inputs_number=4)
+        tested_solver = Solver()
+        tested_solver.set_net(tested_net)
+        tested_solver.set_engine(SolverEngine.PARALLEL)
+        tested_solver.solve()
+        proper_net = build_random_net(12, 300, inputs_number=4)
+        proper_solver = Solver()
+        proper_solver.set_net(proper_net)
+
+        generator = random.Random(12)
+        tested_nodes, proper_nodes = list(tested_net.forest), list(proper_net.forest)
+        for step in range(10):
+            index = generator.randrange(len(tested_nodes))
+            for node in (tested_nodes[index], proper_nodes[index]):
+                node.content.value = step + 1.5
+            if step == 5:
+                tested_solver.solve()
+            else:
+                tested_solver.solve_incrementally(tested_nodes[index])
+            proper_solver.solve()
+            self.assertEqual(collect_loads(proper_net), collect_loads(tested_net))
+
+    def test_undetermined_cpu_count(self):
+        cpu_count = os.cpu_count
+        os.cpu_count = lambda: None
+        try:
+            self.assertEqual(1, ParallelSolver().max_workers)
+        finally:
+            os.cpu_count = cpu_count
+
+
+class TestCompiledNetVariants(unittest.TestCase):
+    def test_calc_variants_loads(self):
+        tested_net = build_random_net(7, 200)
+        compiled_net = CompiledNet(tested_net)
+        generator = numpy.random.default_rng(7)
+        variants_values = compiled_net.get_variant_values() * generator.uniform(0.5, 1.5, (40, 200))
+        variants_values[5, 17] = numpy.nan
+        variants_values[6, 0] = 0.0
+        result = compiled_net.calc_variants_loads(variants_values)
+
+        proper_net = build_random_net(7, 200)
+        proper_nodes = CompiledNet(proper_net).nodes
+        solver = Solver()
+        solver.set_net(proper_net)
+        for variant_values, variant_loads in zip(variants_values, result):
+            for node, value in zip(proper_nodes, variant_values):
+                node.content.value = 0 if numpy.isnan(value) else float(value)
+                if node.content.type != ElectricNodeType.LOAD:
+                    node.content.load = numpy.nan
+            solver.solve()
+
+            proper_loads = []
+            for node in proper_nodes:
+                proper_loads.append(numpy.nan if node.content.type == ElectricNodeType.LOAD else node.content.load)
+            numpy.testing.assert_array_equal(proper_loads, variant_loads)
+
+    def test_calc_variants_loads_with_wrong_shape(self):
+        compiled_net = CompiledNet(build_net(*TEST_NET))
+        with self.assertRaises(CompiledNet.InvalidVariantsShape):
+            compiled_net.calc_variants_loads(numpy.ones((3, 4)))
+
+
+class TestSolverBackgroundSolving(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.tested_net = build_net(*TEST_NET)
+        self.solver = Solver()
+        self.solver.set_net(self.tested_net)
+        self.solver.start_background_solving(debounce_interval=10)
+        self.generations = []
+        self.solver.loadCalculated.connect(self.generations.append)
+
+    def tearDown(self):
+        self.solver.shutdown()
+
+    def wait_for_loads(self):
+        loop = QEventLoop()
+        self.solver.loadCalculated.connect(loop.quit)
+        QTimer.singleShot(5000, loop.quit)
+        loop.exec()
+        self.solver.loadCalculated.disconnect(loop.quit)
+
+    def test_requests_are_coalesced(self):
+        self.solver.recalculateChanges()
+        changed_node = self.tested_net.forest.roots[0].successors[0]
+        for value in (0.6, 0.7, 0.8):
+            changed_node.content.value = value
+            self.solver.recalculateNodeChanges(changed_node)
+        self.wait_for_loads()
+        self.app.processEvents()
+
+        self.assertEqual([self.solver.generation], self.generations)
+        proper_net = build_net(*TEST_NET)
+        proper_net.forest.roots[0].successors[0].content.value = 0.8
+        proper_solver = Solver()
+        proper_solver.set_net(proper_net)
+        proper_solver.solve()
+        self.assertEqual(collect_loads(proper_net), collect_loads(self.tested_net))
+
+    def test_added_node_is_solved(self):
+        self.solver.recalculateChanges()
+        self.wait_for_loads()
+        added_node = self.tested_net.add_load(self.tested_net.forest.roots[0])
+        added_node.content.value = 0.3
+        self.solver.recalculateNodeChanges(added_node)
+        self.wait_for_loads()
+        self.app.processEvents()
+
+        proper_net = build_net(*TEST_NET)
+        proper_net.add_load(proper_net.forest.roots[0]).content.value = 0.3
+        proper_solver = Solver()
+        proper_solver.set_net(proper_net)
+        proper_solver.solve()
+        self.assertEqual(collect_loads(proper_net), collect_loads(self.tested_net))
+
+    def test_outdated_loads_are_dropped(self):
+        self.solver.recalculateChanges()
+        self.wait_for_loads()
+        outdated_generation = self.solver.generation
+        compiled_net = CompiledNet(self.tested_net)
+        self.solver.recalculateChanges()
+        self.solver._receiveLoads(outdated_generation, *compiled_net.calc_loads())
+        self.assertEqual([outdated_generation], self.generations)
+
+    def test_finish_solving(self):
+        self.solver.recalculateChanges()
+        self.solver.finish_solving()
+        self.assertEqual([self.solver.generation], self.generations)
+        self.assertAlmostEqual(0.5 + 1.5 * 5.0 / 12.0 + 0.2 + 0.9 * 1.8 / 3.3,
+                               self.tested_net.forest.roots[0].content.load)
+
+    def test_stale_calculation_is_skipped(self):
+        worker = SolvingWorker()
+        results = []
+        worker.solved.connect(lambda *argv: results.append(argv))
+        worker.latest_generation = 2
+        worker.solve(1, CompiledNet(self.tested_net).snapshot())
+        self.assertEqual([], results)
+        worker.solve(2, CompiledNet(self.tested_net).snapshot())
+        self.assertEqual(1, len(results))
+
+    def test_calculation_is_cancelled(self):
+        compiled_net = CompiledNet(self.tested_net)
+        with self.assertRaises(CompiledNet.CalculationCancelled):
+            compiled_net.calc_loads(lambda: True)
+
+
+class TestElectricNetNames(unittest.TestCase):
+    def test_names_are_shared(self):
+        tested_net = ElectricNet(StringTable())
+        first_input = tested_net.create_input()
+        second_input = tested_net.create_input()
+        first_input.content.name = tested_net.share_name(' '.join(['Main', 'rail']))
+        second_input.content.name = tested_net.share_name(' '.join(['Main', 'rail']))
+        self.assertIs(first_input.content.name, second_input.content.name)
+        self.assertEqual(1, len(tested_net.name_table))
+
+    def test_names_are_own_without_table(self):
+        tested_net = ElectricNet()
+        name = ' '.join(['Main', 'rail'])
+        self.assertIs(name, tested_net.share_name(name))
+        self.assertIsNone(tested_net.name_table)
+
+    def test_types_are_filtered(self):
+        tested_net = build_net([('input', 12.0), ('current', 0.5), [('switching', 5.0), ('resistive', 10.0)]])
+        tested_types = [node.content.type for node in tested_net.traverse(ElectricNodeType.LOAD)]
+        self.assertEqual([ElectricNodeType.LOAD] * 2, tested_types)
+        self.assertEqual(4, sum(1 for node in tested_net.traverse()))
+
+
+class TestArrayElectricNet(unittest.TestCase):
+    def test_build_net(self):
+        tested_net = ArrayElectricNet(capacity=2)
+        power_input = tested_net.create_input()
+        power_input.content.value = 12.0
+        converter = tested_net.add_converter(power_input)
+        converter.content.converter_type = ConverterType.LINEAR
+        load = tested_net.add_load(power_input)
+        load.content.name = 'Fan'
+        tested_net.add_load(converter)
+
+        self.assertEqual(4, len(tested_net))
+        self.assertEqual([power_input], tested_net.get_inputs())
+        self.assertEqual([converter, load], ArrayElectricNet.get_sinks(power_input))
+        self.assertEqual(power_input, load.parent)
+        self.assertEqual(ConverterType.LINEAR, converter.content.converter_type)
+        self.assertEqual(ConsumerType.CONSTANT_CURRENT, load.content.consumer_type)
+        self.assertEqual('Fan', load.content.name)
+        self.assertEqual(0, converter.content.value)
+        self.assertEqual(12.0, power_input.content.value)
+        with self.assertRaises(ElectricNode.AccessToLoadLoad):
+            load.content.load = 1.0
+
+    def test_solve_random_nets(self):
+        for seed in range(10):
+            proper_net = build_random_net(seed, 300)
+            tested_net = ArrayElectricNet.from_electric_net(proper_net)
+            proper_solver = Solver()
+            proper_solver.set_net(proper_net)
+            proper_solver.solve()
+            tested_net.solve()
+            self.assertEqual(collect_loads(proper_net), collect_loads(tested_net.to_electric_net()))
+
+    def test_conversion(self):
+        proper_net = build_net(*TEST_NET)
+        proper_net.forest.roots[0].successors[0].content.name = 'Fan'
+        tested_net = ArrayElectricNet.from_electric_net(proper_net).to_electric_net()
+        for proper_node, tested_node in zip(proper_net.forest, tested_net.forest):
+            self.assertEqual(proper_node.content.type, tested_node.content.type)
+            self.assertEqual(proper_node.content.name, tested_node.content.name)
+            self.assertEqual(proper_node.content.value, tested_node.content.value)
+        self.assertEqual(proper_net.forest.calc_size(), tested_net.forest.calc_size())
 
 
 class MyTestCase(unittest.TestCase):
@@ -1,24 +1,167 @@
 
 from __future__ import annotations
+import random
+from enum import Enum
+from collections import deque
+from typing import Callable, Iterator
 
 # TODO: Write disclamer about order of successors - this module is implemented with ordered successors and tested with
 #       assumption of that they're ordered, but doesn't have any methods to change this order, and the developer meant
 #       a usual tree with unordered node's leafage.
 
+class TraversalOrder(Enum):
+    PRE_ORDER = 1
+    POST_ORDER = 2
+    LEVEL_ORDER = 3
+
+
+# Order statistics of a long list of siblings: a treap of entries with links to parents and subtree sizes. Every node
+# of the list keeps its entry, so its position is found, and siblings are inserted and removed, in O(log n) expected
+# time. There is no object of the whole list, the root of the treap is reached from any entry.
+class SiblingsOrder:
+    # Public interface
+    class Entry:
+        __slots__ = ('node', 'parent', 'left', 'right', 'size', 'priority')
+
+        def __init__(self, node: Node):
+            self.node = node
+            self.parent: SiblingsOrder.Entry | None = None
+            self.left: SiblingsOrder.Entry | None = None
+            self.right: SiblingsOrder.Entry | None = None
+            self.size = 1
+            self.priority = random.random()
+
+
+    # Entries are linked as a Cartesian tree of their priorities, so the treap is built in O(n)
+    @staticmethod
+    def build(nodes: list[Node]) -> list[SiblingsOrder.Entry]:
+        entries = [SiblingsOrder.Entry(node) for node in nodes]
+        right_spine = []
+        for entry in entries:
+            last_popped = None
+            while len(right_spine) > 0 and right_spine[-1].priority < entry.priority:
+                last_popped = right_spine.pop()
+            entry.left = last_popped
+            if last_popped is not None:
+                last_popped.parent = entry
+            if len(right_spine) > 0:
+                right_spine[-1].right = entry
+                entry.parent = right_spine[-1]
+            right_spine.append(entry)
+
+        parents_first = right_spine[:1]
+        for entry in parents_first:
+            parents_first.extend(child for child in (entry.left, entry.right) if child is not None)
+        for entry in reversed(parents_first):
+            entry.size = 1 + SiblingsOrder._get_size(entry.left) + SiblingsOrder._get_size(entry.right)
+        return entries
+
+    @staticmethod
+    def get_position(entry: SiblingsOrder.Entry) -> int:
+        position = SiblingsOrder._get_size(entry.left)
+        while entry.parent is not None:
+            if entry is entry.parent.right:
+                position += SiblingsOrder._get_size(entry.parent.left) + 1
+            entry = entry.parent
+        return position
+
+    # Any entry of the treap is enough to insert a new one
+    @staticmethod
+    def insert(sibling_entry: SiblingsOrder.Entry, position: int, node: Node) -> SiblingsOrder.Entry:
+        new_entry = SiblingsOrder.Entry(node)
+        cur_entry = sibling_entry
+        while cur_entry.parent is not None:
+            cur_entry = cur_entry.parent
+        while True:
+            cur_entry.size += 1
+            left_size = SiblingsOrder._get_size(cur_entry.left)
+            if position <= left_size:
+                if cur_entry.left is None:
+                    cur_entry.left = new_entry
+                    break
+                cur_entry = cur_entry.left
+            else:
+                position -= left_size + 1
+                if cur_entry.right is None:
+                    cur_entry.right = new_entry
+                    break
+                cur_entry = cur_entry.right
+        new_entry.parent = cur_entry
+
+        while new_entry.parent is not None and new_entry.parent.priority < new_entry.priority:
+            SiblingsOrder._rotate_up(new_entry)
+        return new_entry
+
+    # The entry is rotated down to a leaf and cut off
+    @staticmethod
+    def remove(entry: SiblingsOrder.Entry):
+        while entry.left is not None and entry.right is not None:
+            if entry.left.priority > entry.right.priority:
+                SiblingsOrder._rotate_up(entry.left)
+            else:
+                SiblingsOrder._rotate_up(entry.right)
+
+        child = entry.left if entry.left is not None else entry.right
+        parent = entry.parent
+        if child is not None:
+            child.parent = parent
+        if parent is not None:
+            if parent.left is entry:
+                parent.left = child
+            else:
+                parent.right = child
+        entry.parent = entry.left = entry.right = None
+
+        while parent is not None:
+            parent.size -= 1
+            parent = parent.parent
+
+
+    # Private part
+    @staticmethod
+    def _get_size(entry: SiblingsOrder.Entry | None) -> int:
+        return entry.size if entry is not None else 0
+
+    @staticmethod
+    def _rotate_up(entry: SiblingsOrder.Entry):
+        parent = entry.parent
+        grandparent = parent.parent
+        if entry is parent.left:
+            parent.left = entry.right
+            if entry.right is not None:
+                entry.right.parent = parent
+            entry.right = parent
+        else:
+            parent.right = entry.left
+            if entry.left is not None:
+                entry.left.parent = parent
+            entry.left = parent
+        parent.parent = entry
+        entry.parent = grandparent
+        if grandparent is not None:
+            if grandparent.left is parent:
+                grandparent.left = entry
+            else:
+                grandparent.right = entry
+        parent.size = 1 + SiblingsOrder._get_size(parent.left) + SiblingsOrder._get_size(parent.right)
+        entry.size = 1 + SiblingsOrder._get_size(entry.left) + SiblingsOrder._get_size(entry.right)
+
+
 # TODO: Implement convenient tools for tree structure visualization
 class Node:
     # Public interface
     class ClosingTransition(Exception): pass
 
 
+    # Nets are built of hundreds of thousands nodes, so they don't have instance dicts
+    __slots__ = ('_parent', '_successors', '_content', '_metrics', '_position')
+
     def __init__(self, content=None):
         self._parent: Node | None = None
         self._successors: list[Node] = []
         self._content = content
-
-        self._cur_indices = None
-        self._cur_node = None
-        self._is_first_iteration = False
+        self._metrics: tuple[int, int, int] | None = None
+        self._position = 0
 
 
     @staticmethod
@@ -28,7 +171,7 @@ class Node:
         nodes_list = nodes_list[1:]
 
         if parent is not None:
-            parent.successors.append(root)
+            Node._append_sibling(parent.successors, root)
             root.parent = parent
 
         for subtree in nodes_list:
@@ -37,40 +180,52 @@ class Node:
             else:
                 successor = Node()
                 successor.content = subtree
-                root.successors.append(successor)
+                Node._append_sibling(root.successors, successor)
                 successor.parent = root
 
         return root
 
 
-    def connect_to(self, parent: Node):
-        if isinstance(parent, Node):
+    # The node is appended to successors of the parent, if position isn't specified
+    def connect_to(self, parent: Node, position: int | None = None):
+        # A leaf can't be an ancestor, so attaching of new leaves doesn't walk the path to the root
+        if isinstance(parent, Node) and self.is_parent():
             if self.is_ancestor(parent):
                 raise Node.ClosingTransition
 
         if isinstance(self._parent, Node):
-            self._parent.successors.remove(self)
+            Node._remove_sibling(self._parent.successors, self)
+            Node._notify_successors_changed(self._parent)
         self._parent = parent
         if isinstance(parent, Node):
-            parent._successors.append(self)
+            if position is None:
+                Node._append_sibling(parent._successors, self)
+            else:
+                Node._insert_sibling(parent._successors, self, position)
+            Node._notify_successors_changed(parent)
 
     def disconnect(self):
         if self._parent is None:
             return
-        self._parent.successors.remove(self)
+        Node._remove_sibling(self._parent.successors, self)
+        Node._notify_successors_changed(self._parent)
         self._parent = None
 
     def replace_with(self, node: Node):
         cur_parent = self._parent
         if isinstance(cur_parent, Node):
             parent_successors = cur_parent.successors
-            cur_index = parent_successors.index(self)
+            cur_index = Node._find_sibling_position(parent_successors, self)
             parent_successors[cur_index] = node
+            self_slot = self._position
 
         node_parent = node.parent
         if isinstance(node_parent, Node):
             parent_successors = node_parent.successors
-            parent_successors.remove(node)
+            Node._remove_sibling(parent_successors, node)
+        if isinstance(cur_parent, Node):
+            Node._set_sibling_slot(node, self_slot)
+            self._position = 0
 
         node.parent = cur_parent
         self._parent = None
@@ -84,76 +239,46 @@ class Node:
         cur_parent = self._parent
         if isinstance(cur_parent, Node):
             parent_successors = cur_parent.successors
-            cur_index = parent_successors.index(self)
-            parent_successors[cur_index] = node
+            self_position = Node._find_sibling_position(parent_successors, self)
+            parent_successors[self_position] = node
+            self_slot = self._position
 
         node_parent = node.parent
         if isinstance(node_parent, Node):
             parent_successors = node_parent.successors
-            cur_index = parent_successors.index(node)
-            parent_successors[cur_index] = self
+            node_position = Node._find_sibling_position(parent_successors, node)
+            parent_successors[node_position] = self
+            Node._set_sibling_slot(self, node._position)
+        if isinstance(cur_parent, Node):
+            Node._set_sibling_slot(node, self_slot)
 
         node.parent = cur_parent
         self._parent = node_parent
 
 
-    def __iter__(self):
-        self._cur_indices = [0]
-        self._cur_node = self
-        self._is_first_iteration = True
-        return self
-
-    def __next__(self):
-        result = self._cur_node
+    # Iteration doesn't store any state in nodes, so several iterations over the same tree can go at once
+    def __iter__(self) -> Iterator[Node]:
+        return self.traverse()
 
-        if self._is_on_itself():
-            if self._is_first_iteration:
-                self._is_first_iteration = False
-                if self.is_leaf():
-                    return result
-            else:
-                raise StopIteration
-
-        if self._cur_node.is_parent():
-            self._cur_indices.append(0)
-            self._cur_node = self._cur_node.successors[0]
-        elif not self._is_last_sibling():
-            self._go_to_next_sibling()
-        else:
-            while self._is_last_sibling():
-                self._cur_indices.pop(-1)
-                self._cur_node = self._cur_node.parent
-                if self._is_on_itself():
-                    return result
-            self._go_to_next_sibling()
-
-        return result
+    # Only nodes satisfying the condition are yielded, but successors of skipped nodes are traversed as well
+    def traverse(self, order=TraversalOrder.PRE_ORDER, condition: Callable[[Node], bool] | None = None) \
+            -> Iterator[Node]:
+        return Node._traverse_trees([self], order, condition)
 
+    # Metrics of subtrees are cached, see _update_metrics
     def calc_subtree_width(self):
-        width = 0
-        if len(self.successors) > 0:
-            width += len(self.successors) - 1
-            for successor in self._successors:
-                width += successor.calc_subtree_width()
-
-        return width
+        return self._get_metrics()[1] - 1
 
     def calc_subtree_depth(self):
-        depth = 0
-        if self.is_parent():
-            depth = 1
-            additional_depth = 0
-            for child in self._successors:
-                child_subtree_depth = child.calc_subtree_depth()
-                if child_subtree_depth > additional_depth:
-                    additional_depth = child_subtree_depth
-            depth += additional_depth
-        return depth
+        return self._get_metrics()[2]
+
+    def calc_subtree_size(self):
+        return self._get_metrics()[0]
 
     # TODO: it is used in only graph_gui. Need to be used in Tree module.
     def index_by_parent(self):
         parent = self._parent
-        index = parent.successors.index(self)
+        index = Node._find_sibling_position(parent.successors, self)
         return index
 
     def is_root(self):
@@ -172,7 +297,7 @@ class Node:
     def is_ancestor(self, second: Node):
         cur_parent = second._parent
         while isinstance(cur_parent, Node):
-            if cur_parent == self:
+            if cur_parent is self:
                 return True
             cur_parent = cur_parent._parent
         return False
@@ -202,7 +327,9 @@ class Node:
         return self._parent
     @parent.setter
     def parent(self, value):
+        Node._notify_successors_changed(self._parent)
         self._parent = value
+        Node._notify_successors_changed(value)
 
     @property
     def successors(self):
@@ -210,24 +337,243 @@ class Node:
     @successors.setter
     def successors(self, value):
         self._successors = value
+        Node._notify_successors_changed(self)
 
 
     # Private part
-    def _is_on_itself(self):
-        return id(self._cur_node) == id(self)
+    @staticmethod
+    def _notify_successors_changed(node: Node | None):
+        if isinstance(node, Node):
+            node._on_successors_changed()
+
+    def _on_successors_changed(self):
+        Node._invalidate_metrics(self)
 
-    def _is_last_sibling(self):
-        return len(self._cur_node.parent.successors) - 1 == self._cur_indices[-1]
+    # Every node caches (size, number of leaves, height) of its subtree. A change of successors outdates metrics of
+    # the node and all its ancestors, so an outdated node never has an up-to-date ancestor, and invalidation stops
+    # on the first outdated one.
+    @staticmethod
+    def _invalidate_metrics(node: Node | None):
+        while isinstance(node, Node) and node._metrics is not None:
+            node._metrics = None
+            node = node._parent
+
+    # Every node keeps the slot of its position among siblings (or roots of its forest). In short lists it's a hint
+    # of the position, that is checked by identity and rebuilt lazily: inserting and removing siblings don't renumber
+    # the following ones. When a hint of a long list misses, the list is indexed: all its nodes get entries of
+    # SiblingsOrder, that are kept up to date by insertions and removals. The lists themselves are still shifted
+    # by them, but it's a memmove of pointers.
+    MAX_UNINDEXED_SIBLINGS_NUMBER = 64
+
+    @staticmethod
+    def _find_sibling_position(siblings: list[Node], node: Node) -> int:
+        position = Node._get_slot_position(node._position)
+        if position < len(siblings) and siblings[position] is node:
+            return position
+
+        if len(siblings) > Node.MAX_UNINDEXED_SIBLINGS_NUMBER:
+            for sibling, entry in zip(siblings, SiblingsOrder.build(siblings)):
+                sibling._position = entry
+        else:
+            for position, sibling in enumerate(siblings):
+                sibling._position = position
+        position = Node._get_slot_position(node._position)
+        if position >= len(siblings) or siblings[position] is not node:
+            raise ValueError
+        return position
+
+    @staticmethod
+    def _get_slot_position(slot: int | SiblingsOrder.Entry) -> int:
+        if type(slot) is SiblingsOrder.Entry:
+            return SiblingsOrder.get_position(slot)
+        return slot
+
+    @staticmethod
+    def _append_sibling(siblings: list[Node], node: Node):
+        Node._insert_sibling(siblings, node, len(siblings))
+
+    @staticmethod
+    def _insert_sibling(siblings: list[Node], node: Node, position: int):
+        position = min(max(position if position >= 0 else position + len(siblings), 0), len(siblings))
+        sibling_slot = siblings[0]._position if len(siblings) > 0 else 0
+        if type(sibling_slot) is SiblingsOrder.Entry:
+            node._position = SiblingsOrder.insert(sibling_slot, position, node)
+        else:
+            node._position = position
+        siblings.insert(position, node)
+
+    @staticmethod
+    def _remove_sibling(siblings: list[Node], node: Node):
+        del siblings[Node._find_sibling_position(siblings, node)]
+        if type(node._position) is SiblingsOrder.Entry:
+            SiblingsOrder.remove(node._position)
+        node._position = 0
 
-    def _go_to_next_sibling(self):
-        self._cur_indices[-1] += 1
-        self._cur_node = self._cur_node.parent.successors[self._cur_indices[-1]]
+    # A node takes the place of another one in a list
+    @staticmethod
+    def _set_sibling_slot(node: Node, slot: int | SiblingsOrder.Entry):
+        node._position = slot
+        if type(slot) is SiblingsOrder.Entry:
+            slot.node = node
+
+    # Only outdated nodes are recalculated, successors before their parents
+    def _get_metrics(self) -> tuple[int, int, int]:
+        nodes = [self]
+        while len(nodes) > 0:
+            node = nodes[-1]
+            if node._metrics is not None:
+                nodes.pop()
+                continue
+
+            outdated_successors = [successor for successor in node._successors if successor._metrics is None]
+            if len(outdated_successors) > 0:
+                nodes.extend(outdated_successors)
+                continue
+
+            size, leaves_number, height = 1, 0, 0
+            for successor in node._successors:
+                successor_size, successor_leaves_number, successor_height = successor._metrics
+                size += successor_size
+                leaves_number += successor_leaves_number
+                if successor_height + 1 > height:
+                    height = successor_height + 1
+            node._metrics = (size, max(leaves_number, 1), height)
+            nodes.pop()
+        return self._metrics
+
+    # Trees are traversed one by one in pre-order and post-order, and all together level by level in level-order
+    @staticmethod
+    def _traverse_trees(roots: list[Node], order: TraversalOrder, condition: Callable[[Node], bool] | None):
+        if order == TraversalOrder.PRE_ORDER:
+            nodes = list(reversed(roots))
+            while len(nodes) > 0:
+                node = nodes.pop()
+                if condition is None or condition(node):
+                    yield node
+                nodes.extend(reversed(node._successors))
+
+        elif order == TraversalOrder.POST_ORDER:
+            nodes = [(root, False) for root in reversed(roots)]
+            while len(nodes) > 0:
+                node, are_successors_passed = nodes.pop()
+                if are_successors_passed:
+                    if condition is None or condition(node):
+                        yield node
+                    continue
+                nodes.append((node, True))
+                nodes.extend((successor, False) for successor in reversed(node._successors))
+
+        else:
+            nodes = deque(roots)
+            while len(nodes) > 0:
+                node = nodes.popleft()
+                if condition is None or condition(node):
+                    yield node
+                nodes.extend(node._successors)
+
+
+# Euler tour numbering answers whether a node is an ancestor of another one in O(1), table of jumps to 2^k-th
+# ancestors finds an ancestor on the specified level and the lowest common ancestor in O(log n).
+# The index is immutable, it shall be rebuilt after any modification of the trees.
+class AncestryIndex:
+    # Public interface
+    NO_INDEX = -1
+
+
+    def __init__(self, roots):
+        nodes = []
+        indices = {}
+        parents = []
+        levels = []
+        entries = []
+        exits = []
+
+        counter = 0
+        for root in roots:
+            stack = [(root, AncestryIndex.NO_INDEX, False)]
+            while len(stack) > 0:
+                node, parent_index, is_exit = stack.pop()
+                if is_exit:
+                    exits[indices[id(node)]] = counter
+                    counter += 1
+                    continue
+
+                index = len(nodes)
+                indices[id(node)] = index
+                nodes.append(node)
+                parents.append(parent_index)
+                levels.append(0 if parent_index == AncestryIndex.NO_INDEX else levels[parent_index] + 1)
+                entries.append(counter)
+                exits.append(counter)
+                counter += 1
+
+                stack.append((node, parent_index, True))
+                for successor in reversed(node.successors):
+                    stack.append((successor, index, False))
+
+        jumps = [parents]
+        max_level = max(levels, default=0)
+        while (1 << len(jumps)) <= max_level:
+            previous_jumps = jumps[-1]
+            jumps.append([previous_jumps[target] if target != AncestryIndex.NO_INDEX else AncestryIndex.NO_INDEX
+                          for target in previous_jumps])
+
+        self._nodes = nodes
+        self._indices = indices
+        self._levels = levels
+        self._entries = entries
+        self._exits = exits
+        self._jumps = jumps
+
+    def contains(self, node: Node):
+        return id(node) in self._indices
+
+    def get_level(self, node: Node) -> int:
+        return self._levels[self._indices[id(node)]]
+
+    # Only strict ancestors are considered, the same as Node.is_ancestor does
+    def is_ancestor(self, first: Node, second: Node):
+        first_index, second_index = self._indices[id(first)], self._indices[id(second)]
+        return self._entries[first_index] < self._entries[second_index] \
+               and self._exits[second_index] < self._exits[first_index]
+
+    def get_ancestor_on_level(self, node: Node, level: int) -> Node:
+        return self._nodes[self._lift(self._indices[id(node)], level)]
+
+    def find_lowest_common_ancestor(self, first: Node, second: Node) -> Node | None:
+        first_index, second_index = self._indices[id(first)], self._indices[id(second)]
+        level = min(self._levels[first_index], self._levels[second_index])
+        first_index, second_index = self._lift(first_index, level), self._lift(second_index, level)
+        if first_index == second_index:
+            return self._nodes[first_index]
+
+        for jumps in reversed(self._jumps):
+            if jumps[first_index] != jumps[second_index]:
+                first_index, second_index = jumps[first_index], jumps[second_index]
+        common_ancestor_index = self._jumps[0][first_index]
+        if common_ancestor_index == AncestryIndex.NO_INDEX:
+            return None
+        return self._nodes[common_ancestor_index]
+
+
+    # Private part
+    def _lift(self, index: int, level: int) -> int:
+        distance = self._levels[index] - level
+        power = 0
+        while distance > 0:
+            if distance & 1:
+                index = self._jumps[power][index]
+            distance >>= 1
+            power += 1
+        return index
 
 
 # TODO: Try implementation with fictive root of roots to simplify modification method's code
 class Forest:
     # Public interface
     class ForestNode(Node):
+        __slots__ = ('_forest',)
+
         def __init__(self, forest: Forest, content=None):
             super().__init__(content)
             self._forest = forest
@@ -238,6 +584,19 @@ class Forest:
         def get_forest_ref(self):
             return self._forest
 
+        # Only an already built index is used, since connect_to checks ancestry before every modification and
+        # rebuilding the dropped index there costs more than walking the parent chain
+        def is_ancestor(self, second: Node):
+            ancestry_index = self._forest._ancestry_index if self._forest is not None else None
+            if ancestry_index is None or not ancestry_index.contains(self) or not ancestry_index.contains(second):
+                return super().is_ancestor(second)
+            return ancestry_index.is_ancestor(self, second)
+
+        def _on_successors_changed(self):
+            super()._on_successors_changed()
+            if self._forest is not None:
+                self._forest._ancestry_index = None
+
 
     class NotNode(Exception): pass
     class NotLeaf(Exception): pass
@@ -246,8 +605,9 @@ class Forest:
 
     def __init__(self):
         self._roots = []
-        self._cur_node = None
-        self._cur_tree = -1
+
+        self._is_ancestry_indexed = False
+        self._ancestry_index: AncestryIndex | None = None
 
 
     @staticmethod
@@ -255,13 +615,14 @@ class Forest:
         forest = Forest()
         for tree in argv:
             root = Forest._build_tree(tree, forest)
-            forest._roots.append(root)
+            Node._append_sibling(forest._roots, root)
         return forest
 
 
     # TODO: Optimize all modifying functions with for loops
     def create_root(self, content=None) -> ForestNode:
-        self._roots.append(self._create_node(content))
+        Node._append_sibling(self._roots, self._create_node(content))
+        self._ancestry_index = None
         return self._roots[-1]
 
     def add_leaf(self, parent: ForestNode, content=None) -> ForestNode:
@@ -275,8 +636,10 @@ class Forest:
 
         new_node = self._create_node(content)
         if new_successor.is_root():
-            index = self._roots.index(new_successor)
+            index = Node._find_sibling_position(self._roots, new_successor)
             self._roots[index] = new_node
+            Node._set_sibling_slot(new_node, new_successor._position)
+            new_successor._position = 0
 
         new_successor.replace_with(new_node)
         new_successor.connect_to(new_node)
@@ -306,7 +669,7 @@ class Forest:
                 node_parent = node.parent
                 successor.connect_to(node_parent)
         else:
-            self._roots.remove(node)
+            self._remove_root(node)
             for successor in temp_node_successors:
                 self._make_root(successor)
 
@@ -317,7 +680,7 @@ class Forest:
         is_root = subroot.is_root()
         subroot.connect_to(new_parent)
         if is_root:
-            self._roots.remove(subroot)
+            self._remove_root(subroot)
 
     def free_leafage(self, parent: ForestNode):
         self._validate_nodes(parent)
@@ -369,13 +732,13 @@ class Forest:
         if leaf.is_parent():
             raise Forest.NotLeaf
         if leaf.is_root():
-            self._roots.remove(leaf)
+            self._remove_root(leaf)
         self._remove_node_from_its_forest(leaf)
 
     def cut_node(self, node: ForestNode, is_needed_to_replace_node_with_successors=False):
         self._validate_nodes(node)
         if node.is_root():
-            self._roots.remove(node)
+            self._remove_root(node)
 
         temp_node_successors = []
         for successor in node.successors:
@@ -383,55 +746,33 @@ class Forest:
 
         node_parent = node.parent
         if is_needed_to_replace_node_with_successors:
-            node_index = node_parent.successors.index(node)
-            next_siblings = []
-            for sibling in reversed(node_parent.successors[node_index+1:]):
-                sibling.disconnect()
-                next_siblings.append(sibling)
-            for successor in temp_node_successors:
-                successor.connect_to(node_parent)
-            for sibling in next_siblings:
-                sibling.connect_to(node_parent)
+            node_index = node.index_by_parent()
+            for successor_index, successor in enumerate(temp_node_successors):
+                successor.connect_to(node_parent, node_index + 1 + successor_index)
         else:
             for successor in temp_node_successors:
                 successor.connect_to(node_parent)
 
         if node.is_root():
             for successor in temp_node_successors:
-                self._roots.append(successor)
+                Node._append_sibling(self._roots, successor)
 
         self._remove_node_from_its_forest(node)
 
     def delete_subtree(self, subroot: ForestNode):
         self._validate_nodes(subroot)
         if subroot.is_root():
-            self._roots.remove(subroot)
+            self._remove_root(subroot)
         subroot.disconnect()
         self._remove_subtree_from_forest(subroot)
 
 
-    def __iter__(self):
-        if len(self._roots) > 0:
-            self._roots[0].__iter__()
-            self._cur_node = self._roots[0]
-            self._cur_tree = 0
-        return self
+    def __iter__(self) -> Iterator[ForestNode]:
+        return self.traverse()
 
-    def __next__(self):
-        if self._cur_node is None:
-            raise StopIteration
-
-        try:
-            self._cur_node = self._roots[self._cur_tree].__next__()
-        except StopIteration:
-            self._cur_tree += 1
-            if len(self._roots) == self._cur_tree:
-                raise StopIteration
-            else:
-                self._roots[self._cur_tree].__iter__()
-                self._cur_node = self._roots[self._cur_tree].__next__()
-
-        return self._cur_node
+    def traverse(self, order=TraversalOrder.PRE_ORDER, condition: Callable[[Node], bool] | None = None) \
+            -> Iterator[ForestNode]:
+        return Node._traverse_trees(list(self._roots), order, condition)
 
     def __eq__(self, other: Forest):
         if len(self._roots) != len(other._roots):
@@ -448,14 +789,14 @@ class Forest:
     def calc_distance(self, first: ForestNode, second: ForestNode):
         self._validate_nodes(first, second)
 
-        first_root_path = self.get_path_to_root(first, is_root_needed=True, is_itself_needed=True)
-        second_root_path = self.get_path_to_root(second, is_root_needed=True, is_itself_needed=True)
-        vertical_distance = len(first_root_path) - len(second_root_path)
+        first_level = self.calc_level(first)
+        second_level = self.calc_level(second)
+        vertical_distance = first_level - second_level
 
         lowest_row_level = self.find_lowest_common_row_level(first, second)
-        first_lowest_successor = first_root_path[-lowest_row_level-1]
-        second_lowest_successor = second_root_path[-lowest_row_level-1]
-        is_first_lower = len(first_root_path) < len(second_root_path)
+        first_lowest_successor = self.get_ancestor_on_level(first, lowest_row_level)
+        second_lowest_successor = self.get_ancestor_on_level(second, lowest_row_level)
+        is_first_lower = first_level < second_level
 
         if lowest_row_level == 0:
             lowest_row = self._roots
@@ -508,6 +849,16 @@ class Forest:
     def roots(self):
         return self._roots
 
+    # Ancestry queries use an index, that is built on demand and dropped on any modification of the forest.
+    # It pays off, when a lot of queries are made between modifications, so it's disabled by default.
+    def set_ancestry_indexing(self, is_enabled: bool):
+        self._is_ancestry_indexed = is_enabled
+        self._ancestry_index = None
+
+    @property
+    def is_ancestry_indexed(self):
+        return self._is_ancestry_indexed
+
 
     def calc_width(self):
         width = 0
@@ -524,6 +875,12 @@ class Forest:
                 depth = tree_depth
         return depth
 
+    def calc_size(self):
+        size = 0
+        for root in self._roots:
+            size += root.calc_subtree_size()
+        return size
+
     @staticmethod
     def calc_left_part_subtree_width(section_node: Node, subroot: Node):
         width = 0
@@ -582,6 +939,16 @@ class Forest:
         return leaf_candidate, distance
 
     def find_lowest_common_row_level(self, first: Node, second: Node):
+        self._validate_nodes(first, second)
+        ancestry_index = self._get_ancestry_index()
+        if ancestry_index is not None:
+            if first is second or ancestry_index.is_ancestor(first, second):
+                return ancestry_index.get_level(first)
+            if ancestry_index.is_ancestor(second, first):
+                return ancestry_index.get_level(second)
+            common_ancestor = ancestry_index.find_lowest_common_ancestor(first, second)
+            return 0 if common_ancestor is None else ancestry_index.get_level(common_ancestor) + 1
+
         first_root_path = self.get_path_to_root(first, is_root_needed=True, is_itself_needed=True)
         second_root_path = self.get_path_to_root(second, is_root_needed=True, is_itself_needed=True)
         cur_level = min(len(first_root_path), len(second_root_path)) - 1
@@ -593,7 +960,7 @@ class Forest:
             common_level = len(second_root_path) - 1
         else:
             while cur_level >= 0:
-                if first_root_path[-cur_level-1] == second_root_path[-cur_level-1]:
+                if first_root_path[-cur_level-1] is second_root_path[-cur_level-1]:
                     break
                 else:
                     cur_level -= 1
@@ -606,7 +973,7 @@ class Forest:
             return []
 
         parent = node.parent
-        node_index = parent.successors.index(node)
+        node_index = Node._find_sibling_position(parent.successors, node)
         siblings = parent.successors[node_index:]
         return siblings
 
@@ -625,6 +992,10 @@ class Forest:
         return next_sibling
 
     def is_successor_of(self, first: Node, second: Node):
+        if self._is_ancestry_indexed:
+            self._validate_nodes(first, second)
+            return first is second or self._get_ancestry_index().is_ancestor(second, first)
+
         path_to_root = self.get_path_to_root(first, is_root_needed=True, is_itself_needed=True)
         result = False
         for node in path_to_root:
@@ -658,13 +1029,38 @@ class Forest:
             path.append(cur_ancestor)
         return path
 
+    # Roots are on the level 0
+    def calc_level(self, node: Node) -> int:
+        self._validate_nodes(node)
+        ancestry_index = self._get_ancestry_index()
+        if ancestry_index is not None:
+            return ancestry_index.get_level(node)
+
+        level = 0
+        cur_ancestor = node.parent
+        while cur_ancestor is not None:
+            level += 1
+            cur_ancestor = cur_ancestor.parent
+        return level
+
+    def get_ancestor_on_level(self, node: Node, level: int) -> Node:
+        self._validate_nodes(node)
+        ancestry_index = self._get_ancestry_index()
+        if ancestry_index is not None:
+            return ancestry_index.get_ancestor_on_level(node, level)
+
+        ancestor = node
+        for step in range(self.calc_level(node) - level):
+            ancestor = ancestor.parent
+        return ancestor
+
     def node_parent_index(self, node: Node):
         self._validate_nodes(node)
 
         if node.is_successor():
             index = node.index_by_parent()
         else:
-            index = self._roots.index(node)
+            index = Node._find_sibling_position(self._roots, node)
         return index
 
 
@@ -677,7 +1073,7 @@ class Forest:
         nodes_list = nodes_list[1:]
 
         if parent is not None:
-            parent.successors.append(root)
+            Node._append_sibling(parent.successors, root)
             root.parent = parent
 
         for subtree in nodes_list:
@@ -686,11 +1082,18 @@ class Forest:
             else:
                 successor = Forest.ForestNode(forest)
                 successor.content = subtree
-                root.successors.append(successor)
+                Node._append_sibling(root.successors, successor)
                 successor.parent = root
 
         return root
 
+    def _get_ancestry_index(self) -> AncestryIndex | None:
+        if not self._is_ancestry_indexed:
+            return None
+        if self._ancestry_index is None:
+            self._ancestry_index = AncestryIndex(self._roots)
+        return self._ancestry_index
+
     def _create_node(self, content=None) -> ForestNode:
         return Forest.ForestNode(self, content)
 
@@ -700,15 +1103,22 @@ class Forest:
         node.disconnect()
 
     def _remove_subtree_from_forest(self, subroot: ForestNode):
-        for successor in subroot.successors:
-            self._remove_subtree_from_forest(successor)
-        subroot.set_forest_ref(None)
+        nodes = [subroot]
+        while len(nodes) > 0:
+            node = nodes.pop()
+            nodes.extend(node.successors)
+            node.set_forest_ref(None)
 
 
 # TODO: Rework all funcs to they sustain validity of the forest
     def _make_root(self, node: ForestNode):
         node.disconnect()
-        self._roots.append(node)
+        Node._append_sibling(self._roots, node)
+
+    # Roots aren't successors of any node, so the ancestry index isn't invalidated by their disconnection
+    def _remove_root(self, root: ForestNode):
+        Node._remove_sibling(self._roots, root)
+        self._ancestry_index = None
 
     def _validate_nodes(self, *argv):
         for arg in argv:
@@ -1,4 +1,6 @@
 
+import sys
+import random
 import unittest
 from tree import *
 
@@ -45,6 +47,17 @@ def is_forest_tree_valid(root: Forest.ForestNode, forest: Forest):
         is_subtree_valid(successor)
     return True
 
+def build_chain(depth):
+    root = Node(0)
+    cur_node = root
+    for level in range(depth):
+        successor = Node(level + 1)
+        successor.connect_to(cur_node)
+        cur_node = successor
+    return root
+
+DEEP_CHAIN_DEPTH = 5 * sys.getrecursionlimit()
+
 # TODO: Make input lists as constants
 # TODO: Check cases with several exceptions during one method call
 class TestNodeDisconnect(unittest.TestCase):
@@ -449,6 +462,18 @@ class TestNodeReplaceWith(unittest.TestCase):
 
 
 class TestNodeSwapWith(unittest.TestCase):
+    def test_swap_siblings(self):
+        tested_root = Node.build_tree([1, 2, [3, 4], 5, [6, 7]])
+        tested_node = tested_root.successors[1]
+        partner = tested_root.successors[3]
+        proper_root = Node.build_tree([1, 2, [6, 7], 5, [3, 4]])
+
+        tested_node.swap_with(partner)
+        self.assertTrue(is_subtree_valid(tested_root))
+        self.assertEqual(tested_root, proper_root)
+        self.assertEqual(3, tested_node.index_by_parent())
+        self.assertEqual(1, partner.index_by_parent())
+
     def test_swap_nodes_inside_tree(self):
         tested_root = Node.build_tree([1, [2, 9, [8, 5, 7, 2], 8], 5, [3, 4, [5, 6, 7], [2, 5, 9]], 7])
         tested_node = tested_root.successors[0]
@@ -495,6 +520,71 @@ class TestNodeSwapWith(unittest.TestCase):
         self.assertEqual(tested_root, tested_root_copy)
 
 
+class TestNodeIndexByParent(unittest.TestCase):
+    def test_disconnect_one_of_equal_siblings(self):
+        tested_root = Node.build_tree([1, 2, 2, 2])
+        first_sibling, tested_node, last_sibling = tested_root.successors
+
+        tested_node.disconnect()
+        self.assertIs(first_sibling, tested_root.successors[0])
+        self.assertIs(last_sibling, tested_root.successors[1])
+        self.assertEqual(1, last_sibling.index_by_parent())
+
+    def test_index_after_modifications(self):
+        generator = random.Random(5)
+        tested_root = Node.build_tree([0] + [1] * 300)
+        for step in range(200):
+            successors = tested_root.successors
+            tested_node = generator.choice(successors)
+            if step % 3 == 0:
+                tested_node.disconnect()
+            elif step % 3 == 1:
+                Node(1).connect_to(tested_root, generator.randrange(len(successors)))
+            else:
+                tested_node.connect_to(tested_root)
+
+            for index, successor in enumerate(tested_root.successors):
+                self.assertEqual(index, successor.index_by_parent())
+
+    def test_index_after_replacing_and_swapping(self):
+        generator = random.Random(6)
+        first_root = Node.build_tree([0] + [1] * 200)
+        second_root = Node.build_tree([0] + [2] * 150)
+        for step in range(200):
+            tested_node = generator.choice(first_root.successors)
+            other_node = generator.choice(first_root.successors + second_root.successors)
+            if step % 3 == 0 and other_node is not tested_node:
+                tested_node.swap_with(other_node)
+            elif step % 3 == 1 and other_node is not tested_node:
+                tested_node.replace_with(other_node)
+            else:
+                tested_node.replace_with(Node(3))
+
+            for root in (first_root, second_root):
+                for index, successor in enumerate(root.successors):
+                    self.assertEqual(index, successor.index_by_parent())
+
+    def test_index_of_roots(self):
+        tested_forest = Forest.build_forest([1], [2], [3], [4])
+        second_root, third_root = tested_forest.roots[1], tested_forest.roots[2]
+        tested_forest.delete_subtree(tested_forest.roots[0])
+        self.assertEqual(0, tested_forest.node_parent_index(second_root))
+        self.assertEqual(1, tested_forest.node_parent_index(third_root))
+
+
+class TestSiblingsOrder(unittest.TestCase):
+    def test_positions_after_modifications(self):
+        generator = random.Random(7)
+        entries = SiblingsOrder.build([Node(index) for index in range(100)])
+        for step in range(1000):
+            if step % 2 == 0 or len(entries) == 1:
+                position = generator.randrange(len(entries) + 1)
+                entries.insert(position, SiblingsOrder.insert(generator.choice(entries), position, Node(step)))
+            else:
+                SiblingsOrder.remove(entries.pop(generator.randrange(len(entries))))
+            self.assertEqual(list(range(len(entries))), [SiblingsOrder.get_position(entry) for entry in entries])
+
+
 class TestNodeReadOnlyMethods(unittest.TestCase):
     def test_by_creation(self):
         root = Node.build_tree([1, [2, 9, [8, 5, 7, 2], 8], 5, [3, 4, [5, 6, 7], [2, 5, 9]], 7])
@@ -616,6 +706,13 @@ class TestNodeCalcSubtreeWidth(unittest.TestCase):
         proper_result = 4
         self.assertEqual(proper_result, result)
 
+    def test_calc_deep_chain_width(self):
+        tested_root = build_chain(DEEP_CHAIN_DEPTH)
+        Node(-1).connect_to(tested_root)
+        result = tested_root.calc_subtree_width()
+        proper_result = 1
+        self.assertEqual(proper_result, result)
+
 
 class TestNodeCalcSubtreeDepth(unittest.TestCase):
     def test_calc_alone_node_depth(self):
@@ -648,6 +745,12 @@ class TestNodeCalcSubtreeDepth(unittest.TestCase):
         proper_result = 2
         self.assertEqual(proper_result, result)
 
+    def test_calc_deep_chain_depth(self):
+        tested_root = build_chain(DEEP_CHAIN_DEPTH)
+        result = tested_root.calc_subtree_depth()
+        proper_result = DEEP_CHAIN_DEPTH
+        self.assertEqual(proper_result, result)
+
 # TODO: Need to test index_by_parent
 
 # TODO: Check equivalency of work of two different methods where it's possible \
@@ -1204,6 +1307,15 @@ class TestForestDeleteLeaf(unittest.TestCase):
 
 
 class TestForestCutNode(unittest.TestCase):
+    def test_cut_node_with_replacing_before_several_siblings(self):
+        tested_forest = Forest.build_forest([1, 2, [3, 4, 5], 6, 7], [8])
+        proper_forest = Forest.build_forest([1, 2, 4, 5, 6, 7], [8])
+        tested_node = tested_forest.roots[0].successors[1]
+
+        tested_forest.cut_node(tested_node, is_needed_to_replace_node_with_successors=True)
+        self.assertTrue(is_forest_valid(tested_forest))
+        self.assertEqual(proper_forest, tested_forest)
+
     def test_cut_root(self):
         tested_forest = Forest.build_forest([2, 9, [8, 5, 7, 2], 8], [5], [3, 4, [5, 6, 7], [2, 5, 9]])
         proper_forest = Forest.build_forest([5], [3, 4, [5, 6, 7], [2, 5, 9]], [9], [8, 5, 7, 2], [8])
@@ -1263,6 +1375,20 @@ class TestForestCutNode(unittest.TestCase):
 
 
 class TestForestDeleteSubtree(unittest.TestCase):
+    def test_delete_deep_subtree(self):
+        tested_forest = Forest.build_forest([1, 2])
+        cur_node = tested_forest.roots[0]
+        deleted_nodes = []
+        for level in range(DEEP_CHAIN_DEPTH):
+            cur_node = tested_forest.add_leaf(cur_node, level)
+            deleted_nodes.append(cur_node)
+        proper_forest = Forest.build_forest([1, 2])
+
+        tested_forest.delete_subtree(deleted_nodes[0])
+        self.assertTrue(is_forest_valid(tested_forest))
+        self.assertEqual(proper_forest, tested_forest)
+        self.assertTrue(all(node.get_forest_ref() is None for node in deleted_nodes))
+
     def test_delete_root(self):
         tested_forest = Forest.build_forest([2, 9, [8, 5, 7, 2], 8], [5], [3, 4, [5, 6, 7], [2, 5, 9]])
         proper_forest = Forest.build_forest([2, 9, [8, 5, 7, 2], 8], [5])
@@ -1749,5 +1875,236 @@ class TestForestCalcDistance(unittest.TestCase):
     # TODO: Test tree-specific content and some forest functions on tree
 
 
+def build_random_forest(generator: random.Random, nodes_number, roots_number=3) -> Forest:
+    forest = Forest()
+    nodes = [forest.create_root(index) for index in range(roots_number)]
+    for index in range(nodes_number - roots_number):
+        nodes.append(forest.add_leaf(generator.choice(nodes), generator.randrange(5)))
+    return forest
+
+
+class TestForestAncestryIndex(unittest.TestCase):
+    def assert_same_ancestry(self, tested_forest: Forest, proper_forest: Forest, generator: random.Random):
+        tested_nodes, proper_nodes = list(tested_forest), list(proper_forest)
+        for pair in range(100):
+            first_index, second_index = generator.randrange(len(tested_nodes)), generator.randrange(len(tested_nodes))
+            tested_first, tested_second = tested_nodes[first_index], tested_nodes[second_index]
+            proper_first, proper_second = proper_nodes[first_index], proper_nodes[second_index]
+
+            self.assertEqual(proper_first.is_ancestor(proper_second), tested_first.is_ancestor(tested_second))
+            self.assertEqual(proper_forest.is_successor_of(proper_first, proper_second),
+                             tested_forest.is_successor_of(tested_first, tested_second))
+            self.assertEqual(proper_forest.find_lowest_common_row_level(proper_first, proper_second),
+                             tested_forest.find_lowest_common_row_level(tested_first, tested_second))
+            self.assertEqual(proper_forest.calc_distance(proper_first, proper_second),
+                             tested_forest.calc_distance(tested_first, tested_second))
+
+            level = generator.randrange(proper_forest.calc_level(proper_first) + 1)
+            self.assertEqual(proper_forest.calc_level(proper_first), tested_forest.calc_level(tested_first))
+            self.assertEqual(proper_nodes.index(proper_forest.get_ancestor_on_level(proper_first, level)),
+                             tested_nodes.index(tested_forest.get_ancestor_on_level(tested_first, level)))
+
+    def test_queries_are_the_same_with_index(self):
+        generator = random.Random(9)
+        for seed in range(5):
+            tested_forest = build_random_forest(random.Random(seed), 150)
+            tested_forest.set_ancestry_indexing(True)
+            proper_forest = build_random_forest(random.Random(seed), 150)
+            self.assert_same_ancestry(tested_forest, proper_forest, generator)
+
+    def test_index_is_dropped_on_modification(self):
+        generator = random.Random(10)
+        tested_forest = build_random_forest(random.Random(0), 100)
+        tested_forest.set_ancestry_indexing(True)
+        proper_forest = build_random_forest(random.Random(0), 100)
+        for step in range(30):
+            self.assert_same_ancestry(tested_forest, proper_forest, generator)
+            first_index, second_index = generator.sample(range(100), 2)
+            for forest in (tested_forest, proper_forest):
+                nodes = list(forest)
+                try:
+                    forest.move_subtree(nodes[first_index], nodes[second_index])
+                except Node.ClosingTransition:
+                    pass
+
+    def test_index_follows_roots_modification(self):
+        generator = random.Random(11)
+        tested_forest = build_random_forest(random.Random(1), 60, 10)
+        tested_forest.set_ancestry_indexing(True)
+        proper_forest = build_random_forest(random.Random(1), 60, 10)
+        for step in range(40):
+            self.assert_same_ancestry(tested_forest, proper_forest, generator)
+            tested_nodes = list(tested_forest)
+            tested_index = tested_forest._get_ancestry_index()
+            self.assertEqual(len(tested_nodes), len(tested_index._nodes))
+            self.assertTrue(all(tested_index.contains(node) for node in tested_nodes))
+
+            leaves_indices = [index for index, node in enumerate(proper_forest) if node.is_leaf()]
+            roots_indices = [index for index, node in enumerate(proper_forest) if node.is_root()]
+            operation = generator.randrange(4)
+            leaf_index, root_index = generator.choice(leaves_indices), generator.choice(roots_indices)
+            for forest in (tested_forest, proper_forest):
+                nodes = list(forest)
+                if operation == 0:
+                    forest.delete_leaf(nodes[leaf_index])
+                elif operation == 1 and len(roots_indices) > 1:
+                    forest.delete_subtree(nodes[root_index])
+                elif operation == 2:
+                    forest.cut_node(nodes[root_index])
+                else:
+                    forest.create_root(step)
+                    forest.add_leaf(nodes[leaf_index], step)
+
+    def test_lowest_common_ancestor_of_different_trees(self):
+        tested_forest = Forest.build_forest([1, [2, 3]], [4, 5])
+        tested_index = AncestryIndex(tested_forest.roots)
+        first, second = tested_forest.roots[0].successors[0].successors[0], tested_forest.roots[1].successors[0]
+        self.assertIsNone(tested_index.find_lowest_common_ancestor(first, second))
+        self.assertIs(tested_forest.roots[0], tested_index.find_lowest_common_ancestor(first, tested_forest.roots[0]))
+
+    def test_alien_nodes_with_index(self):
+        tested_forest = Forest.build_forest([1, [2, 3]], [4, 5])
+        tested_forest.set_ancestry_indexing(True)
+        alien_node = Forest.build_forest([6, 7]).roots[0]
+        node = tested_forest.roots[0]
+        self.assertRaises(Forest.AlienNode, tested_forest.find_lowest_common_row_level, node, alien_node)
+        self.assertRaises(Forest.AlienNode, tested_forest.find_lowest_common_row_level, alien_node, node)
+        self.assertRaises(Forest.AlienNode, tested_forest.is_successor_of, node, alien_node)
+        self.assertRaises(Forest.AlienNode, tested_forest.calc_level, alien_node)
+
+    def test_modifications_do_not_rebuild_index(self):
+        generator = random.Random(12)
+        tested_forest = build_random_forest(random.Random(2), 100)
+        tested_forest.set_ancestry_indexing(True)
+        proper_forest = build_random_forest(random.Random(2), 100)
+        builds_number = 0
+        get_ancestry_index = tested_forest._get_ancestry_index
+
+        def get_counted_ancestry_index():
+            nonlocal builds_number
+            builds_number += tested_forest._ancestry_index is None
+            return get_ancestry_index()
+
+        tested_forest._get_ancestry_index = get_counted_ancestry_index
+        for step in range(50):
+            first_index, second_index = generator.sample(range(100), 2)
+            for forest in (tested_forest, proper_forest):
+                nodes = list(forest)
+                try:
+                    forest.move_subtree(nodes[first_index], nodes[second_index])
+                except Node.ClosingTransition:
+                    pass
+        self.assertEqual(0, builds_number)
+        self.assert_same_ancestry(tested_forest, proper_forest, generator)
+        self.assertEqual(1, builds_number)
+
+
+
+def calc_naive_metrics(root: Node):
+    size, leaves_number, height = 1, 0, 0
+    for successor in root.successors:
+        successor_size, successor_leaves_number, successor_height = calc_naive_metrics(successor)
+        size += successor_size
+        leaves_number += successor_leaves_number
+        height = max(height, successor_height + 1)
+    return size, max(leaves_number, 1), height
+
+
+class TestForestSubtreeMetrics(unittest.TestCase):
+    def test_calc_subtree_size(self):
+        tested_forest = Forest.build_forest([2, 9, [8, 5, 7, 2], 8], [5], [3, 4, [5, 6, 7], [2, 5, 9]])
+        self.assertEqual(7, tested_forest.roots[0].calc_subtree_size())
+        self.assertEqual(1, tested_forest.roots[1].calc_subtree_size())
+        self.assertEqual(16, tested_forest.calc_size())
+
+    def test_metrics_after_modifications(self):
+        generator = random.Random(3)
+        tested_forest = Forest.build_forest([0, 1, [2, 3, 4]], [5, [6, [7, 8]]])
+        for step in range(600):
+            nodes = list(tested_forest)
+            node = generator.choice(nodes)
+            other_node = generator.choice(nodes)
+            operation = generator.randrange(8)
+            try:
+                if operation == 0:
+                    tested_forest.add_leaf(node, step)
+                elif operation == 1:
+                    tested_forest.insert_node_before(node, step)
+                elif operation == 2:
+                    tested_forest.insert_node_after(node, step)
+                elif operation == 3:
+                    tested_forest.move_subtree(node, other_node)
+                elif operation == 4 and len(nodes) > 20:
+                    tested_forest.cut_node(node, node.is_successor())
+                elif operation == 5 and len(nodes) > 20:
+                    tested_forest.delete_subtree(node)
+                elif operation == 6:
+                    tested_forest.free_subtree(node)
+                elif operation == 7:
+                    tested_forest.add_leaf(node, step)
+                    node.calc_subtree_size()
+                    tested_forest.move_node(node, other_node)
+            except Node.ClosingTransition:
+                pass
+
+            for checked_node in tested_forest:
+                proper_metrics = calc_naive_metrics(checked_node)
+                tested_metrics = (checked_node.calc_subtree_size(), checked_node.calc_subtree_width() + 1,
+                                  checked_node.calc_subtree_depth())
+                self.assertEqual(proper_metrics, tested_metrics)
+
+
+class TestTraversal(unittest.TestCase):
+    def test_pre_order(self):
+        tested_forest = Forest.build_forest([0, 1, [2, 3, 4]], [5, [6, [7, 8]]])
+        self.assertEqual([node.content for node in tested_forest], [0, 1, 2, 3, 4, 5, 6, 7, 8])
+        self.assertEqual([node.content for node in tested_forest.roots[0]], [0, 1, 2, 3, 4])
+
+    def test_post_order(self):
+        tested_forest = Forest.build_forest([0, 1, [2, 3, 4]], [5, [6, [7, 8]]])
+        tested_contents = [node.content for node in tested_forest.traverse(TraversalOrder.POST_ORDER)]
+        self.assertEqual(tested_contents, [1, 3, 4, 2, 0, 8, 7, 6, 5])
+
+    def test_level_order(self):
+        tested_forest = Forest.build_forest([0, 1, [2, 3, 4]], [5, [6, [7, 8]]])
+        tested_contents = [node.content for node in tested_forest.traverse(TraversalOrder.LEVEL_ORDER)]
+        self.assertEqual(tested_contents, [0, 5, 1, 2, 6, 3, 4, 7, 8])
+
+    def test_condition(self):
+        tested_forest = Forest.build_forest([0, 1, [2, 3, 4]], [5, [6, [7, 8]]])
+        tested_contents = [node.content for node in tested_forest.traverse(condition=lambda node: node.is_leaf())]
+        self.assertEqual(tested_contents, [1, 3, 4, 8])
+
+    def test_nested_iterations(self):
+        tested_forest = Forest.build_forest([0, 1, [2, 3, 4]], [5, [6, [7, 8]]])
+        pairs = [(first.content, second.content) for first in tested_forest for second in tested_forest]
+        self.assertEqual(len(pairs), 81)
+        self.assertEqual(pairs[:9], [(0, content) for content in range(9)])
+
+    def test_interleaved_iterations(self):
+        tested_root = Node.build_tree([0, 1, [2, 3, 4]])
+        first_iterator = iter(tested_root)
+        second_iterator = iter(tested_root)
+        self.assertEqual(next(first_iterator).content, 0)
+        self.assertEqual(next(first_iterator).content, 1)
+        self.assertEqual(next(second_iterator).content, 0)
+        self.assertEqual([node.content for node in first_iterator], [2, 3, 4])
+        self.assertEqual([node.content for node in second_iterator], [1, 2, 3, 4])
+
+    def test_deep_chain(self):
+        root = build_chain(DEEP_CHAIN_DEPTH)
+        for order in TraversalOrder:
+            self.assertEqual(sum(1 for node in root.traverse(order)), DEEP_CHAIN_DEPTH + 1)
+
+
+class TestNodeSlots(unittest.TestCase):
+    def test_nodes_have_no_dicts(self):
+        tested_forest = Forest.build_forest([0, 1])
+        for node in tested_forest:
+            self.assertFalse(hasattr(node, '__dict__'))
+        self.assertFalse(hasattr(Node(), '__dict__'))
+
+
+
 if __name__ == '__main__':
     unittest.main()